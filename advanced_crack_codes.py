@@ -1,10 +1,14 @@
 """
 Advanced Code Breaking - Optimized search strategies
 """
-from enigma import build_enigma
-from itertools import product, permutations
+from enigma import CompiledEnigma
+from cribs import CribWindow, analyze_crib_placement, report_crib_placement
+from itertools import permutations
+from keyspace import CandidateScheduler, Keyspace, frequency_first, matching_rings
 import time
 from collections import Counter
+import instrumentation
+from progress import Progress
 
 
 class PerformanceMetrics:
@@ -14,12 +18,19 @@ class PerformanceMetrics:
         self.end_time = None
         self.attempts = 0
         self.total_combinations = 0
+        # Counters and timers from instrumentation, when it is enabled
+        self.counters = None
+        self._snapshot = None
 
     def start(self):
         self.start_time = time.time()
+        if instrumentation.is_enabled():
+            self._snapshot = instrumentation.snapshot()
 
     def end(self):
         self.end_time = time.time()
+        if self._snapshot is not None:
+            self.counters = instrumentation.difference(instrumentation.snapshot(), self._snapshot)
 
     def increment(self):
         self.attempts += 1
@@ -32,6 +43,11 @@ class PerformanceMetrics:
         print(f"  Attempts: {self.attempts:,}")
         print(f"  Reduction: {100 - efficiency:.1f}%")
         print(f"  Time: {elapsed:.2f}s ({self.attempts / elapsed:.0f} per sec)" if elapsed > 0 else "")
+        if self.counters:
+            for name, count in self.counters['counters'].items():
+                print(f"  {name.replace('_', ' ').capitalize()}: {count:,}")
+            for name, timer in self.counters['timers'].items():
+                print(f"  {name}: {timer['calls']:,} calls, {timer['seconds']:.2f}s")
 
 
 def calculate_ic(text):
@@ -43,7 +59,8 @@ def calculate_ic(text):
     return ic / (n * (n - 1))
 
 
-def intelligent_position_search(cipher, crib, rotors, reflector, rings, pairs):
+def intelligent_position_search(cipher, crib, rotors, reflector, rings, pairs, crib_offsets=None):
+    window = CribWindow(cipher, crib, crib_offsets) if crib_offsets is not None else None
     metrics = PerformanceMetrics("Position Search")
     metrics.total_combinations = 26 ** 3
     metrics.start()
@@ -51,93 +68,86 @@ def intelligent_position_search(cipher, crib, rotors, reflector, rings, pairs):
     letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
     common_first = 'ETAOINSHRDLCUMWFGYPBVKJXQZ'
 
-    priority_positions = []
-    for first in common_first[:10]:
-        for second in letters:
-            for third in letters:
-                priority_positions.append(first + second + third)
+    # Positions starting with a common letter first, then the rest, each in alphabetical order
+    keyspace = Keyspace([rotors], [reflector], rings=rings, position_choices=letters)
+    priority_positions = CandidateScheduler(keyspace, [frequency_first(keyspace, common_first[:10])])
 
-    all_positions = [''.join(p) for p in product(letters, repeat=3)]
-    for pos in all_positions:
-        if pos not in priority_positions:
-            priority_positions.append(pos)
+    machine = CompiledEnigma.from_settings(rotors, reflector, 'AAA', rings, pairs)
+    progress = Progress('intelligent_positions', metrics.total_combinations)
 
-    for positions in priority_positions:
+    for key in priority_positions:
+        positions = key['positions']
         metrics.increment()
-        if metrics.attempts % 1000 == 0:
-            print(f"  Testing position {metrics.attempts:,}...", end='\r')
-
-        try:
-            machine = build_enigma(rotors, reflector, positions, rings, pairs)
-            plaintext = machine.process_text(cipher)
-
-            if crib in plaintext:
-                metrics.end()
-                print(f"\n  Found at {positions} after {metrics.attempts:,} attempts")
-                metrics.report()
-                return {
-                    'plaintext': plaintext,
-                    'positions': positions,
-                    'metrics': metrics
-                }
-        except:
+        progress.update(metrics.attempts)
+
+        machine.reset(positions=positions)
+        if window and window.match(machine) is None:
             continue
+        plaintext = machine.process_text(cipher)
+
+        if crib in plaintext:
+            metrics.end()
+            progress.finish(metrics.attempts, found=True)
+            print(f"  Found at {positions} after {metrics.attempts:,} attempts")
+            metrics.report()
+            return {
+                'plaintext': plaintext,
+                'positions': positions,
+                'metrics': metrics
+            }
 
     metrics.end()
+    progress.finish(metrics.attempts, found=False)
     return None
 
 
-def optimized_rotor_ring_search(cipher, crib, position, pairs, rotor_choices, ring_choices):
+def optimized_rotor_ring_search(cipher, crib, position, pairs, rotor_choices, ring_choices, crib_offsets=None):
+    window = CribWindow(cipher, crib, crib_offsets) if crib_offsets is not None else None
     metrics = PerformanceMetrics("Rotor/Ring Search")
-    metrics.total_combinations = (
-        len(list(permutations(rotor_choices, 3))) *
-        len(list(product(ring_choices, repeat=3))) *
-        3
-    )
+    keyspace = Keyspace(rotor_choices, ['A', 'B', 'C'], ring_choices=ring_choices, positions=position)
+    metrics.total_combinations = len(keyspace)
     metrics.start()
 
     reflector_order = ['B', 'C', 'A']
+    keyspace.validate()
+    first = keyspace[0]
+    machine = CompiledEnigma.from_settings(first['rotors'], first['reflector'], position, first['rings'], pairs)
+
+    def tiers():
+        # Preferred reflectors first; within each rotor order, matching rings before the rest
+        for reflector in reflector_order:
+            for rotor_combo in permutations(rotor_choices, 3):
+                group = keyspace.subspace(rotors=[rotor_combo], reflectors=[reflector])
+                yield from matching_rings(group)
+                yield group
+
+    progress = Progress('optimized_rotor_ring', metrics.total_combinations)
+
+    for key in CandidateScheduler(keyspace, tiers()):
+        rotors, reflector, ring_combo = key['rotors'], key['reflector'], key['rings']
+        metrics.increment()
+        progress.update(metrics.attempts)
 
-    prioritized_rings = []
-    for r in ring_choices:
-        prioritized_rings.append((r, r, r))
-    for ring_combo in product(ring_choices, repeat=3):
-        if ring_combo not in prioritized_rings:
-            prioritized_rings.append(ring_combo)
-
-    for reflector in reflector_order:
-        for rotor_combo in permutations(rotor_choices, 3):
-            for ring_combo in prioritized_rings:
-                metrics.increment()
-
-                if metrics.attempts % 500 == 0:
-                    elapsed = time.time() - metrics.start_time
-                    rate = metrics.attempts / elapsed if elapsed > 0 else 0
-                    remaining = (metrics.total_combinations - metrics.attempts) / rate if rate > 0 else 0
-                    pct = 100 * metrics.attempts // metrics.total_combinations
-                    print(f"  Testing {metrics.attempts:,}/{metrics.total_combinations:,} ({pct}%) "
-                          f"ETA: {remaining / 60:.1f}m", end='\r')
-
-                try:
-                    rotors = [r.upper() for r in rotor_combo]
-                    machine = build_enigma(rotors, reflector, position, ring_combo, pairs)
-                    plaintext = machine.process_text(cipher)
-
-                    if crib in plaintext:
-                        metrics.end()
-                        print(f"\n  Found: Rotors={rotors} Reflector={reflector} Rings={ring_combo}")
-                        metrics.report()
-                        return {
-                            'plaintext': plaintext,
-                            'reflector': reflector,
-                            'rotors': rotors,
-                            'rings': ring_combo,
-                            'metrics': metrics
-                        }
-                except:
-                    continue
+        machine.reset(rings=ring_combo, reflector=reflector, rotors=rotors)
+        if window and window.match(machine) is None:
+            continue
+        plaintext = machine.process_text(cipher)
+
+        if crib in plaintext:
+            metrics.end()
+            progress.finish(metrics.attempts, found=True)
+            print(f"  Found: Rotors={rotors} Reflector={reflector} Rings={ring_combo}")
+            metrics.report()
+            return {
+                'plaintext': plaintext,
+                'reflector': reflector,
+                'rotors': rotors,
+                'rings': ring_combo,
+                'metrics': metrics
+            }
 
     metrics.end()
+    progress.finish(metrics.attempts, found=False)
     return None
 
 
@@ -146,13 +156,19 @@ def run_code_2():
     print("Code 2: Position Search with Frequency Prioritization")
     print("=" * 60)
 
+    cipher = 'CMFSUPKNCBMUYEQVVDYKLRQZTPUFHSWWAKTUGXMPAMYAFITXIJKMH'
+    crib = 'UNIVERSITY'
+    placement = analyze_crib_placement(cipher, crib)
+    report_crib_placement(placement)
+
     result = intelligent_position_search(
-        cipher='CMFSUPKNCBMUYEQVVDYKLRQZTPUFHSWWAKTUGXMPAMYAFITXIJKMH',
-        crib='UNIVERSITY',
+        cipher=cipher,
+        crib=crib,
         rotors=['BETA', 'I', 'III'],
         reflector='B',
         rings=(23, 2, 10),
-        pairs=['VH', 'PT', 'ZG', 'BJ', 'EY', 'FS']
+        pairs=['VH', 'PT', 'ZG', 'BJ', 'EY', 'FS'],
+        crib_offsets=placement['offsets']
     )
 
     if result:
@@ -172,13 +188,19 @@ def run_code_3():
     rotor_choices = ['II', 'IV', 'BETA', 'GAMMA']
     ring_choices = [2, 4, 6, 8, 20, 22, 24, 26]
 
+    cipher = 'ABSKJAKKMRITTNYURBJFWQGRSGNNYJSDRYLAPQWIAGKJYEPCTAGDCTHLCDRZRFZHKNRSDLNPFPEBVESHPY'
+    crib = 'THOUSANDS'
+    placement = analyze_crib_placement(cipher, crib)
+    report_crib_placement(placement)
+
     result = optimized_rotor_ring_search(
-        cipher='ABSKJAKKMRITTNYURBJFWQGRSGNNYJSDRYLAPQWIAGKJYEPCTAGDCTHLCDRZRFZHKNRSDLNPFPEBVESHPY',
-        crib='THOUSANDS',
+        cipher=cipher,
+        crib=crib,
         position='EMY',
         pairs=['FH', 'TS', 'BE', 'UQ', 'KD', 'AL'],
         rotor_choices=rotor_choices,
-        ring_choices=ring_choices
+        ring_choices=ring_choices,
+        crib_offsets=placement['offsets']
     )
 
     if result:
@@ -0,0 +1,421 @@
+"""
+NumPy batch engine - run one ciphertext through thousands of Enigma keys at once
+"""
+from itertools import combinations, product
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from enigma import RotorAssembly, Plugboard, PlugLead
+
+
+ROTOR_NAMES = list(RotorAssembly.ROTOR_CONFIGS)
+
+FORWARD_WIRINGS = np.array(
+    [[ord(char) - ord('A') for char in wiring] for wiring, _ in RotorAssembly.ROTOR_CONFIGS.values()],
+    dtype=np.int64
+)
+BACKWARD_WIRINGS = np.argsort(FORWARD_WIRINGS, axis=1)
+NOTCHES = np.array(
+    [[chr(code + ord('A')) in notch for code in range(26)] for _, notch in RotorAssembly.ROTOR_CONFIGS.values()],
+    dtype=bool
+)
+
+
+def text_to_codes(text):
+    """Uppercase letters of text as an array of codes 0-25, other characters dropped"""
+    data = np.frombuffer(text.upper().encode('ascii', 'ignore'), dtype=np.uint8)
+    data = data[(data >= ord('A')) & (data <= ord('Z'))]
+    return (data - ord('A')).astype(np.int64)
+
+
+def codes_to_text(codes):
+    return (np.asarray(codes, dtype=np.uint8) + ord('A')).tobytes().decode('ascii')
+
+
+def codes_to_texts(codes):
+    """Convert every row of an N x L code array to a string"""
+    return [codes_to_text(row) for row in codes]
+
+
+def _is_single(value, element_type=None):
+    """A setting is shared by all keys unless it is a sequence of per-key settings"""
+    if value is None or isinstance(value, str):
+        return True
+    if element_type is None:
+        return False
+    return len(value) == 0 or isinstance(value[0], element_type)
+
+
+def _per_key(value, element_type, count):
+    if _is_single(value, element_type):
+        return [value] * count
+    if len(value) != count:
+        raise ValueError(f"Expected {count} settings, got {len(value)}")
+    return list(value)
+
+
+_PLUGBOARD_CACHE = {}
+
+
+def plugboard_permutation(plug_pairs):
+    """Validated plugboard as a 26-entry permutation array"""
+    key = tuple(pair.upper() for pair in plug_pairs or ())
+    if key not in _PLUGBOARD_CACHE:
+        board = Plugboard()
+        for pair in key:
+            board.add(PlugLead(pair))
+        _PLUGBOARD_CACHE[key] = np.array([ord(board.encode(chr(code + ord('A')))) - ord('A')
+                                          for code in range(26)], dtype=np.int64)
+    return _PLUGBOARD_CACHE[key]
+
+
+def reflector_permutation(reflector):
+    """A reflector name from REFLECTOR_CONFIGS or a full 26-letter wiring as an array"""
+    wiring = reflector.upper()
+    if len(wiring) != 26:
+        wiring = RotorAssembly.REFLECTOR_CONFIGS[wiring]
+    return np.array([ord(char) - ord('A') for char in wiring], dtype=np.int64)
+
+
+class KeyBatch:
+    """
+    N Enigma keys as arrays. Rotor columns are ordered right to left, as in RotorAssembly.rotors.
+    """
+
+    def __init__(self, rotors, ring_offsets, offsets, reflectors, plugboards):
+        self.rotors = rotors
+        self.ring_offsets = ring_offsets
+        self.offsets = offsets
+        self.reflectors = reflectors
+        self.plugboards = plugboards
+
+    def __len__(self):
+        return len(self.rotors)
+
+    @classmethod
+    def from_settings(cls, rotor_lists, reflectors, positions='AAA', rings=(1, 1, 1), plug_pairs=None, count=None):
+        """
+        Each setting may be given once, shared by every key, or as a sequence with one entry per key.
+        Settings follow build_enigma: rotors, positions and rings are listed left to right.
+        """
+        if count is None:
+            count = 1
+            for value, element_type in ((rotor_lists, str), (reflectors, None), (positions, None),
+                                        (rings, int), (plug_pairs, str)):
+                if not _is_single(value, element_type):
+                    count = len(value)
+                    break
+
+        rotor_lists = _per_key(rotor_lists, str, count)
+        reflectors = _per_key(reflectors, None, count)
+        positions = _per_key(positions, None, count)
+        rings = _per_key(rings, int, count)
+        plug_pairs = _per_key(plug_pairs, str, count)
+
+        width = len(rotor_lists[0]) if count else 0
+
+        # Settings repeat a lot across a batch, so each distinct one is converted only once
+        def rotor_row(names):
+            if len(names) != width:
+                raise ValueError("All keys in a batch must use the same number of rotors")
+            row = []
+            for name in reversed(names):
+                if name.upper() not in RotorAssembly.ROTOR_CONFIGS:
+                    raise KeyError(name.upper())
+                row.append(ROTOR_NAMES.index(name.upper()))
+            return row
+
+        def ring_row(ring_settings):
+            return [ring_settings[pos_idx] - 1 if pos_idx < len(ring_settings) else 0
+                    for pos_idx in range(width - 1, -1, -1)]
+
+        def position_row(position):
+            return [ord(position[pos_idx].upper()) - ord('A') if pos_idx < len(position) else 0
+                    for pos_idx in range(width - 1, -1, -1)]
+
+        converters = (
+            (rotor_lists, rotor_row, tuple),
+            (rings, ring_row, tuple),
+            (positions, position_row, str),
+            (reflectors, reflector_permutation, str.upper),
+            (plug_pairs, plugboard_permutation, lambda pairs: tuple(pairs or ())),
+        )
+        columns = []
+        for settings, convert, make_key in converters:
+            rows = {}
+            column = []
+            for setting in settings:
+                key = make_key(setting)
+                if key not in rows:
+                    rows[key] = convert(key)
+                column.append(rows[key])
+            columns.append(np.array(column, dtype=np.int64).reshape(count, -1))
+        rotor_idx, ring_offsets, offsets, reflector_array, plugboard_array = columns
+
+        return cls(rotor_idx, ring_offsets, offsets, reflector_array, plugboard_array)
+
+
+def rotor_offsets(keys, length):
+    """
+    Rotor offsets of every key at every keypress, shape N x length x rotors.
+    Entry [:, t] is the state used to encrypt letter t, i.e. after its stepping.
+    """
+    offsets = keys.offsets.copy()
+    rotors = keys.rotors
+    history = np.empty((len(keys), length, rotors.shape[1]), dtype=np.int64)
+
+    for t in range(length):
+        if rotors.shape[1] >= 3:
+            middle_turn = NOTCHES[rotors[:, 1], offsets[:, 1]]
+            right_turn = NOTCHES[rotors[:, 0], offsets[:, 0]]
+            offsets[:, 2] += middle_turn
+            offsets[:, 1] += middle_turn | right_turn
+        offsets[:, 0] += 1
+        offsets %= 26
+        history[:, t] = offsets
+
+    return history
+
+
+def encrypt_offsets(codes, keys, history):
+    """Encrypt letter codes of shape N x L (or L) given precomputed rotor offsets"""
+    count, length, width = history.shape
+    rows = np.arange(count)[:, None]
+    current = np.broadcast_to(codes, (count, length))
+    current = keys.plugboards[rows, current]
+
+    for column in range(width):
+        shift = history[:, :, column] - keys.ring_offsets[:, column, None]
+        wiring = FORWARD_WIRINGS[keys.rotors[:, column]]
+        current = (wiring[rows, (current + shift) % 26] - shift) % 26
+
+    current = keys.reflectors[rows, current]
+
+    for column in range(width - 1, -1, -1):
+        shift = history[:, :, column] - keys.ring_offsets[:, column, None]
+        wiring = BACKWARD_WIRINGS[keys.rotors[:, column]]
+        current = (wiring[rows, (current + shift) % 26] - shift) % 26
+
+    return keys.plugboards[rows, current]
+
+
+def scrambler_table(rotors, reflector, rings=(1, 1, 1)):
+    """
+    Plugboard-free scrambler permutation for every combination of rotor offsets of one
+    rotor order, shape 26**rotors x 26. Row index is state_index() of the offsets.
+    """
+    keys = KeyBatch.from_settings(rotors, reflector, '', rings, None, count=1)
+    width = keys.rotors.shape[1]
+    states = np.arange(26 ** width)
+    current = np.broadcast_to(np.arange(26), (len(states), 26))
+
+    for column in range(width):
+        shift = ((states // 26 ** column) % 26 - keys.ring_offsets[0, column])[:, None]
+        current = (FORWARD_WIRINGS[keys.rotors[0, column]][(current + shift) % 26] - shift) % 26
+    current = keys.reflectors[0][current]
+    for column in range(width - 1, -1, -1):
+        shift = ((states // 26 ** column) % 26 - keys.ring_offsets[0, column])[:, None]
+        current = (BACKWARD_WIRINGS[keys.rotors[0, column]][(current + shift) % 26] - shift) % 26
+    return current.astype(np.uint8)
+
+
+def state_index(offsets):
+    """Row of scrambler_table() for offsets whose last axis lists the rotors right to left"""
+    weights = 26 ** np.arange(offsets.shape[-1])
+    return offsets @ weights
+
+
+def batch_process(cipher, keys):
+    """Encrypt (or decrypt) one text under every key of a KeyBatch, returning N x L letter codes"""
+    codes = text_to_codes(cipher) if isinstance(cipher, str) else np.asarray(cipher, dtype=np.int64)
+    history = rotor_offsets(keys, len(codes))
+    return encrypt_offsets(codes, keys, history)
+
+
+def crib_matches(plaintexts, crib):
+    """Boolean mask of the rows of an N x L code array that contain the crib"""
+    crib_codes = text_to_codes(crib)
+    if plaintexts.shape[1] < len(crib_codes):
+        return np.zeros(len(plaintexts), dtype=bool)
+    windows = sliding_window_view(plaintexts, len(crib_codes), axis=1)
+    return (windows == crib_codes).all(axis=2).any(axis=1)
+
+
+def batch_position_search(cipher, crib, rotors, reflector, rings, pairs, chunk_size=4096):
+    """Vectorized counterpart of crack_codes.test_positions"""
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    all_positions = [''.join(combo) for combo in product(letters, repeat=3)]
+
+    for start in range(0, len(all_positions), chunk_size):
+        chunk = all_positions[start:start + chunk_size]
+        keys = KeyBatch.from_settings(rotors, reflector, chunk, rings, pairs, count=len(chunk))
+        plaintexts = batch_process(cipher, keys)
+        hits = np.flatnonzero(crib_matches(plaintexts, crib))
+        if len(hits):
+            positions = chunk[hits[0]]
+            return {
+                'plaintext': codes_to_text(plaintexts[hits[0]]),
+                'reflector': reflector,
+                'rotors': rotors,
+                'positions': positions,
+                'rings': rings,
+                'pairs': pairs
+            }
+    return None
+
+
+def rotor_offset_sequence(assembly, length):
+    """
+    Offsets of a single RotorAssembly's rotors at each of the next length keypresses, shape length x rotors.
+    The middle and left rotors are only simulated at the keypresses where they move.
+    """
+    rotors = assembly.rotors
+    history = np.empty((length, len(rotors)), dtype=np.int64)
+    for column, rotor in enumerate(rotors):
+        history[:, column] = rotor.current_offset
+    history[:, 0] = (rotors[0].current_offset + 1 + np.arange(length)) % 26
+    if len(rotors) < 3 or length == 0:
+        return history
+
+    right_start = rotors[0].current_offset
+    right_notches = [ord(char) - ord('A') for char in rotors[0].turnover_position]
+    middle_notches = [ord(char) - ord('A') for char in rotors[1].turnover_position]
+    middle = rotors[1].current_offset
+    left = rotors[2].current_offset
+
+    event_times = []
+    event_states = []
+    t = 0
+    while t < length:
+        if middle in middle_notches:
+            middle = (middle + 1) % 26
+            left = (left + 1) % 26
+        else:
+            if not right_notches:
+                break
+            t += min((notch - right_start - t) % 26 for notch in right_notches)
+            if t >= length:
+                break
+            middle = (middle + 1) % 26
+        event_times.append(t)
+        event_states.append((middle, left))
+        t += 1
+
+    if event_times:
+        steps = np.searchsorted(np.array(event_times), np.arange(length), side='right')
+        moved = steps > 0
+        states = np.array(event_states, dtype=np.int64)
+        history[moved, 1] = states[steps[moved] - 1, 0]
+        history[moved, 2] = states[steps[moved] - 1, 1]
+    return history
+
+
+def _wiring_array(wiring):
+    return np.frombuffer(wiring.encode('ascii'), dtype=np.uint8).astype(np.int64) - ord('A')
+
+
+def process_text_vectorized(machine, text):
+    """
+    Encrypt text with a configured Enigma using array indexing along the whole message.
+    Output and the machine's final rotor positions match Enigma.process_text exactly.
+    """
+    assembly = machine.rotor_assembly
+    if not assembly:
+        raise RuntimeError("Machine not configured")
+
+    codes = text_to_codes(text)
+    history = rotor_offset_sequence(assembly, len(codes))
+    plugboard = np.array([ord(machine.plugboard.encode(chr(code + ord('A')))) - ord('A')
+                          for code in range(26)], dtype=np.int64)
+
+    current = plugboard[codes]
+    for column, rotor in enumerate(assembly.rotors):
+        shift = history[:, column] - rotor.ring_offset
+        current = (_wiring_array(rotor.forward_wiring)[(current + shift) % 26] - shift) % 26
+    current = _wiring_array(assembly.reflector.wiring)[current]
+    for column in range(len(assembly.rotors) - 1, -1, -1):
+        rotor = assembly.rotors[column]
+        shift = history[:, column] - rotor.ring_offset
+        current = (_wiring_array(rotor.backward_wiring)[(current + shift) % 26] - shift) % 26
+    current = plugboard[current]
+
+    if len(codes):
+        for column, rotor in enumerate(assembly.rotors):
+            rotor.current_offset = int(history[-1, column])
+    return codes_to_text(current)
+
+
+# Positions within (first pair, second pair), as (a, b, c, d), of the two new pairs made by
+# each of crack_codes._swap_pairs's three swap types
+SWAP_TYPES = np.array([[[0, 3], [2, 1]], [[0, 2], [1, 3]], [[1, 2], [0, 3]]])
+# Ways of splitting four chosen pairs into two swaps, in the order crack_codes tries them
+SWAP_SPLITS = np.array([[0, 1, 2, 3], [0, 2, 1, 3], [0, 3, 1, 2]])
+
+
+def double_swap_wirings(wiring):
+    """
+    Every double wire swap of a reflector wiring as an N x 26 array, row k being the k-th candidate
+    of crack_codes.reflector_swap_candidates for that reflector
+    """
+    base = _wiring_array(wiring)
+    pairs = np.array([(letter, partner) for letter, partner in enumerate(base) if letter < partner])
+    chosen = np.array(list(combinations(range(len(pairs)), 4)))
+
+    # Every (four pairs, split, first swap type, second swap type), the last varying fastest
+    combo, split, first_type, second_type = (axis.ravel() for axis in np.meshgrid(
+        np.arange(len(chosen)), np.arange(3), np.arange(3), np.arange(3), indexing='ij'))
+    swaps = pairs[chosen[combo[:, None], SWAP_SPLITS[split]]]
+    rows = np.arange(len(combo))[:, None]
+
+    wirings = np.repeat(base[None, :], len(combo), axis=0)
+    for swap, types in ((swaps[:, :2].reshape(-1, 4), first_type), (swaps[:, 2:].reshape(-1, 4), second_type)):
+        for new_pair in range(2):
+            letters = swap[rows, SWAP_TYPES[types, new_pair]]
+            wirings[rows[:, 0], letters[:, 0]] = letters[:, 1]
+            wirings[rows[:, 0], letters[:, 1]] = letters[:, 0]
+    return wirings
+
+
+class ReflectorBatch:
+    """
+    One message under fixed rotors, positions, rings and plugboard, decrypted under many reflector
+    wirings at once. Everything but the reflector is worked out once: the letter entering the
+    reflector at each step, and the permutation from reflector output to plaintext at each step.
+    Trying a wiring is then two table lookups per letter.
+    """
+
+    def __init__(self, cipher, rotors, positions='AAA', rings=(1, 1, 1), plug_pairs=None):
+        assembly = RotorAssembly(rotors, 'B', positions, rings)
+        self.codes = text_to_codes(cipher)
+        history = rotor_offset_sequence(assembly, len(self.codes))
+        plugboard = plugboard_permutation(plug_pairs)
+
+        current = plugboard[self.codes]
+        exit_codes = np.broadcast_to(np.arange(26), (len(self.codes), 26))
+        for column, rotor in enumerate(assembly.rotors):
+            shift = history[:, column] - rotor.ring_offset
+            current = (_wiring_array(rotor.forward_wiring)[(current + shift) % 26] - shift) % 26
+        for column in range(len(assembly.rotors) - 1, -1, -1):
+            rotor = assembly.rotors[column]
+            shift = (history[:, column] - rotor.ring_offset)[:, None]
+            exit_codes = (_wiring_array(rotor.backward_wiring)[(exit_codes + shift) % 26] - shift) % 26
+
+        # entry[t] is the reflector input at step t; exit[t, r] the plaintext when it reflects to r
+        self.entry = current
+        self.exit = plugboard[exit_codes].astype(np.uint8)
+
+    def decrypt(self, wirings, steps=None):
+        """Plaintext codes under every reflector wiring of an N x 26 array, shape N x L"""
+        steps = np.arange(len(self.codes)) if steps is None else np.asarray(steps)
+        return self.exit[steps, np.asarray(wirings)[:, self.entry[steps]]]
+
+    def crib_mask(self, wirings, crib, offsets=None):
+        """Which wirings decrypt the crib at one of offsets (any offset by default)"""
+        crib_codes = text_to_codes(crib)
+        span = len(self.codes) - len(crib_codes) + 1
+        offsets = range(span) if offsets is None else [offset for offset in offsets if 0 <= offset < span]
+        mask = np.zeros(len(wirings), dtype=bool)
+        for offset in offsets:
+            mask |= (self.decrypt(wirings, np.arange(offset, offset + len(crib_codes))) == crib_codes).all(axis=1)
+        return mask
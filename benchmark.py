@@ -0,0 +1,198 @@
+"""
+Micro-benchmarks of the core machine - time each component, write the results as JSON and
+compare them against a stored baseline
+
+    python benchmark.py                        run everything and print a table
+    python benchmark.py --json results.json    also write the results, e.g. to keep as a baseline
+    python benchmark.py --compare baseline.json [--threshold 0.25]
+                                               exit with status 1 if anything is slower than its
+                                               baseline by more than threshold (25% by default)
+"""
+import json
+import platform
+import sys
+import time
+import timeit
+from statistics import median
+
+from cribs import CribWindow
+from enigma import CompiledEnigma, PlugLead, Plugboard, Rotor, RotorAssembly, build_enigma
+
+VERSION = 1
+PAIRS = ['HL', 'MO', 'AJ', 'CX', 'BZ', 'SR', 'NI', 'YW', 'DG', 'PK']
+MESSAGE_LENGTHS = (10, 100, 1000, 10000)
+# Fixed text so every run encrypts the same letters
+TEXT = 'THEQUICKBROWNFOXJUMPSOVERTHELAZYDOGANDKEEPSONRUNNING'
+# Code 3 message and crib, for checking one wrong key with and without a crib window
+CRIB_CIPHER = 'ABSKJAKKMRITTNYURBJFWQGRSGNNYJSDRYLAPQWIAGKJYEPCTAGDCTHLCDRZRFZHKNRSDLNPFPEBVESHPY'
+CRIB = 'THOUSANDS'
+
+
+def _pluglead_encode():
+    lead = PlugLead('AB')
+    return lambda: lead.encode('A')
+
+
+def _plugboard_encode():
+    board = Plugboard()
+    for pair in PAIRS:
+        board.add(PlugLead(pair))
+    return lambda: board.encode('Q')
+
+
+def _rotor(direction):
+    def setup():
+        wiring, notch = RotorAssembly.ROTOR_CONFIGS['III']
+        encode = getattr(Rotor(wiring, 'Q', 7, notch), direction)
+        return lambda: encode('G')
+    return setup
+
+
+def _assembly(method):
+    def setup():
+        assembly = RotorAssembly(['I', 'II', 'III'], 'B', 'ADU', (3, 9, 17))
+        if method == 'perform_rotation':
+            return assembly.perform_rotation
+        return lambda: assembly.pass_through('G')
+    return setup
+
+
+def _build_enigma():
+    return lambda: build_enigma(['I', 'II', 'III'], 'B', 'ADU', (3, 9, 17), PAIRS)
+
+
+def _process_text(length):
+    def setup():
+        text = (TEXT * (length // len(TEXT) + 1))[:length]
+        machine = build_enigma(['I', 'II', 'III'], 'B', 'ADU', (3, 9, 17), PAIRS)
+        return lambda: machine.process_text(text)
+    return setup
+
+
+def _crib_check(windowed):
+    def setup():
+        machine = CompiledEnigma.from_settings(['II', 'IV', 'BETA'], 'B', 'EMY', (2, 4, 6), ['FH', 'TS', 'BE', 'UQ'])
+        if windowed:
+            window = CribWindow.legal(CRIB_CIPHER, CRIB)
+
+            def check():
+                machine.reset('EMY')
+                return window.match(machine)
+        else:
+            def check():
+                machine.reset('EMY')
+                return CRIB in machine.process_text(CRIB_CIPHER)
+        return check
+    return setup
+
+
+# name -> setup function returning the zero-argument callable to time
+BENCHMARKS = {
+    'pluglead.encode': _pluglead_encode,
+    'plugboard.encode': _plugboard_encode,
+    'rotor.encode_forward': _rotor('encode_forward'),
+    'rotor.encode_backward': _rotor('encode_backward'),
+    'rotor_assembly.perform_rotation': _assembly('perform_rotation'),
+    'rotor_assembly.pass_through': _assembly('pass_through'),
+    'build_enigma': _build_enigma,
+    'crib_window.match': _crib_check(True),
+    'crib_window.full_decryption': _crib_check(False),
+}
+for _length in MESSAGE_LENGTHS:
+    BENCHMARKS[f'process_text.{_length}'] = _process_text(_length)
+
+
+def calibrate(timer, min_time):
+    """Calls per batch: as timeit's autorange, doubled until a batch takes at least min_time"""
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return number
+
+
+def run(names=None, repeat=20, min_time=0.05):
+    """
+    Results document for the named benchmarks (all of them by default). Each is timed in `repeat`
+    batches of about min_time seconds with garbage collection off, and the batches of different
+    benchmarks are interleaved, so a burst of load elsewhere on the machine is spread across all
+    of them instead of landing on one. Best and median seconds per call are reported.
+    """
+    timers = {name: timeit.Timer(BENCHMARKS[name]()) for name in names or BENCHMARKS}
+    numbers = {name: calibrate(timer, min_time) for name, timer in timers.items()}
+    timings = {name: [] for name in timers}
+    for _ in range(repeat):
+        for name, timer in timers.items():
+            timings[name].append(timer.timeit(numbers[name]) / numbers[name])
+
+    results = {
+        name: {'best': min(times), 'median': median(times), 'number': numbers[name], 'repeat': repeat}
+        for name, times in timings.items()
+    }
+    return {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'created': time.time(),
+        'results': results
+    }
+
+
+def compare(current, baseline, threshold=0.25):
+    """
+    (name, baseline seconds, current seconds, ratio, regressed) for every benchmark in both runs.
+    Best times are compared, as the least disturbed by other load on the machine.
+    """
+    if baseline.get('version') != VERSION:
+        raise ValueError(f"Unsupported baseline version: {baseline.get('version')}")
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['best']
+        ratio = result['best'] / before if before > 0 else float('inf')
+        rows.append((name, before, result['best'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv):
+    options = {}
+    args = list(argv)
+    while args:
+        flag = args.pop(0)
+        if flag in ('--json', '--compare', '--threshold', '--repeat') and args:
+            options[flag] = args.pop(0)
+        else:
+            print(__doc__)
+            return 2
+
+    current = run(repeat=int(options.get('--repeat', 20)))
+    for name, result in current['results'].items():
+        print(f"{name:34} {_format_time(result['best']):>10}  (median {_format_time(result['median'])})")
+    if '--json' in options:
+        with open(options['--json'], 'w') as handle:
+            json.dump(current, handle, indent=2)
+
+    if '--compare' in options:
+        with open(options['--compare']) as handle:
+            baseline = json.load(handle)
+        threshold = float(options.get('--threshold', 0.25))
+        rows = compare(current, baseline, threshold)
+        print(f"\nAgainst {options['--compare']} (threshold {threshold:.0%}):")
+        for name, before, after, ratio, regressed in rows:
+            flag = 'REGRESSION' if regressed else ''
+            print(f"{name:34} {_format_time(before):>10} -> {_format_time(after):>10}  {ratio:5.2f}x  {flag}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
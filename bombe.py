@@ -0,0 +1,193 @@
+"""
+Turing-Welchman bombe - find rotor settings from a crib with the plugboard unknown
+"""
+from itertools import permutations, product
+
+import numpy as np
+
+from enigma import RotorAssembly
+from batch import KeyBatch, rotor_offsets, scrambler_table, state_index
+from cribs import to_codes
+from checkpoint import open_checkpoint
+
+
+class Menu:
+    """
+    Letter-pair graph of a crib placed at an offset in the ciphertext.
+    Each edge joins a crib letter to its cipher letter and records the keypress it was made on.
+    """
+
+    def __init__(self, cipher, crib, offset=0):
+        cipher_codes = to_codes(cipher)
+        crib_codes = to_codes(crib)
+        if offset < 0 or offset + len(crib_codes) > len(cipher_codes):
+            raise ValueError("Crib does not fit in the ciphertext at this offset")
+
+        self.offset = offset
+        self.edges = []
+        for idx, plain in enumerate(crib_codes):
+            cipher_code = cipher_codes[offset + idx]
+            if plain == cipher_code:
+                raise ValueError("Crib encrypts a letter to itself at this offset")
+            self.edges.append((plain, cipher_code, offset + idx))
+
+        self.letters = sorted({letter for edge in self.edges for letter in edge[:2]})
+        degree = {letter: 0 for letter in self.letters}
+        parent = {letter: letter for letter in self.letters}
+
+        def find(letter):
+            while parent[letter] != letter:
+                parent[letter] = parent[parent[letter]]
+                letter = parent[letter]
+            return letter
+
+        for first, second, _ in self.edges:
+            degree[first] += 1
+            degree[second] += 1
+            parent[find(first)] = find(second)
+
+        components = len({find(letter) for letter in self.letters})
+        self.loops = len(self.edges) - len(self.letters) + components
+        self.test_letter = max(self.letters, key=lambda letter: degree[letter])
+
+    def steps(self):
+        """Keypress indices used by the menu, one per edge"""
+        return [step for _, _, step in self.edges]
+
+
+def scrambler_permutations(table, rotors, reflector, positions, rings, steps):
+    """
+    Plugboard-free scrambler permutation at each of the given keypresses for every start position,
+    looked up in a scrambler_table(). Returns an array of shape len(positions) x len(steps) x 26.
+    """
+    keys = KeyBatch.from_settings(rotors, reflector, positions, rings, None, count=len(positions))
+    history = rotor_offsets(keys, max(steps) + 1)[:, steps]
+    return table[state_index(history)].astype(np.int64)
+
+
+def energize(perms, edges, test_letter, start):
+    """
+    Close the hypotheses 'test_letter is steckered to start' under the menu and the diagonal board.
+    perms holds one scrambler permutation per edge for each of N keys. A key is dropped as soon as
+    its test register lights fully, since no hypothesis for the test letter can then hold.
+    Returns the surviving key indices and their 26 x 26 closures, where [a, b] means
+    'a is steckered to b' is implied.
+    """
+    keys = np.arange(perms.shape[0])
+    live = np.zeros((len(keys), 26, 26), dtype=bool)
+    live[keys, test_letter, start] = True
+
+    lit = 0
+    while len(keys):
+        for idx, (plain, cipher, _) in enumerate(edges):
+            perm = perms[:, idx]
+            # a<->x means the scrambler output S(x) is steckered to the cipher letter,
+            # and every scrambler permutation is its own inverse
+            live[:, cipher] |= np.take_along_axis(live[:, plain], perm, axis=1)
+            live[:, plain] |= np.take_along_axis(live[:, cipher], perm, axis=1)
+        live |= live.transpose(0, 2, 1)
+
+        alive = ~live[:, test_letter].all(axis=1)
+        if not alive.all():
+            keys, live, perms = keys[alive], live[alive], perms[alive]
+            lit = -1
+            continue
+        now_lit = np.count_nonzero(live)
+        if now_lit == lit:
+            break
+        lit = now_lit
+    return keys, live
+
+
+class Bombe:
+    """
+    Sweeps rotor orders, reflectors and start positions against a menu.
+    Ring settings are taken as given (all 1 by default, as on the real bombe); a stop then
+    gives the core positions, which are exact while the middle rotor does not turn over
+    within the crib.
+    """
+
+    def __init__(self, menu, rotor_orders=None, reflectors=None, rings=(1, 1, 1), chunk_size=4096):
+        self.menu = menu
+        if rotor_orders is None:
+            rotor_orders = [list(order) for order in permutations(RotorAssembly.ROTOR_CONFIGS, len(rings))]
+        self.rotor_orders = rotor_orders
+        self.reflectors = reflectors or list(RotorAssembly.REFLECTOR_CONFIGS)
+        self.rings = rings
+        self.chunk_size = chunk_size
+        self.positions_tested = 0
+
+    def _steckers(self, perms, candidate):
+        """Implied plugboard pairs for one confirmed hypothesis, or None if it contradicts itself"""
+        keys, live = energize(perms[None], self.menu.edges, self.menu.test_letter, candidate)
+        if not len(keys) or (live[0].sum(axis=1) > 1).any():
+            return None
+        live = live[0]
+        pairs = []
+        for letter in range(26):
+            partners = np.flatnonzero(live[letter])
+            if len(partners) and letter < partners[0]:
+                pairs.append(chr(letter + ord('A')) + chr(partners[0] + ord('A')))
+        return pairs
+
+    def units(self):
+        """Rotor order and reflector combinations in the order run() sweeps them"""
+        return [(rotors, reflector) for rotors in self.rotor_orders for reflector in self.reflectors]
+
+    def run_unit(self, rotors, reflector, positions=None):
+        """Yield the stops of one rotor order and reflector"""
+        if positions is None:
+            positions = [''.join(combo) for combo in product('ABCDEFGHIJKLMNOPQRSTUVWXYZ', repeat=len(self.rings))]
+        steps = self.menu.steps()
+        test_letter = self.menu.test_letter
+
+        table = scrambler_table(rotors, reflector, self.rings)
+        for start in range(0, len(positions), self.chunk_size):
+            chunk = positions[start:start + self.chunk_size]
+            perms = scrambler_permutations(table, rotors, reflector, chunk, self.rings, steps)
+            stopped, live = energize(perms, self.menu.edges, test_letter, 0)
+            self.positions_tested += len(chunk)
+
+            for key, register in zip(stopped, live[:, test_letter]):
+                candidates = [0] if register.sum() == 1 else np.flatnonzero(~register)
+                for candidate in candidates:
+                    pairs = self._steckers(perms[key], candidate)
+                    if pairs is not None:
+                        yield {
+                            'rotors': list(rotors),
+                            'reflector': reflector,
+                            'positions': chunk[key],
+                            'rings': self.rings,
+                            'pairs': pairs
+                        }
+
+    def run(self, positions=None):
+        """Yield every stop as a result dict with the implied plugboard pairs"""
+        for rotors, reflector in self.units():
+            yield from self.run_unit(rotors, reflector, positions)
+
+
+def bombe_search(cipher, crib, offset, rotor_orders=None, reflectors=None, rings=(1, 1, 1), checkpoint=None):
+    """
+    Run a bombe for a crib at a known offset and collect all stops.
+    checkpoint (a path or Checkpoint) keeps the sweep cursor and the stops found so far on disk,
+    so an interrupted sweep resumes at the next rotor order and reflector.
+    """
+    menu = Menu(cipher, crib, offset)
+    bombe = Bombe(menu, rotor_orders, reflectors, rings)
+    checkpoint = open_checkpoint(checkpoint, {
+        'search': 'bombe', 'cipher': cipher, 'crib': crib, 'offset': offset, 'rotor_orders': bombe.rotor_orders,
+        'reflectors': bombe.reflectors, 'rings': rings
+    })
+    if checkpoint is None:
+        return list(bombe.run())
+    if checkpoint.done:
+        return checkpoint.result
+
+    units = bombe.units()
+    for index in range(checkpoint.cursor, len(units)):
+        # A unit's stops are only recorded once it is complete, so the cursor never splits one
+        checkpoint.candidates.extend(bombe.run_unit(*units[index]))
+        checkpoint.update(index + 1)
+    checkpoint.finish(checkpoint.candidates)
+    return checkpoint.result
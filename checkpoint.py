@@ -0,0 +1,100 @@
+"""
+Search checkpoints - periodically persist a search's progress so an interrupted run can resume
+"""
+import json
+import os
+import time
+
+VERSION = 1
+
+
+class Checkpoint:
+    """
+    Small JSON file holding a search's keyspace cursor, the candidates found so far and metrics.
+    update() is cheap enough to call on every candidate: it only writes when `interval` seconds
+    have passed since the last save, and writes atomically so a crash never leaves a torn file.
+    search identifies the search (any JSON value, typically its arguments); a checkpoint written
+    by a different search is refused rather than resumed.
+    """
+
+    def __init__(self, path, search=None, interval=5.0):
+        self.path = path
+        self.search = json.loads(json.dumps(search))
+        self.interval = interval
+        self.cursor = 0
+        self.candidates = []
+        self.result = None
+        self.done = False
+        self.elapsed = 0.0
+        self.saves = 0
+        self._started = time.monotonic()
+        self._next_save = self._started + interval
+
+    def load(self):
+        """Restore state from disk; returns False if there is no checkpoint to resume"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as handle:
+            state = json.load(handle)
+        if state.get('version') != VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {state.get('version')}")
+        if state['search'] != self.search:
+            raise ValueError(f"Checkpoint {self.path} belongs to a different search")
+        self.cursor = state['cursor']
+        self.candidates = state['candidates']
+        self.result = state['result']
+        self.done = state['done']
+        self.elapsed = state['metrics']['elapsed']
+        self._started = time.monotonic()
+        return True
+
+    def state(self):
+        elapsed = self.elapsed + time.monotonic() - self._started
+        return {
+            'version': VERSION,
+            'search': self.search,
+            'cursor': self.cursor,
+            'candidates': self.candidates,
+            'result': self.result,
+            'done': self.done,
+            'metrics': {
+                'elapsed': elapsed,
+                'rate': self.cursor / elapsed if elapsed > 0 else 0.0,
+                'saved_at': time.time()
+            }
+        }
+
+    def save(self):
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.state(), handle)
+        os.replace(temporary, self.path)
+        self.saves += 1
+        self._next_save = time.monotonic() + self.interval
+
+    def update(self, cursor, candidate=None):
+        """
+        Record that every key before cursor has been searched, and optionally a candidate worth
+        keeping. Saves if the interval has passed.
+        """
+        self.cursor = cursor
+        if candidate is not None:
+            self.candidates.append(candidate)
+        if time.monotonic() >= self._next_save:
+            self.save()
+
+    def finish(self, result):
+        """Mark the search complete with its result (None if nothing was found) and save"""
+        self.result = result
+        self.done = True
+        self.save()
+
+
+def open_checkpoint(checkpoint, search):
+    """Checkpoint for a search from a path or an existing Checkpoint, loaded if a file exists"""
+    if checkpoint is None:
+        return None
+    if not isinstance(checkpoint, Checkpoint):
+        checkpoint = Checkpoint(checkpoint, search)
+    checkpoint.load()
+    return checkpoint
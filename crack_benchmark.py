@@ -0,0 +1,292 @@
+"""
+End-to-end cracking benchmark - encrypt synthetic messages under random keys, run the search
+routines of crack_codes and advanced_crack_codes on them and report how they fare
+
+Each level hides one part of the key, as the assignment codes do:
+
+    reflector       the reflector (code 1)
+    positions       the start positions (code 2)
+    rotors          rotor order, ring settings and reflector, from pools of choices (code 3)
+    plugs           the partners of A and I on the plugboard (code 4)
+    reflector_swap  a reflector with two wire swaps (code 5)
+
+    python crack_benchmark.py [--levels reflector,positions] [--trials 5] [--length 60]
+                              [--seed 1] [--json results.json]
+"""
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+from statistics import median
+from string import ascii_uppercase
+
+import numpy as np
+
+import advanced_crack_codes
+import crack_codes
+from batch import double_swap_wirings
+from cribs import analyze_crib_placement
+from enigma import CompiledEnigma, RotorAssembly
+from keyspace import Keyspace
+
+LEVELS = ('reflector', 'positions', 'rotors', 'plugs', 'reflector_swap')
+
+# Plaintext vocabulary, in the register of the assignment messages
+WORDS = [
+    'ATTACK', 'AT', 'DAWN', 'WEATHER', 'REPORT', 'FOR', 'THE', 'NORTH', 'SEA', 'CONVOY', 'SIGHTED', 'NEAR',
+    'HARBOUR', 'SUPPLIES', 'ARRIVE', 'TOMORROW', 'MORNING', 'ENEMY', 'POSITION', 'UNCHANGED', 'SEND',
+    'REINFORCEMENTS', 'TO', 'SECTOR', 'FOUR', 'HOLD', 'UNTIL', 'RELIEVED', 'ALL', 'UNITS', 'REPORT', 'STATUS',
+    'AND', 'FUEL', 'LEVELS', 'BRIDGE', 'DESTROYED', 'ROUTE', 'CLOSED', 'EXPECT', 'HEAVY', 'RAIN', 'NIGHT',
+    'PATROL', 'RETURNED', 'WITHOUT', 'CONTACT', 'SUBMARINE', 'SURFACED', 'OFF', 'COAST', 'MEETING', 'MOVED',
+    'HEADQUARTERS', 'ORDERS', 'FOLLOW', 'SIGNAL', 'STRENGTH', 'WEAK', 'RECEIVED', 'MESSAGE', 'CONFIRM'
+]
+# Cribs are drawn from words at least this long
+CRIB_LENGTH = 6
+
+
+class Workload:
+    """A synthetic message: its ciphertext, a crib from its plaintext and the key that made it"""
+
+    def __init__(self, level, plaintext, crib, key, cipher):
+        self.level = level
+        self.plaintext = plaintext
+        self.crib = crib
+        self.key = key
+        self.cipher = cipher
+        self.offsets = analyze_crib_placement(cipher, crib)['offsets']
+
+
+def _plaintext(rng, length):
+    """Words up to length letters, and a crib that lies wholly inside them"""
+    words = []
+    while sum(map(len, words)) < length:
+        words.append(rng.choice(WORDS))
+    text = ''.join(words)[:length]
+
+    starts = []
+    position = 0
+    for word in words:
+        if len(word) >= CRIB_LENGTH and position + len(word) <= length:
+            starts.append((position, word))
+        position += len(word)
+    if not starts:
+        raise ValueError(f"Message of {length} letters is too short for a crib")
+    return text, rng.choice(starts)[1]
+
+
+def _pairs(rng, count, include=()):
+    """count random plugboard pairs, plugging each letter of include to a letter outside it"""
+    letters = [letter for letter in ascii_uppercase if letter not in include]
+    rng.shuffle(letters)
+    pairs = [letter + letters.pop() for letter in include]
+    while len(pairs) < count:
+        pairs.append(letters.pop() + letters.pop())
+    return pairs
+
+
+def make_workload(level, rng, length=60, leads=6, ring_choices=4):
+    """
+    Random key and message for a level. For 'rotors', the search draws rotors from a pool of four
+    and rings from a pool of ring_choices values, both holding the true settings.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level: {level}")
+    rotor_names = list(RotorAssembly.ROTOR_CONFIGS)
+    key = {
+        'rotors': rng.sample(rotor_names, 3),
+        'reflector': rng.choice('ABC'),
+        'positions': ''.join(rng.choice(ascii_uppercase) for _ in range(3)),
+        'rings': tuple(rng.randint(1, 26) for _ in range(3)),
+        'pairs': _pairs(rng, leads, 'AI' if level == 'plugs' else ())
+    }
+    machine = CompiledEnigma.from_settings(key['rotors'], key['reflector'], key['positions'], key['rings'],
+                                           key['pairs'])
+
+    if level == 'rotors':
+        key['rotor_choices'] = key['rotors'] + rng.sample([name for name in rotor_names if name not in key['rotors']], 1)
+        rng.shuffle(key['rotor_choices'])
+        pool = set(key['rings'])
+        while len(pool) < ring_choices:
+            pool.add(rng.randint(1, 26))
+        key['ring_choices'] = sorted(pool)
+    if level == 'reflector_swap':
+        wirings = double_swap_wirings(RotorAssembly.REFLECTOR_CONFIGS[key['reflector']])
+        key['wiring'] = ''.join(ascii_uppercase[code] for code in wirings[rng.randrange(len(wirings))])
+        machine.reset(reflector=key['wiring'])
+
+    plaintext, crib = _plaintext(rng, length)
+    return Workload(level, plaintext, crib, key, machine.process_text(plaintext))
+
+
+def _positions_attempts(positions):
+    """Rank of positions in crack_codes.test_positions's order"""
+    return 1 + sum(ascii_uppercase.index(letter) * 26 ** power for power, letter in enumerate(reversed(positions)))
+
+
+def _missing_pairs_attempts(workload, result):
+    """Rank of the found partners in crack_codes.test_missing_pairs's order, or its size if none was found"""
+    used = set(''.join(workload.key['pairs'][2:]))
+    available = [letter for letter in ascii_uppercase if letter not in used]
+    if result is None:
+        return len(available) * (len(available) - 1)
+    a_index = available.index(result['pairs'][-2][1])
+    i_index = available.index(result['pairs'][-1][1])
+    return 1 + a_index * (len(available) - 1) + (i_index if i_index < a_index else i_index - 1)
+
+
+def _swap_attempts(result):
+    """Rank of the found wiring in crack_codes.test_modified_reflectors's order, or its size if none was found"""
+    attempts = 0
+    for base in 'ABC':
+        wirings = double_swap_wirings(RotorAssembly.REFLECTOR_CONFIGS[base])
+        if result is not None and base == result['base_reflector']:
+            target = np.array([ord(char) - ord('A') for char in result['modified_wiring']])
+            return attempts + 1 + int(np.flatnonzero((wirings == target).all(axis=1))[0])
+        attempts += len(wirings)
+    return attempts
+
+
+def _reflectors(workload):
+    key = workload.key
+    result = crack_codes.test_reflectors(workload.cipher, workload.crib, key['rotors'], key['positions'],
+                                         key['rings'], key['pairs'], workload.offsets)
+    return result, 'ABC'.index(result['reflector']) + 1 if result else 3
+
+
+def _positions(workload):
+    key = workload.key
+    result = crack_codes.test_positions(workload.cipher, workload.crib, key['rotors'], key['reflector'],
+                                        key['rings'], key['pairs'], workload.offsets)
+    return result, _positions_attempts(result['positions']) if result else 26 ** 3
+
+
+def _intelligent_positions(workload):
+    key = workload.key
+    result = advanced_crack_codes.intelligent_position_search(workload.cipher, workload.crib, key['rotors'],
+                                                              key['reflector'], key['rings'], key['pairs'],
+                                                              workload.offsets)
+    return result, result['metrics'].attempts if result else 26 ** 3
+
+
+def _rotor_ring_reflector(workload):
+    key = workload.key
+    result = crack_codes.test_rotor_ring_reflector(workload.cipher, workload.crib, key['positions'], key['pairs'],
+                                                   key['rotor_choices'], key['ring_choices'], workload.offsets,
+                                                   processes=1)
+    keyspace = Keyspace(key['rotor_choices'], ['A', 'B', 'C'], ring_choices=key['ring_choices'],
+                        positions=key['positions'])
+    return result, keyspace.index(dict(result, pairs=None)) + 1 if result else len(keyspace)
+
+
+def _optimized_rotor_ring(workload):
+    key = workload.key
+    result = advanced_crack_codes.optimized_rotor_ring_search(workload.cipher, workload.crib, key['positions'],
+                                                              key['pairs'], key['rotor_choices'],
+                                                              key['ring_choices'], workload.offsets)
+    if result is None:
+        return None, len(Keyspace(key['rotor_choices'], ['A', 'B', 'C'], ring_choices=key['ring_choices'],
+                                  positions=key['positions']))
+    return result, result['metrics'].attempts
+
+
+def _missing_pairs(workload):
+    key = workload.key
+    result = crack_codes.test_missing_pairs(workload.cipher, workload.crib, key['rotors'], key['reflector'],
+                                            key['positions'], key['rings'], key['pairs'][2:], ['A?', 'I?'],
+                                            workload.offsets)
+    return result, _missing_pairs_attempts(workload, result)
+
+
+def _modified_reflectors(workload):
+    key = workload.key
+    result = crack_codes.test_modified_reflectors(workload.cipher, workload.crib, key['rotors'], key['positions'],
+                                                  key['rings'], key['pairs'], workload.offsets)
+    return result, _swap_attempts(result)
+
+
+# level -> {strategy name: runner}; a runner returns (result dict or None, candidates tried)
+STRATEGIES = {
+    'reflector': {'crack_codes.test_reflectors': _reflectors},
+    'positions': {
+        'crack_codes.test_positions': _positions,
+        'advanced_crack_codes.intelligent_position_search': _intelligent_positions,
+    },
+    'rotors': {
+        'crack_codes.test_rotor_ring_reflector': _rotor_ring_reflector,
+        'advanced_crack_codes.optimized_rotor_ring_search': _optimized_rotor_ring,
+    },
+    'plugs': {'crack_codes.test_missing_pairs': _missing_pairs},
+    'reflector_swap': {'crack_codes.test_modified_reflectors': _modified_reflectors},
+}
+
+
+def run_strategy(runner, workload):
+    """(solved, seconds, candidates tried) for one strategy on one workload, its output discarded"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result, attempts = runner(workload)
+    seconds = time.perf_counter() - start
+    solved = result is not None and result['plaintext'] == workload.plaintext
+    return solved, seconds, attempts
+
+
+def run(levels=LEVELS, trials=5, length=60, seed=1, **options):
+    """
+    Results document: for every level and strategy, the success rate over `trials` random
+    workloads, the time to solution of the solved ones and candidates tried per second.
+    Every strategy of a level sees the same workloads; options go to make_workload.
+    """
+    rng = random.Random(seed)
+    results = {}
+    for level in levels:
+        workloads = [make_workload(level, rng, length, **options) for _ in range(trials)]
+        for name, runner in STRATEGIES[level].items():
+            runs = [run_strategy(runner, workload) for workload in workloads]
+            solved = [seconds for success, seconds, _ in runs if success]
+            seconds = sum(seconds for _, seconds, _ in runs)
+            candidates = sum(attempts for _, _, attempts in runs)
+            results[f'{level}/{name}'] = {
+                'trials': trials,
+                'success_rate': len(solved) / trials if trials else 0.0,
+                'median_time_to_solution': median(solved) if solved else None,
+                'mean_time_to_solution': sum(solved) / len(solved) if solved else None,
+                'candidates': candidates,
+                'candidates_per_second': candidates / seconds if seconds > 0 else 0.0,
+            }
+    return {'seed': seed, 'length': length, 'options': options, 'results': results}
+
+
+def main(argv):
+    options = {}
+    args = list(argv)
+    while args:
+        flag = args.pop(0)
+        if flag in ('--levels', '--trials', '--length', '--seed', '--json') and args:
+            options[flag] = args.pop(0)
+        else:
+            print(__doc__)
+            return 2
+
+    levels = options['--levels'].split(',') if '--levels' in options else LEVELS
+    unknown = [level for level in levels if level not in LEVELS]
+    if unknown:
+        print(f"Unknown levels: {', '.join(unknown)}")
+        return 2
+    report = run(levels, int(options.get('--trials', 5)), int(options.get('--length', 60)),
+                 int(options.get('--seed', 1)))
+
+    print(f"{'level/strategy':64} {'solved':>7} {'median s':>9} {'cand/s':>10}")
+    for name, result in report['results'].items():
+        median_time = result['median_time_to_solution']
+        median_text = f"{median_time:.3f}" if median_time is not None else '-'
+        print(f"{name:64} {result['success_rate']:7.0%} {median_text:>9} {result['candidates_per_second']:10,.0f}")
+    if '--json' in options:
+        with open(options['--json'], 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -2,97 +2,149 @@
 Code breaking script for Enigma assignment
 Uses the enigma.py implementation to crack all 5 codes
 """
-from enigma import build_enigma
-from itertools import product, permutations, combinations
-
-
-def test_reflectors(cipher, crib, rotors, positions, rings, pairs):
+from enigma import CompiledEnigma, RotorAssembly
+from cribs import CribWindow, analyze_crib_placement, report_crib_placement, to_codes
+from plugboard_solver import IncrementalPlugboard, scrambler_sequence, _pairs_to_plug
+from parallel import parallel_search
+from keyspace import Keyspace
+from checkpoint import open_checkpoint
+from itertools import product, combinations, islice
+from functools import partial
+from math import comb
+from progress import Progress
+
+
+def test_reflectors(cipher, crib, rotors, positions, rings, pairs, crib_offsets=None):
     """Try all reflectors A, B, C"""
+    window = CribWindow(cipher, crib, crib_offsets) if crib_offsets is not None else None
+    machine = CompiledEnigma.from_settings(rotors, 'A', positions, rings, pairs)
     for reflector in ['A', 'B', 'C']:
-        try:
-            machine = build_enigma(rotors, reflector, positions, rings, pairs)
-            plaintext = machine.process_text(cipher)
-            if crib in plaintext:
-                return {
-                    'plaintext': plaintext,
-                    'reflector': reflector,
-                    'rotors': rotors,
-                    'positions': positions,
-                    'rings': rings,
-                    'pairs': pairs
-                }
-        except:
+        machine.reset(reflector=reflector)
+        if window and window.match(machine) is None:
             continue
+        plaintext = machine.process_text(cipher)
+        if crib in plaintext:
+            return {
+                'plaintext': plaintext,
+                'reflector': reflector,
+                'rotors': rotors,
+                'positions': positions,
+                'rings': rings,
+                'pairs': pairs
+            }
     return None
 
 
-def test_positions(cipher, crib, rotors, reflector, rings, pairs):
+def test_positions(cipher, crib, rotors, reflector, rings, pairs, crib_offsets=None):
     """Try all possible 3-letter position combinations"""
+    window = CribWindow(cipher, crib, crib_offsets) if crib_offsets is not None else None
     letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    machine = CompiledEnigma.from_settings(rotors, reflector, 'AAA', rings, pairs)
+    progress = Progress('positions', 26 ** 3)
     count = 0
     for combo in product(letters, repeat=3):
         count += 1
-        if count % 1000 == 0:
-            print(f"  Tried {count} positions...", end='\r')
+        progress.update(count)
         
         positions = ''.join(combo)
-        try:
-            machine = build_enigma(rotors, reflector, positions, rings, pairs)
-            plaintext = machine.process_text(cipher)
-            if crib in plaintext:
-                print(f"\n  Found after {count} attempts!")
-                return {
-                    'plaintext': plaintext,
-                    'reflector': reflector,
-                    'rotors': rotors,
-                    'positions': positions,
-                    'rings': rings,
-                    'pairs': pairs
-                }
-        except:
+        machine.reset(positions=positions)
+        if window and window.match(machine) is None:
             continue
+        plaintext = machine.process_text(cipher)
+        if crib in plaintext:
+            progress.finish(count, found=True)
+            print(f"  Found after {count} attempts!")
+            return {
+                'plaintext': plaintext,
+                'reflector': reflector,
+                'rotors': rotors,
+                'positions': positions,
+                'rings': rings,
+                'pairs': pairs
+            }
+    progress.finish(count, found=False)
     return None
 
 
-def test_rotor_ring_reflector(cipher, crib, position, pairs, rotor_choices, ring_choices):
-    """Try combinations of rotors, rings, and reflectors"""
-    count = 0
-    total = len(list(permutations(rotor_choices, 3))) * len(list(product(ring_choices, repeat=3))) * 3
-    print(f"  Total combinations to try: {total}")
-    
-    for rotor_combo in permutations(rotor_choices, 3):
-        for ring_combo in product(ring_choices, repeat=3):
-            for reflector in ['A', 'B', 'C']:
-                count += 1
-                if count % 100 == 0:
-                    print(f"  Progress: {count}/{total} ({100*count//total}%)", end='\r')
-                
-                try:
-                    rotors = [r.upper() for r in rotor_combo]
-                    machine = build_enigma(rotors, reflector, position, ring_combo, pairs)
-                    plaintext = machine.process_text(cipher)
-                    if crib in plaintext:
-                        print(f"\n  Found after {count} attempts!")
-                        return {
-                            'plaintext': plaintext,
-                            'reflector': reflector,
-                            'rotors': rotors,
-                            'positions': position,
-                            'rings': ring_combo,
-                            'pairs': pairs
-                        }
-                except:
-                    continue
+def _try_rotor_ring_reflector(cipher, crib, pairs, window, machine, key):
+    """Result dict if the settings of one Keyspace key decrypt the crib, else None"""
+    machine.reset(key['positions'], key['rings'], reflector=key['reflector'], rotors=key['rotors'])
+    if window and window.match(machine) is None:
+        return None
+    plaintext = machine.process_text(cipher)
+    if crib in plaintext:
+        return {
+            'plaintext': plaintext,
+            'reflector': key['reflector'],
+            'rotors': key['rotors'],
+            'positions': key['positions'],
+            'rings': key['rings'],
+            'pairs': pairs
+        }
     return None
 
 
-def test_missing_pairs(cipher, crib, rotors, reflector, positions, rings, known_pairs, unknown_pairs):
+def test_rotor_ring_reflector(cipher, crib, position, pairs, rotor_choices, ring_choices, crib_offsets=None,
+                              processes=None, checkpoint=None):
+    """
+    Try combinations of rotors, rings, and reflectors, sharded across processes.
+    checkpoint (a path or Checkpoint) saves progress every few seconds and resumes from it;
+    a resumed result comes back as stored in JSON, with tuples as lists.
+    """
+    window = CribWindow(cipher, crib, crib_offsets) if crib_offsets is not None else None
+    keyspace = Keyspace(rotor_choices, ['A', 'B', 'C'], ring_choices=ring_choices, positions=position)
+    total = len(keyspace)
+    print(f"  Total combinations to try: {total}")
+
+    checkpoint = open_checkpoint(checkpoint, {
+        'search': 'rotor_ring_reflector', 'cipher': cipher, 'crib': crib, 'position': position, 'pairs': pairs,
+        'rotor_choices': rotor_choices, 'ring_choices': ring_choices, 'crib_offsets': crib_offsets
+    })
+    start = checkpoint.cursor if checkpoint else 0
+    if checkpoint and checkpoint.done:
+        print("  Already searched, resuming with the saved result")
+        return checkpoint.result
+    if start:
+        print(f"  Resuming after {start} combinations")
+
+    reporter = Progress('rotor_ring_reflector', total, start=start)
+
+    def progress(count):
+        reporter.update(count)
+        if checkpoint:
+            checkpoint.update(count)
+
+    keyspace.validate()
+    first = keyspace[0]
+    machine = CompiledEnigma.from_settings(first['rotors'], first['reflector'], first['positions'], first['rings'], pairs)
+    task = partial(_try_rotor_ring_reflector, cipher, crib, pairs, window, machine)
+    found = parallel_search(task, keyspace, processes=processes, progress=progress, start=start)
+    result = None
+    reporter.finish(found[0] if found else total, found=found is not None)
+    if found is not None:
+        count, result = found
+        print(f"  Found after {count} attempts!")
+    if checkpoint:
+        checkpoint.update(found[0] if found else total)
+        checkpoint.finish(result)
+    return result
+
+
+def test_missing_pairs(cipher, crib, rotors, reflector, positions, rings, known_pairs, unknown_pairs,
+                       crib_offsets=None):
     """Find missing plugboard pairs where one letter is known"""
+    # The rotor settings are fixed, so decrypt once and patch only the letters each guess rewires
+    cipher_codes = to_codes(cipher)
+    sequence = scrambler_sequence(rotors, reflector, positions, rings, len(cipher_codes))
+    engine = IncrementalPlugboard(sequence, cipher_codes, _pairs_to_plug(known_pairs), crib=crib)
+    legal = set(crib_offsets) if crib_offsets is not None else None
+
     # Get letters already used
     used = set(''.join(known_pairs))
     
     # Get available letters for pairing
     available = [c for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' if c not in used]
+    progress = Progress('missing_pairs', len(available) * (len(available) - 1))
     
     count = 0
     # Try all combinations of available letters for the two unknown pairs
@@ -102,27 +154,29 @@ def test_missing_pairs(cipher, crib, rotors, reflector, positions, rings, known_
                 continue
             
             count += 1
-            if count % 100 == 0:
-                print(f"  Tried {count} combinations...", end='\r')
+            progress.update(count)
             
             # Build complete pairs list
             test_pairs = known_pairs + ['A' + a_partner, 'I' + i_partner]
             
             try:
-                machine = build_enigma(rotors, reflector, positions, rings, test_pairs)
-                plaintext = machine.process_text(cipher)
-                if crib in plaintext:
-                    print(f"\n  Found after {count} attempts!")
-                    return {
-                        'plaintext': plaintext,
-                        'reflector': reflector,
-                        'rotors': rotors,
-                        'positions': positions,
-                        'rings': rings,
-                        'pairs': test_pairs
-                    }
-            except:
+                evaluation = engine.evaluate(_pairs_to_plug(test_pairs))
+            except ValueError:
                 continue
+            hits = evaluation.crib_hits if legal is None else evaluation.crib_hits & legal
+            if hits:
+                engine.apply(evaluation)
+                progress.finish(count, found=True)
+                print(f"  Found after {count} attempts!")
+                return {
+                    'plaintext': engine.plaintext(),
+                    'reflector': reflector,
+                    'rotors': rotors,
+                    'positions': positions,
+                    'rings': rings,
+                    'pairs': test_pairs
+                }
+    progress.finish(count, found=False)
     return None
 
 def code_1():
@@ -130,13 +184,19 @@ def code_1():
     print("CODE 1: Finding unknown reflector")
     print("=" * 70)
     
+    cipher = 'DMEXBMKYCVPNQBEDHXVPZGKMTFFBJRPJTLHLCHOTKOYXGGHZ'
+    crib = 'SECRETS'
+    placement = analyze_crib_placement(cipher, crib)
+    report_crib_placement(placement)
+
     result = test_reflectors(
-        cipher='DMEXBMKYCVPNQBEDHXVPZGKMTFFBJRPJTLHLCHOTKOYXGGHZ',
-        crib='SECRETS',
+        cipher=cipher,
+        crib=crib,
         rotors=['BETA', 'GAMMA', 'V'],
         positions='MJM',
         rings=(4, 2, 14),
-        pairs=['KI', 'XN', 'FL']
+        pairs=['KI', 'XN', 'FL'],
+        crib_offsets=placement['offsets']
     )
     
     if result:
@@ -153,13 +213,19 @@ def code_2():
     print("CODE 2: Finding starting positions")
     print("=" * 70)
     
+    cipher = 'CMFSUPKNCBMUYEQVVDYKLRQZTPUFHSWWAKTUGXMPAMYAFITXIJKMH'
+    crib = 'UNIVERSITY'
+    placement = analyze_crib_placement(cipher, crib)
+    report_crib_placement(placement)
+
     result = test_positions(
-        cipher='CMFSUPKNCBMUYEQVVDYKLRQZTPUFHSWWAKTUGXMPAMYAFITXIJKMH',
-        crib='UNIVERSITY',
+        cipher=cipher,
+        crib=crib,
         rotors=['BETA', 'I', 'III'],
         reflector='B',
         rings=(23, 2, 10),
-        pairs=['VH', 'PT', 'ZG', 'BJ', 'EY', 'FS']
+        pairs=['VH', 'PT', 'ZG', 'BJ', 'EY', 'FS'],
+        crib_offsets=placement['offsets']
     )
     
     if result:
@@ -183,13 +249,19 @@ def code_3():
     # Ring settings with all even digits
     ring_choices = [2, 4, 6, 8, 20, 22, 24, 26]
     
+    cipher = 'ABSKJAKKMRITTNYURBJFWQGRSGNNYJSDRYLAPQWIAGKJYEPCTAGDCTHLCDRZRFZHKNRSDLNPFPEBVESHPY'
+    crib = 'THOUSANDS'
+    placement = analyze_crib_placement(cipher, crib)
+    report_crib_placement(placement)
+
     result = test_rotor_ring_reflector(
-        cipher='ABSKJAKKMRITTNYURBJFWQGRSGNNYJSDRYLAPQWIAGKJYEPCTAGDCTHLCDRZRFZHKNRSDLNPFPEBVESHPY',
-        crib='THOUSANDS',
+        cipher=cipher,
+        crib=crib,
         position='EMY',
         pairs=['FH', 'TS', 'BE', 'UQ', 'KD', 'AL'],
         rotor_choices=rotor_choices,
-        ring_choices=ring_choices
+        ring_choices=ring_choices,
+        crib_offsets=placement['offsets']
     )
     
     if result:
@@ -208,15 +280,21 @@ def code_4():
     print("CODE 4: Finding missing plugboard pairs")
     print("=" * 70)
     
+    cipher = 'SDNTVTPHRBNWTLMZTQKZGADDQYPFNHBPNHCQGBGMZPZLUAVGDQVYRBFYYEIXQWVTHXGNW'
+    crib = 'TUTOR'
+    placement = analyze_crib_placement(cipher, crib)
+    report_crib_placement(placement)
+
     result = test_missing_pairs(
-        cipher='SDNTVTPHRBNWTLMZTQKZGADDQYPFNHBPNHCQGBGMZPZLUAVGDQVYRBFYYEIXQWVTHXGNW',
-        crib='TUTOR',
+        cipher=cipher,
+        crib=crib,
         rotors=['V', 'III', 'IV'],
         reflector='A',
         positions='SWU',
         rings=(24, 12, 10),
         known_pairs=['WP', 'RJ', 'VF', 'HN', 'CG', 'BS'],
-        unknown_pairs=['A?', 'I?']  # A and I need partners
+        unknown_pairs=['A?', 'I?'],  # A and I need partners
+        crib_offsets=placement['offsets']
     )
     
     if result:
@@ -228,130 +306,167 @@ def code_4():
     return result
 
 
-def test_modified_reflectors(cipher, crib, rotors, positions, rings, pairs):
-    """Try all standard reflectors with double wire swaps (2 swap operations)"""
-    from enigma import RotorAssembly
-    from itertools import combinations
-
-    expected = 'YOUCANFOLLOWMYDOGONINSTAGRAMATTALESOFHOFFMANN'
-
-    # Try each reflector
-    for base_ref in ['A', 'B', 'C']:
-        print(f"\n  Testing reflector {base_ref}...")
-        original_wiring = RotorAssembly.REFLECTOR_CONFIGS[base_ref]
-
-        # Extract pairs
-        pairs_list = []
-        used = set()
-        for i, letter in enumerate(original_wiring):
-            if chr(i + ord('A')) not in used:
-                let1 = chr(i + ord('A'))
-                let2 = letter
-                pairs_list.append((let1, let2))
-                used.add(let1)
-                used.add(let2)
-
-        count = 0
+def reflector_pairs(wiring):
+    """The 13 letter pairs of a reflector wiring, in alphabetical order of their first letter"""
+    pairs_list = []
+    used = set()
+    for i, letter in enumerate(wiring):
+        if chr(i + ord('A')) not in used:
+            let1 = chr(i + ord('A'))
+            let2 = letter
+            pairs_list.append((let1, let2))
+            used.add(let1)
+            used.add(let2)
+    return pairs_list
+
+
+def reflector_swap_candidates(base_reflectors=('A', 'B', 'C')):
+    """Every double wire swap of each base reflector, as (reflector, p1, p2, p3, p4, swap1_type, swap2_type)"""
+    for base_ref in base_reflectors:
+        pairs_list = reflector_pairs(RotorAssembly.REFLECTOR_CONFIGS[base_ref])
         # Choose 4 pairs total (for 2 separate swap operations)
         for four_pair_indices in combinations(range(len(pairs_list)), 4):
             # Split into two groups of 2 for the two swap operations
             for split in [((0, 1), (2, 3)), ((0, 2), (1, 3)), ((0, 3), (1, 2))]:
-                swap1_indices = (four_pair_indices[split[0][0]], four_pair_indices[split[0][1]])
-                swap2_indices = (four_pair_indices[split[1][0]], four_pair_indices[split[1][1]])
-
-                p1, p2 = pairs_list[swap1_indices[0]], pairs_list[swap1_indices[1]]
-                p3, p4 = pairs_list[swap2_indices[0]], pairs_list[swap2_indices[1]]
-
+                p1, p2 = pairs_list[four_pair_indices[split[0][0]]], pairs_list[four_pair_indices[split[0][1]]]
+                p3, p4 = pairs_list[four_pair_indices[split[1][0]]], pairs_list[four_pair_indices[split[1][1]]]
                 # Try all swap combinations for both swaps
                 for swap1_type in range(3):
                     for swap2_type in range(3):
-                        count += 1
-                        if count % 1000 == 0:
-                            print(f"    Progress: {count} combinations tested...", end='\r')
-
-                        # Apply both swaps
-                        modified = list(original_wiring)
-
-                        # First swap
-                        if swap1_type == 0:
-                            new_p1, new_p2 = (p1[0], p2[1]), (p2[0], p1[1])
-                        elif swap1_type == 1:
-                            new_p1, new_p2 = (p1[0], p2[0]), (p1[1], p2[1])
-                        else:
-                            new_p1, new_p2 = (p1[1], p2[0]), (p1[0], p2[1])
-
-                        modified[ord(new_p1[0]) - ord('A')] = new_p1[1]
-                        modified[ord(new_p1[1]) - ord('A')] = new_p1[0]
-                        modified[ord(new_p2[0]) - ord('A')] = new_p2[1]
-                        modified[ord(new_p2[1]) - ord('A')] = new_p2[0]
-
-                        # Second swap
-                        if swap2_type == 0:
-                            new_p3, new_p4 = (p3[0], p4[1]), (p4[0], p3[1])
-                        elif swap2_type == 1:
-                            new_p3, new_p4 = (p3[0], p4[0]), (p3[1], p4[1])
-                        else:
-                            new_p3, new_p4 = (p3[1], p4[0]), (p3[0], p4[1])
-
-                        modified[ord(new_p3[0]) - ord('A')] = new_p3[1]
-                        modified[ord(new_p3[1]) - ord('A')] = new_p3[0]
-                        modified[ord(new_p4[0]) - ord('A')] = new_p4[1]
-                        modified[ord(new_p4[1]) - ord('A')] = new_p4[0]
-
-                        modified_str = ''.join(modified)
-
-                        # Test
-                        try:
-                            from enigma import Enigma, Plugboard, PlugLead, Reflector, RotorAssembly
-
-                            machine = Enigma()
-                            machine.plugboard = Plugboard()
-                            for pp in pairs:
-                                machine.plugboard.add(PlugLead(pp))
-
-                            machine.rotor_assembly = RotorAssembly(rotors, 'B', positions, rings)
-                            machine.rotor_assembly.reflector = Reflector(modified_str)
-
-                            result = machine.process_text(cipher)
-
-                            if result == expected or 'INSTAGRAM' in result:
-                                print(f"\n  ✓ Found it after {count} attempts!")
-                                return {
-                                    'plaintext': result,
-                                    'base_reflector': base_ref,
-                                    'original_wiring': original_wiring,
-                                    'modified_wiring': modified_str,
-                                    'swap1_original': (p1, p2),
-                                    'swap1_modified': (new_p1, new_p2),
-                                    'swap2_original': (p3, p4),
-                                    'swap2_modified': (new_p3, new_p4),
-                                    'rotors': rotors,
-                                    'positions': positions,
-                                    'rings': rings,
-                                    'pairs': pairs
-                                }
-                        except:
-                            pass
-
-        print(f"\n  Tested {count} combinations for reflector {base_ref}")
+                        yield base_ref, p1, p2, p3, p4, swap1_type, swap2_type
+
+
+def _swap_pairs(first, second, swap_type):
+    if swap_type == 0:
+        return (first[0], second[1]), (second[0], first[1])
+    elif swap_type == 1:
+        return (first[0], second[0]), (first[1], second[1])
+    return (first[1], second[0]), (first[0], second[1])
+
+
+def _try_modified_reflector(cipher, crib, rotors, positions, rings, pairs, window, machine, candidate):
+    """Result dict if one double wire swap decrypts the crib, else None"""
+    base_ref, p1, p2, p3, p4, swap1_type, swap2_type = candidate
+    original_wiring = RotorAssembly.REFLECTOR_CONFIGS[base_ref]
+
+    # Apply both swaps
+    modified = list(original_wiring)
+    new_p1, new_p2 = _swap_pairs(p1, p2, swap1_type)
+    new_p3, new_p4 = _swap_pairs(p3, p4, swap2_type)
+    for first, second in (new_p1, new_p2, new_p3, new_p4):
+        modified[ord(first) - ord('A')] = second
+        modified[ord(second) - ord('A')] = first
+    modified_str = ''.join(modified)
+
+    machine.reset(reflector=modified_str)
+    if window and window.match(machine) is None:
+        return None
+    result = machine.process_text(cipher)
+
+    if crib in result:
+        return {
+            'plaintext': result,
+            'base_reflector': base_ref,
+            'original_wiring': original_wiring,
+            'modified_wiring': modified_str,
+            'swap1_original': (p1, p2),
+            'swap1_modified': (new_p1, new_p2),
+            'swap2_original': (p3, p4),
+            'swap2_modified': (new_p3, new_p4),
+            'rotors': rotors,
+            'positions': positions,
+            'rings': rings,
+            'pairs': pairs
+        }
+    return None
+
 
+def modified_reflector_job(cipher, crib, rotors, positions, rings, pairs, crib_offsets=None,
+                           base_reflectors=('A', 'B', 'C')):
+    """Keyspace and task of test_modified_reflectors, for distributed.Coordinator jobs"""
+    window = CribWindow(cipher, crib, crib_offsets) if crib_offsets is not None else None
+    machine = CompiledEnigma.from_settings(rotors, 'B', positions, rings, pairs)
+    task = partial(_try_modified_reflector, cipher, crib, rotors, positions, tuple(rings), pairs, window, machine)
+    return list(reflector_swap_candidates(base_reflectors)), task
+
+
+def test_modified_reflectors(cipher, crib, rotors, positions, rings, pairs, crib_offsets=None, checkpoint=None):
+    """
+    Try all standard reflectors with double wire swaps (2 swap operations).
+    checkpoint (a path or Checkpoint) saves progress every few seconds and resumes from it;
+    a resumed result comes back as stored in JSON, with tuples as lists.
+    """
+    window = CribWindow(cipher, crib, crib_offsets) if crib_offsets is not None else None
+    checkpoint = open_checkpoint(checkpoint, {
+        'search': 'modified_reflectors', 'cipher': cipher, 'crib': crib, 'rotors': rotors, 'positions': positions,
+        'rings': rings, 'pairs': pairs, 'crib_offsets': crib_offsets
+    })
+    if checkpoint and checkpoint.done:
+        print("  Already searched, resuming with the saved result")
+        return checkpoint.result
+    cursor = checkpoint.cursor if checkpoint else 0
+    # NumPy is only needed for this search
+    from batch import ReflectorBatch, double_swap_wirings
+    machine = CompiledEnigma.from_settings(rotors, 'B', positions, rings, pairs)
+    engine = ReflectorBatch(cipher, rotors, positions, rings, pairs)
+    # Each reflector has 13 pairs: 4 of them, split 3 ways into two swaps of 3 types each
+    progress = Progress('modified_reflectors', 3 * comb(13, 4) * 3 * 3 * 3, start=cursor)
+
+    # Try each reflector, screening all of its swaps at once and checking the survivors in order
+    searched = 0
+    for base_ref in ['A', 'B', 'C']:
+        print(f"\n  Testing reflector {base_ref}...")
+
+        wirings = double_swap_wirings(RotorAssembly.REFLECTOR_CONFIGS[base_ref])
+        survivors = engine.crib_mask(wirings, crib, crib_offsets).nonzero()[0].tolist()
+        candidates = reflector_swap_candidates([base_ref])
+        previous = -1
+        for index in survivors:
+            if searched + index < cursor:
+                continue
+            candidate = next(islice(candidates, index - previous - 1, None))
+            previous = index
+            result = _try_modified_reflector(cipher, crib, rotors, positions, rings, pairs, window, machine, candidate)
+            if result is not None:
+                progress.finish(searched + index + 1, found=True)
+                print(f"  ✓ Found it after {index + 1} attempts!")
+                if checkpoint:
+                    checkpoint.update(searched + index + 1)
+                    checkpoint.finish(result)
+                return result
+
+        searched += len(wirings)
+        progress.update(searched)
+        if checkpoint:
+            checkpoint.update(searched)
+        print(f"  Tested {len(wirings)} combinations for reflector {base_ref}")
+
+    progress.finish(searched, found=False)
+    if checkpoint:
+        checkpoint.finish(None)
     return None
 
+
 def code_5():
     print("=" * 70)
     print("CODE 5: Custom reflector with TWO wire swaps")
     print("=" * 70)
     print("Testing reflectors with double wire-swap modifications...")
-    print("(This may take a few minutes...)")
     print()
 
+    cipher = 'HWREISXLGTTBYVXRCWWJAKZDTVZWKBDJPVQYNEQIOTIFX'
+    crib = 'INSTAGRAM'
+    placement = analyze_crib_placement(cipher, crib)
+    report_crib_placement(placement)
+
     result = test_modified_reflectors(
-        cipher='HWREISXLGTTBYVXRCWWJAKZDTVZWKBDJPVQYNEQIOTIFX',
-        crib='INSTAGRAM',
+        cipher=cipher,
+        crib=crib,
         rotors=['V', 'II', 'IV'],
         positions='AJL',
         rings=(6, 18, 7),
-        pairs=['UG', 'IE', 'PO', 'NX', 'WT']
+        pairs=['UG', 'IE', 'PO', 'NX', 'WT'],
+        crib_offsets=placement['offsets']
     )
 
     if result:
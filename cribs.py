@@ -0,0 +1,98 @@
+"""
+Crib helpers - test where a known plaintext fragment sits without decrypting whole messages
+"""
+from string import ascii_uppercase
+
+
+def to_codes(text):
+    return [ord(char) - ord('A') for char in text.upper() if char in ascii_uppercase]
+
+
+def legal_crib_offsets(cipher, crib):
+    """
+    Offsets where the crib can sit. Enigma never encrypts a letter to itself, so a placement
+    that lines any crib letter up with the same cipher letter is impossible.
+    """
+    cipher_codes = to_codes(cipher)
+    crib_codes = to_codes(crib)
+    span = len(cipher_codes) - len(crib_codes) + 1
+    if span <= 0:
+        return []
+
+    # Bit i of a letter mask is set when the cipher has that letter at position i,
+    # so one shift-and-or per crib letter tests every offset at once
+    letter_masks = [0] * 26
+    for idx, code in enumerate(cipher_codes):
+        letter_masks[code] |= 1 << idx
+    clashes = 0
+    for idx, code in enumerate(crib_codes):
+        clashes |= letter_masks[code] >> idx
+    return [offset for offset in range(span) if not clashes >> offset & 1]
+
+
+def analyze_crib_placement(cipher, crib):
+    """Legal crib offsets together with how many placements they rule out"""
+    total = max(0, len(to_codes(cipher)) - len(to_codes(crib)) + 1)
+    offsets = legal_crib_offsets(cipher, crib)
+    return {
+        'offsets': offsets,
+        'total': total,
+        'legal': len(offsets),
+        'pruned': total - len(offsets),
+        'pruned_fraction': (total - len(offsets)) / total if total else 1.0
+    }
+
+
+def report_crib_placement(placement):
+    print(f"  Crib placements: {placement['legal']}/{placement['total']} legal "
+          f"({100 * placement['pruned_fraction']:.1f}% pruned by no-self-encryption)")
+
+
+class CribWindow:
+    """A crib with the offsets in the ciphertext where it may sit"""
+
+    # Encrypting the window at one offset, seeking there and back included, costs about as much
+    # as this many letters of a pass through the span covering every offset
+    SEEK_COST = 8
+
+    def __init__(self, cipher, crib, offsets=None):
+        self.cipher_codes = to_codes(cipher)
+        self.crib_codes = to_codes(crib)
+        span = len(self.cipher_codes) - len(self.crib_codes) + 1
+        if offsets is None:
+            offsets = range(span)
+        self.offsets = sorted(offset for offset in offsets if 0 <= offset < span)
+        self.offset_set = frozenset(self.offsets)
+        self.crib_bytes = bytes(self.crib_codes)
+
+    @classmethod
+    def legal(cls, cipher, crib):
+        """Window over every offset not ruled out by no-self-encryption"""
+        return cls(cipher, crib, legal_crib_offsets(cipher, crib))
+
+    def match(self, machine):
+        """First offset at which the CompiledEnigma decrypts the crib, or None"""
+        if not self.offsets:
+            return None
+        first = self.offsets[0]
+        last = self.offsets[-1] + len(self.crib_codes)
+        if len(self.offsets) * self.SEEK_COST < last - first:
+            for offset in self.offsets:
+                if machine.matches_window(self.cipher_codes, self.crib_codes, offset):
+                    return offset
+            return None
+
+        saved = list(machine.offsets)
+        try:
+            machine.seek(first)
+            plain = bytes(machine.process_codes(self.cipher_codes[first:last]))
+        finally:
+            machine.offsets[:] = saved
+
+        # bytes.find tests every placement in one pass, dropping each at its first mismatched letter
+        found = plain.find(self.crib_bytes)
+        while found != -1:
+            if first + found in self.offset_set:
+                return first + found
+            found = plain.find(self.crib_bytes, found + 1)
+        return None
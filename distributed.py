@@ -0,0 +1,337 @@
+"""
+Distributed keyspace search - a coordinator leases index ranges to workers on other machines
+
+Workers and coordinator speak newline-delimited JSON over TCP, one request per connection. Every
+message is signed with an HMAC-SHA256 of a secret shared by the coordinator and its workers:
+
+    request: {"nonce": n, "body": json, "mac": hmac("request", n, body)}
+             with body {"sent": unix time, "message": message}
+    reply:   {"body": json, "mac": hmac("reply", n, body)}
+
+A reply is bound to the fresh nonce of its request, so a worker only acts on, and only imports the
+factory of, a job from a coordinator that knows the secret. The coordinator checks the signature
+before anything else, refuses requests sent more than MAX_AGE seconds from now by its clock, and
+remembers the nonces of the rest only until they are too old to be replayed. The messages are:
+
+    {"op": "job"}                                  -> {"job": {...}}
+    {"op": "lease", "worker": name}                -> {"lease": id, "start": s, "end": e, "timeout": t,
+                                                       "first_only": bool}
+                                                      or {"wait": seconds} or {"done": true}
+    {"op": "renew", "lease": id}                   -> {"ok": bool}
+    {"op": "complete", "lease": id, "hits": [...]} -> {"ok": bool}
+
+A job names a factory, "module:function", that is called with the job's kwargs on each worker
+and returns (candidates, task); keyspace index i is task(candidates[i]). Ranges whose lease is not
+renewed in time are handed to another worker, and hits are reported in keyspace order.
+"""
+import hashlib
+import hmac
+import importlib
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+
+
+def load_job(job):
+    """(candidates, task) for a job dict"""
+    module_name, function_name = job['factory'].split(':')
+    factory = getattr(importlib.import_module(module_name), function_name)
+    return factory(**job.get('kwargs', {}))
+
+
+def _key(secret):
+    key = secret.encode() if isinstance(secret, str) else bytes(secret or b'')
+    if not key:
+        raise ValueError("A shared secret is required")
+    return key
+
+
+def _mac(key, kind, nonce, body):
+    return hmac.new(key, f'{kind}\n{nonce}\n{body}'.encode(), hashlib.sha256).hexdigest()
+
+
+def _verify(key, kind, nonce, envelope):
+    """Body of a signed envelope, or PermissionError if it was not signed with the secret"""
+    body = envelope.get('body')
+    mac = envelope.get('mac')
+    if not isinstance(body, str) or not isinstance(mac, str) or not hmac.compare_digest(
+            mac, _mac(key, kind, nonce, body)):
+        raise PermissionError(f"{kind.capitalize()} failed authentication")
+    return json.loads(body)
+
+
+def request(address, message, secret, timeout=10):
+    """Send one signed message to the coordinator and return its reply, checking its signature"""
+    key = _key(secret)
+    nonce = secrets.token_hex(16)
+    body = json.dumps({'sent': time.time(), 'message': message})
+    envelope = {'nonce': nonce, 'body': body, 'mac': _mac(key, 'request', nonce, body)}
+    with socket.create_connection(address, timeout=timeout) as connection:
+        connection.sendall(json.dumps(envelope).encode() + b'\n')
+        reply = connection.makefile('rb').readline()
+    if not reply:
+        raise ConnectionError("Coordinator closed the connection")
+    return _verify(key, 'reply', nonce, json.loads(reply))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        coordinator = self.server.coordinator
+        try:
+            envelope = json.loads(line)
+            nonce = envelope.get('nonce')
+            if not isinstance(nonce, str):
+                raise PermissionError("Request failed authentication")
+            # Only a signed request may leave a trace, so nothing is recorded before this check
+            body = _verify(coordinator.key, 'request', nonce, envelope)
+            message = body['message']
+            if not coordinator.accept_nonce(nonce, body['sent']):
+                raise PermissionError("Request is stale or replayed")
+        except (ValueError, KeyError, TypeError, AttributeError, PermissionError):
+            # Unsigned: the sender cannot verify anything we would sign for it anyway
+            self.wfile.write(json.dumps({'error': 'Authentication failed'}).encode() + b'\n')
+            return
+        try:
+            reply = coordinator.handle(message)
+        except (ValueError, KeyError) as error:
+            reply = {'error': str(error)}
+        body = json.dumps(reply)
+        envelope = {'body': body, 'mac': _mac(coordinator.key, 'reply', nonce, body)}
+        self.wfile.write(json.dumps(envelope).encode() + b'\n')
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Coordinator:
+    """
+    Hands out [start, end) ranges of a keyspace of `size` indices and collects the hits, talking
+    only to workers that sign their requests with secret (a str or bytes). With stop_on_hit,
+    ranges after the earliest hit are dropped and the search ends as soon as every range before
+    it is done, which gives the hit a serial loop would find.
+    """
+
+    # Seconds a request may be sent before or after it arrives, allowing for clock differences
+    MAX_AGE = 300.0
+
+    def __init__(self, job, size, secret, range_size=1000, lease_timeout=30.0, stop_on_hit=True):
+        self.key = _key(secret)
+        self.job = job
+        self.size = size
+        self.range_size = range_size
+        self.lease_timeout = lease_timeout
+        self.stop_on_hit = stop_on_hit
+
+        self.pending = deque((start, min(start + range_size, size)) for start in range(0, size, range_size))
+        self.leases = {}
+        self.completed = set()
+        self.hits = {}
+        self.reassigned = 0
+        self.workers = set()
+        self._next_lease = 0
+        self._nonces = set()
+        # (time the nonce may be forgotten, nonce) in order of arrival
+        self._nonce_expiry = deque()
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._server = None
+
+    @property
+    def address(self):
+        return self._server.server_address if self._server else None
+
+    def accept_nonce(self, nonce, sent):
+        """
+        Whether a signed request with this nonce, sent at unix time sent, is fresh and not seen
+        before. Its nonce is kept until a replay would be refused as stale anyway.
+        """
+        now = time.time()
+        if not isinstance(sent, (int, float)) or not abs(now - sent) <= self.MAX_AGE:
+            return False
+        with self._lock:
+            while self._nonce_expiry and self._nonce_expiry[0][0] < now:
+                self._nonces.discard(self._nonce_expiry.popleft()[1])
+            if nonce in self._nonces:
+                return False
+            self._nonces.add(nonce)
+            # Sent at most MAX_AGE after now, so stale by now + 2 * MAX_AGE at the latest
+            self._nonce_expiry.append((now + 2 * self.MAX_AGE, nonce))
+            return True
+
+    def _first_hit(self):
+        return min(self.hits) if self.hits else None
+
+    def _needed(self, start):
+        first = self._first_hit()
+        return not self.stop_on_hit or first is None or start <= first
+
+    def _expire(self, now):
+        for lease, (span, worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[lease]
+                if span[0] not in self.completed:
+                    self.pending.appendleft(span)
+                    self.reassigned += 1
+
+    def _check_finished(self):
+        remaining = [span for span in self.pending if self._needed(span[0])]
+        remaining += [span for span, _, _ in self.leases.values() if self._needed(span[0])]
+        if not remaining:
+            self._finished.set()
+
+    def handle(self, message):
+        """Reply to one protocol message"""
+        op = message['op']
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if op == 'job':
+                return {'job': self.job}
+
+            if op == 'lease':
+                self.workers.add(message.get('worker'))
+                while self.pending and not self._needed(self.pending[0][0]):
+                    self.pending.popleft()
+                if self._finished.is_set() or (not self.pending and not self.leases):
+                    return {'done': True}
+                if not self.pending:
+                    return {'wait': min(1.0, self.lease_timeout / 4)}
+                span = self.pending.popleft()
+                lease = self._next_lease
+                self._next_lease += 1
+                self.leases[lease] = (span, message.get('worker'), now + self.lease_timeout)
+                return {'lease': lease, 'start': span[0], 'end': span[1], 'timeout': self.lease_timeout,
+                        'first_only': self.stop_on_hit}
+
+            if op == 'renew':
+                lease = message['lease']
+                if lease not in self.leases or self._finished.is_set() or not self._needed(self.leases[lease][0][0]):
+                    return {'ok': False}
+                span, worker, _ = self.leases[lease]
+                self.leases[lease] = (span, worker, now + self.lease_timeout)
+                return {'ok': True}
+
+            if op == 'complete':
+                lease = message['lease']
+                span = self.leases.pop(lease, (None,))[0]
+                for index, result in message.get('hits', []):
+                    self.hits.setdefault(index, result)
+                if span is not None:
+                    self.completed.add(span[0])
+                self._check_finished()
+                return {'ok': span is not None}
+
+            raise ValueError(f"Unknown op: {op}")
+
+    def start(self, host='127.0.0.1', port=0):
+        """Start serving in a background thread; returns the bound (host, port)"""
+        self._server = _Server((host, port), _Handler)
+        self._server.coordinator = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        if not self.size:
+            self._finished.set()
+        return self.address
+
+    def wait(self, timeout=None):
+        """Block until the search is finished, stop serving and return the sorted (index, result) hits"""
+        finished = self._finished.wait(timeout)
+        # Give workers a moment to hear 'done' before the socket goes away
+        time.sleep(0.1)
+        self._server.shutdown()
+        self._server.server_close()
+        if not finished:
+            raise TimeoutError("Search did not finish in time")
+        hits = sorted(self.hits.items())
+        first = self._first_hit()
+        if self.stop_on_hit and first is not None:
+            hits = [(index, result) for index, result in hits if index == first]
+        return hits
+
+
+def run_worker(address, secret, name=None):
+    """
+    Lease and search ranges from a coordinator until it reports the search done or goes away.
+    Raises PermissionError, before running anything, if the coordinator does not know secret.
+    """
+    address = tuple(address)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        candidates, task = load_job(request(address, {'op': 'job'}, secret)['job'])
+        searched = 0
+        while True:
+            reply = request(address, {'op': 'lease', 'worker': name}, secret)
+            if reply.get('done'):
+                return searched
+            if 'wait' in reply:
+                time.sleep(reply['wait'])
+                continue
+
+            lease = reply['lease']
+            renew_at = time.monotonic() + reply['timeout'] / 3
+            hits = []
+            abandoned = False
+            for index in range(reply['start'], reply['end']):
+                if time.monotonic() > renew_at:
+                    if not request(address, {'op': 'renew', 'lease': lease}, secret)['ok']:
+                        abandoned = True
+                        break
+                    renew_at = time.monotonic() + reply['timeout'] / 3
+                result = task(candidates[index])
+                searched += 1
+                if result is not None:
+                    hits.append((index, result))
+                    if reply['first_only']:
+                        break
+            if not abandoned:
+                request(address, {'op': 'complete', 'lease': lease, 'hits': hits}, secret)
+    except PermissionError:
+        raise
+    except (ConnectionError, OSError):
+        # The coordinator has finished and closed its socket
+        return None
+
+
+def main(argv):
+    """
+    python distributed.py coordinator JOB_JSON [HOST [PORT]]
+    python distributed.py worker HOST PORT
+
+    The coordinator listens on 127.0.0.1 unless given another HOST, such as 0.0.0.0 to accept
+    workers on other machines. Both sides read the shared secret from ENIGMA_DISTRIBUTED_SECRET;
+    a coordinator started without one makes one up and prints it for its workers.
+    """
+    secret = os.environ.get('ENIGMA_DISTRIBUTED_SECRET')
+    if len(argv) >= 2 and argv[0] == 'coordinator':
+        job = json.loads(argv[1])
+        candidates, _ = load_job(job)
+        host = argv[2] if len(argv) > 2 else '127.0.0.1'
+        port = int(argv[3]) if len(argv) > 3 else 0
+        if not secret:
+            secret = secrets.token_hex(16)
+            print(f"Start workers with ENIGMA_DISTRIBUTED_SECRET={secret}")
+        coordinator = Coordinator(job, len(candidates), secret)
+        print(f"Coordinator listening on {coordinator.start(host, port)}")
+        for index, result in coordinator.wait():
+            print(f"Hit at index {index}: {result}")
+    elif len(argv) == 3 and argv[0] == 'worker':
+        if not secret:
+            print("Set ENIGMA_DISTRIBUTED_SECRET to the coordinator's secret")
+            return
+        run_worker((argv[1], int(argv[2])), secret)
+    else:
+        print(main.__doc__)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
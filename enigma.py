@@ -5,6 +5,8 @@ import sys
 
 
 class PlugLead:
+    __slots__ = ('first_letter', 'second_letter', 'encoding')
+
     def __init__(self, mapping):
         if len(mapping) != 2:
             raise ValueError("Must connect exactly two letters")
@@ -23,6 +25,8 @@ class PlugLead:
 
 
 class Plugboard:
+    __slots__ = ('wire_map',)
+
     def __init__(self):
         self.wire_map = {}
     
@@ -36,20 +40,28 @@ class Plugboard:
         return self.wire_map.get(letter.upper(), letter.upper())
 
 
+_REVERSE_WIRINGS = {}
+
+
 class Rotor:
+    __slots__ = ('forward_wiring', 'backward_wiring', 'turnover_position', 'ring_offset', 'current_offset')
+
     def __init__(self, wiring, position='A', ring_setting=1, notch=''):
-        self.forward_wiring = wiring.upper()
+        # Interned so that every rotor of a type shares one copy of its wiring strings
+        self.forward_wiring = sys.intern(wiring.upper())
         self.backward_wiring = self._create_reverse_wiring()
-        self.turnover_position = notch.upper()
+        self.turnover_position = sys.intern(notch.upper())
         self.ring_offset = ring_setting - 1
         self.current_offset = 0
         self._set_to_position(position.upper())
     
     def _create_reverse_wiring(self):
-        reverse = [''] * 26
-        for idx, char in enumerate(self.forward_wiring):
-            reverse[ord(char) - ord('A')] = chr(idx + ord('A'))
-        return ''.join(reverse)
+        if self.forward_wiring not in _REVERSE_WIRINGS:
+            reverse = [''] * 26
+            for idx, char in enumerate(self.forward_wiring):
+                reverse[ord(char) - ord('A')] = chr(idx + ord('A'))
+            _REVERSE_WIRINGS[self.forward_wiring] = ''.join(reverse)
+        return _REVERSE_WIRINGS[self.forward_wiring]
     
     def _set_to_position(self, target_letter):
         target_value = ord(target_letter) - ord('A')
@@ -87,6 +99,8 @@ class Rotor:
 
 
 class Reflector:
+    __slots__ = ('wiring',)
+
     def __init__(self, wiring):
         self.wiring = wiring.upper()
     
@@ -95,7 +109,56 @@ class Reflector:
         return self.wiring[position]
 
 
+def _middle_rotor_moves(right_offset, middle_offset, right_notch, middle_notches, steps):
+    """
+    How far the middle and left rotors move over a number of keypresses.
+    Each fast-rotor turnover moves the middle rotor once; whenever the middle rotor lands
+    on its own notch it double-steps on the next keypress, taking the left rotor with it.
+    """
+    if len(middle_notches) == 26:
+        return steps, steps
+
+    def notch_run(position):
+        length = 0
+        while (position + length) % 26 in middle_notches:
+            length += 1
+        return length
+
+    chain = notch_run(middle_offset)
+    if steps <= chain or right_notch is None:
+        moves = min(steps, chain)
+        return moves, moves
+    middle_moves = left_moves = chain
+    position = (middle_offset + chain) % 26
+
+    # Turnovers during the opening double steps are swallowed by them
+    first_turnover = (right_notch - right_offset) % 26
+    if first_turnover < chain:
+        first_turnover += 26
+    if steps <= first_turnover:
+        return middle_moves, left_moves
+
+    turnovers = (steps - 1 - first_turnover) // 26 + 1
+    last_turnover = first_turnover + 26 * (turnovers - 1)
+
+    revolutions, remainder = divmod(turnovers - 1, 26 - len(middle_notches))
+    middle_moves += 26 * revolutions
+    left_moves += len(middle_notches) * revolutions
+    for _ in range(remainder):
+        run = notch_run(position + 1)
+        middle_moves += 1 + run
+        left_moves += run
+        position = (position + 1 + run) % 26
+
+    run = min(notch_run(position + 1), steps - 1 - last_turnover)
+    middle_moves += 1 + run
+    left_moves += run
+    return middle_moves, left_moves
+
+
 class RotorAssembly:
+    __slots__ = ('rotors', 'reflector', '_fused')
+
     ROTOR_CONFIGS = {
         'I': ('EKMFLGDQVZNTOWYHXUSPAIBRCJ', 'Q'),
         'II': ('AJDKSIRUXBLHWTMCQGZNPYFVOE', 'E'),
@@ -123,6 +186,9 @@ class RotorAssembly:
         
         reflector_wiring = self.REFLECTOR_CONFIGS[reflector_type.upper()]
         self.reflector = Reflector(reflector_wiring)
+        # (static rotors with their offsets, moving rotors, moving rotors reversed, effective reflector),
+        # set by fuse_static
+        self._fused = None
     
     def perform_rotation(self):
         if len(self.rotors) >= 3:
@@ -134,21 +200,147 @@ class RotorAssembly:
         
         self.rotors[0].rotate()
     
+    def offsets_after(self, steps):
+        """Rotor offsets after a further number of keypresses, computed without stepping"""
+        offsets = [rotor.current_offset for rotor in self.rotors]
+        if steps <= 0:
+            return offsets
+        offsets[0] = (offsets[0] + steps) % 26
+        if len(self.rotors) < 3:
+            return offsets
+
+        right_notches = [ord(char) - ord('A') for char in self.rotors[0].turnover_position]
+        middle_notches = {ord(char) - ord('A') for char in self.rotors[1].turnover_position}
+        if len(right_notches) > 1:
+            # Several notches on the fast rotor can hide turnovers inside a double step
+            saved = [rotor.current_offset for rotor in self.rotors]
+            for _ in range(steps):
+                self.perform_rotation()
+            offsets = [rotor.current_offset for rotor in self.rotors]
+            for rotor, offset in zip(self.rotors, saved):
+                rotor.current_offset = offset
+            return offsets
+
+        middle_moves, left_moves = _middle_rotor_moves(
+            self.rotors[0].current_offset,
+            self.rotors[1].current_offset,
+            right_notches[0] if right_notches else None,
+            middle_notches,
+            steps
+        )
+        offsets[1] = (offsets[1] + middle_moves) % 26
+        offsets[2] = (offsets[2] + left_moves) % 26
+        return offsets
+    
+    def seek(self, steps):
+        """Jump the rotors forward by a number of keypresses"""
+        for rotor, offset in zip(self.rotors, self.offsets_after(steps)):
+            rotor.current_offset = offset
+    
+    def moving_rotors(self, steps):
+        """Number of rotors, counting from the right, that move during the next steps keypresses"""
+        if steps <= 0:
+            return 0
+        if len(self.rotors) < 3:
+            return 1
+
+        right_notches = [ord(char) - ord('A') for char in self.rotors[0].turnover_position]
+        if len(right_notches) > 1:
+            saved = [rotor.current_offset for rotor in self.rotors]
+            moved = 1
+            for _ in range(steps):
+                self.perform_rotation()
+                if self.rotors[2].current_offset != saved[2]:
+                    moved = 3
+                    break
+                if self.rotors[1].current_offset != saved[1]:
+                    moved = 2
+            for rotor, offset in zip(self.rotors, saved):
+                rotor.current_offset = offset
+            return moved
+
+        middle_moves, left_moves = _middle_rotor_moves(
+            self.rotors[0].current_offset,
+            self.rotors[1].current_offset,
+            right_notches[0] if right_notches else None,
+            {ord(char) - ord('A') for char in self.rotors[1].turnover_position},
+            steps
+        )
+        if left_moves:
+            return 3
+        return 2 if middle_moves else 1
+
+    def fuse_static(self, steps):
+        """
+        Precompose the rotors that stay put for the next steps keypresses with the reflector,
+        so pass_through only walks the moving ones. Returns the number of moving rotors.
+        """
+        moving = max(self.moving_rotors(steps), 1)
+        static = self.rotors[moving:]
+        if not static:
+            self._fused = None
+            return moving
+
+        tables = [rotor_tables(rotor.forward_wiring, rotor.ring_offset + 1) for rotor in static]
+        forward = [table[0][rotor.current_offset] for rotor, table in zip(static, tables)]
+        backward = [table[1][rotor.current_offset] for rotor, table in zip(static, tables)][::-1]
+        reflector = self.reflector.wiring
+        wiring = []
+        for code in range(26):
+            for table in forward:
+                code = table[code]
+            code = ord(reflector[code]) - ord('A')
+            for table in backward:
+                code = table[code]
+            wiring.append(ascii_uppercase[code])
+        moving_rotors = self.rotors[:moving]
+        self._fused = (
+            [(rotor, rotor.current_offset) for rotor in static],
+            moving_rotors,
+            moving_rotors[::-1],
+            Reflector(''.join(wiring))
+        )
+        return moving
+
+    def unfuse(self):
+        """Drop the table made by fuse_static, so later keypresses see any change to the reflector or rotors"""
+        self._fused = None
+
+    def scrambler_sequence(self, length):
+        """Plugboard-free scrambler permutations for the next length keypresses"""
+        return ScramblerSequence(self, length)
+    
     def pass_through(self, input_letter):
         current = input_letter
+        fused = self._fused
         
-        for rotor in self.rotors:
-            current = rotor.encode_forward(current)
+        if fused is not None:
+            # Only valid while the fused rotors are where they were when fused
+            for rotor, offset in fused[0]:
+                if rotor.current_offset != offset:
+                    self._fused = fused = None
+                    break
         
-        current = self.reflector.encode(current)
+        if fused is None:
+            for rotor in self.rotors:
+                current = rotor.encode_forward(current)
+            current = self.reflector.encode(current)
+            for rotor in reversed(self.rotors):
+                current = rotor.encode_backward(current)
+            return current
         
-        for rotor in reversed(self.rotors):
+        _, rotors, backward, reflector = fused
+        for rotor in rotors:
+            current = rotor.encode_forward(current)
+        current = reflector.encode(current)
+        for rotor in backward:
             current = rotor.encode_backward(current)
-        
         return current
 
 
 class Enigma:
+    __slots__ = ('plugboard', 'rotor_assembly')
+
     def __init__(self):
         self.plugboard = Plugboard()
         self.rotor_assembly = None
@@ -175,12 +367,413 @@ class Enigma:
         
         return final_letter
     
-    def process_text(self, text):
+    def process_text(self, text, vectorized=False):
+        if vectorized:
+            # NumPy is only needed for the vectorized path
+            from batch import process_text_vectorized
+            return process_text_vectorized(self, text)
+
+        letters = [char for char in text.upper() if char in ascii_uppercase]
+        if not letters:
+            return ''
+        if not self.rotor_assembly:
+            raise RuntimeError("Machine not configured")
+        self.rotor_assembly.fuse_static(len(letters))
+        try:
+            return ''.join([self.press_key(char) for char in letters])
+        finally:
+            # The fused table is only known to be current for this call
+            self.rotor_assembly.unfuse()
+
+    def snapshot(self):
+        """
+        Compact copy of the state that changes during a search: the rotor offsets and the plugboard
+        permutation as one tuple of 26 letters
+        """
+        if not self.rotor_assembly:
+            raise RuntimeError("Machine not configured")
+        offsets = tuple(rotor.current_offset for rotor in self.rotor_assembly.rotors)
+        return offsets, tuple(self.plugboard.wire_map.get(char, char) for char in ascii_uppercase)
+
+    def restore(self, state):
+        """Return to a state taken with snapshot()"""
+        offsets, plug = state
+        for rotor, offset in zip(self.rotor_assembly.rotors, offsets):
+            rotor.current_offset = offset
+        self.plugboard.wire_map = {char: partner for char, partner in zip(ascii_uppercase, plug) if char != partner}
+
+    def seek(self, steps):
+        """Move the machine to its state after a further number of keypresses"""
+        if not self.rotor_assembly:
+            raise RuntimeError("Machine not configured")
+        self.rotor_assembly.seek(steps)
+    
+    def decrypt_range(self, text, start, end=None):
+        """
+        Letters start to end of the output process_text(text) would give, counting letters only.
+        The machine itself is left untouched.
+        """
+        if not self.rotor_assembly:
+            raise RuntimeError("Machine not configured")
+        letters = [char for char in text.upper() if char in ascii_uppercase]
+        start, end, _ = slice(start, end).indices(len(letters))
+        saved = [rotor.current_offset for rotor in self.rotor_assembly.rotors]
+        try:
+            self.rotor_assembly.seek(start)
+            self.rotor_assembly.fuse_static(max(end - start, 0))
+            return ''.join([self.press_key(char) for char in letters[start:end]])
+        finally:
+            self.rotor_assembly.unfuse()
+            for rotor, offset in zip(self.rotor_assembly.rotors, saved):
+                rotor.current_offset = offset
+
+    def compile(self):
+        """Snapshot the current configuration into an integer-table CompiledEnigma"""
+        return CompiledEnigma(self)
+
+
+_ROTOR_TABLES = {}
+
+
+def rotor_tables(wiring, ring_setting=1):
+    """Forward and backward lookup tables of a rotor wiring, indexed by [offset][letter]"""
+    key = (wiring.upper(), ring_setting)
+    if key not in _ROTOR_TABLES:
+        forward = [ord(char) - ord('A') for char in key[0]]
+        backward = [0] * 26
+        for idx, mapped in enumerate(forward):
+            backward[mapped] = idx
+
+        forward_tables = []
+        backward_tables = []
+        for offset in range(26):
+            shift = offset - (ring_setting - 1)
+            forward_tables.append(tuple((forward[(i + shift) % 26] - shift) % 26 for i in range(26)))
+            backward_tables.append(tuple((backward[(i + shift) % 26] - shift) % 26 for i in range(26)))
+        _ROTOR_TABLES[key] = (tuple(forward_tables), tuple(backward_tables))
+    return _ROTOR_TABLES[key]
+
+
+_PLUG_TABLES = {}
+
+
+def plug_table(pairs):
+    """Plugboard as a tuple of 26 letter codes, for a list of pairs such as ['AB', 'CD']"""
+    key = tuple(pair.upper() for pair in pairs)
+    if key not in _PLUG_TABLES:
+        board = Plugboard()
+        for pair in key:
+            board.add(PlugLead(pair))
+        _PLUG_TABLES[key] = tuple(ord(board.encode(char)) - ord('A') for char in ascii_uppercase)
+    return _PLUG_TABLES[key]
+
+
+def validate_settings(rotors=(), reflectors=(), positions=(), rings=(), plugboards=()):
+    """
+    Check every choice a search will make before it starts, so its loop needs no exception handling.
+    Takes collections of choices: rotor names, reflector names or wirings, position letters,
+    ring settings and plugboards (lists of pairs). Raises ValueError on the first bad one.
+    """
+    for name in rotors:
+        rotor_from_name(name)
+    for reflector in reflectors:
+        wiring = RotorAssembly.REFLECTOR_CONFIGS.get(reflector.upper(), reflector.upper())
+        if sorted(wiring) != list(ascii_uppercase) or any(
+                wiring[ord(wiring[idx]) - ord('A')] != chr(idx + ord('A')) or wiring[idx] == chr(idx + ord('A'))
+                for idx in range(26)):
+            raise ValueError(f"Invalid reflector: {reflector}")
+    for letter in positions:
+        if letter.upper() not in ascii_uppercase:
+            raise ValueError(f"Invalid rotor position: {letter}")
+    for ring in rings:
+        if not 1 <= ring <= 26:
+            raise ValueError(f"Invalid ring setting: {ring}")
+    for pairs in plugboards:
+        plug_table(pairs or ())
+
+
+class CompiledEnigma:
+    """Integer-table copy of a configured Enigma; encrypts identically but much faster"""
+
+    __slots__ = ('plugboard', 'reflector', 'forward_tables', 'backward_tables', 'notches', 'offsets', 'wirings',
+                 'rings', 'plug_pairs', 'reflector_wiring', 'start_offsets')
+
+    def __init__(self, machine):
+        assembly = machine.rotor_assembly
+        if not assembly:
+            raise RuntimeError("Machine not configured")
+
+        self.plugboard = tuple(ord(machine.plugboard.encode(char)) - ord('A') for char in ascii_uppercase)
+        self.reflector = tuple(ord(char) - ord('A') for char in assembly.reflector.wiring)
+        self.forward_tables = []
+        self.backward_tables = []
+        self.notches = []
+        self.offsets = []
+        # What the tables were built from, so reset() can tell what changed
+        self.wirings = []
+        self.rings = []
+        self.plug_pairs = None
+        self.reflector_wiring = assembly.reflector.wiring
+        for rotor in assembly.rotors:
+            forward, backward = rotor_tables(rotor.forward_wiring, rotor.ring_offset + 1)
+            self.forward_tables.append(forward)
+            self.backward_tables.append(backward)
+            self.notches.append(frozenset(ord(char) - ord('A') for char in rotor.turnover_position))
+            self.offsets.append(rotor.current_offset)
+            self.wirings.append(rotor.forward_wiring)
+            self.rings.append(rotor.ring_offset + 1)
+        self.start_offsets = list(self.offsets)
+
+    @classmethod
+    def from_settings(cls, rotors, reflector, positions='AAA', rings=(1,1,1), plug_pairs=None):
+        """Build and validate a machine once, to be moved between candidates with reset()"""
+        machine = build_enigma(rotors, reflector, positions, rings, plug_pairs).compile()
+        machine.plug_pairs = tuple(plug_pairs or ())
+        return machine
+
+    def reset(self, positions=None, rings=None, plugs=None, reflector=None, rotors=None):
+        """
+        Move to another setting, rebuilding only what differs from the current one, and rewind to
+        the start positions. Arguments take the same forms as build_enigma (reflector may also be a
+        26-letter wiring); those left as None are kept. A bad setting raises ValueError, as
+        validate_settings does, and leaves the machine as it was.
+        """
+        count = len(self.offsets)
+        if rotors is not None:
+            if len(rotors) != count:
+                raise ValueError(f"Expected {count} rotors, got {len(rotors)}")
+            for name in rotors:
+                if name.upper() not in RotorAssembly.ROTOR_CONFIGS:
+                    raise ValueError(f"Unknown rotor: {name}")
+        if rings is not None:
+            if len(rings) != count:
+                raise ValueError(f"Expected {count} ring settings, got {len(rings)}")
+            for ring in rings:
+                if not 1 <= ring <= 26:
+                    raise ValueError(f"Invalid ring setting: {ring}")
+        if positions is not None:
+            if len(positions) != count:
+                raise ValueError(f"Expected {count} rotor positions, got {len(positions)}")
+            start_offsets = [ord(char) - ord('A') for char in reversed(positions.upper())]
+            for offset in start_offsets:
+                if not 0 <= offset < 26:
+                    raise ValueError(f"Invalid rotor position: {positions}")
+        if reflector is not None:
+            reflector_wiring = RotorAssembly.REFLECTOR_CONFIGS.get(reflector.upper(), reflector.upper())
+            if reflector_wiring != self.reflector_wiring:
+                validate_settings(reflectors=[reflector_wiring])
+        if plugs is not None:
+            plugs = tuple(plugs)
+            if plugs != self.plug_pairs:
+                plug_table(plugs)
+
+        changed = set()
+        if rotors is not None:
+            for slot, name in enumerate(reversed(rotors)):
+                wiring, notch = RotorAssembly.ROTOR_CONFIGS[name.upper()]
+                if wiring != self.wirings[slot]:
+                    self.wirings[slot] = wiring
+                    self.notches[slot] = frozenset(ord(char) - ord('A') for char in notch)
+                    changed.add(slot)
+        if rings is not None:
+            for slot, ring in enumerate(reversed(rings)):
+                if ring != self.rings[slot]:
+                    self.rings[slot] = ring
+                    changed.add(slot)
+        for slot in changed:
+            self.forward_tables[slot], self.backward_tables[slot] = rotor_tables(self.wirings[slot], self.rings[slot])
+
+        if reflector is not None and reflector_wiring != self.reflector_wiring:
+            self.reflector_wiring = reflector_wiring
+            self.reflector = tuple(ord(char) - ord('A') for char in reflector_wiring)
+        if plugs is not None and plugs != self.plug_pairs:
+            self.plug_pairs = plugs
+            self.plugboard = plug_table(plugs)
+        if positions is not None:
+            self.start_offsets = start_offsets
+        self.offsets[:] = self.start_offsets
+        return self
+
+    def positions(self):
+        return ''.join(chr(offset + ord('A')) for offset in reversed(self.offsets))
+
+    def snapshot(self):
+        """Rotor offsets and plugboard permutation, as Enigma.snapshot but in letter codes"""
+        return tuple(self.offsets), self.plugboard
+
+    def restore(self, state):
+        offsets, self.plugboard = state
+        self.offsets[:] = offsets
+        self.plug_pairs = None
+
+    def step(self):
+        offsets = self.offsets
+        if len(offsets) >= 3:
+            if offsets[1] in self.notches[1]:
+                offsets[1] = (offsets[1] + 1) % 26
+                offsets[2] = (offsets[2] + 1) % 26
+            elif offsets[0] in self.notches[0]:
+                offsets[1] = (offsets[1] + 1) % 26
+        offsets[0] = (offsets[0] + 1) % 26
+
+    def seek(self, steps):
+        """Jump forward by a number of keypresses, as RotorAssembly.seek"""
+        offsets = self.offsets
+        if steps <= 0:
+            return
+        if len(offsets) >= 3 and len(self.notches[0]) > 1:
+            for _ in range(steps):
+                self.step()
+            return
+        if len(offsets) >= 3:
+            middle_moves, left_moves = _middle_rotor_moves(
+                offsets[0],
+                offsets[1],
+                next(iter(self.notches[0])) if self.notches[0] else None,
+                self.notches[1],
+                steps
+            )
+            offsets[1] = (offsets[1] + middle_moves) % 26
+            offsets[2] = (offsets[2] + left_moves) % 26
+        offsets[0] = (offsets[0] + steps) % 26
+
+    def matches_window(self, cipher_codes, plain_codes, offset):
+        """
+        Whether the letters of the message at offset decrypt to plain_codes.
+        Stops at the first mismatch and leaves the machine at its current state.
+        """
+        if offset < 0 or offset + len(plain_codes) > len(cipher_codes):
+            return False
+        saved = list(self.offsets)
+        try:
+            self.seek(offset)
+            for idx, plain_code in enumerate(plain_codes):
+                self.step()
+                if self.encode(cipher_codes[offset + idx]) != plain_code:
+                    return False
+            return True
+        finally:
+            self.offsets[:] = saved
+
+    def encode(self, code):
+        """Run one letter code through plugboard, rotors and reflector without stepping"""
+        offsets = self.offsets
+        code = self.plugboard[code]
+        for idx in range(len(offsets)):
+            code = self.forward_tables[idx][offsets[idx]][code]
+        code = self.reflector[code]
+        for idx in range(len(offsets) - 1, -1, -1):
+            code = self.backward_tables[idx][offsets[idx]][code]
+        return self.plugboard[code]
+
+    def press_key(self, letter):
+        self.step()
+        return ascii_uppercase[self.encode(ord(letter.upper()) - ord('A'))]
+
+    def _inner_permutation(self):
+        """Compose every rotor but the rightmost with the reflector into one table"""
+        offsets = self.offsets
+        forward = [self.forward_tables[idx][offsets[idx]] for idx in range(1, len(offsets))]
+        backward = [self.backward_tables[idx][offsets[idx]] for idx in range(len(offsets) - 1, 0, -1)]
+        inner = []
+        for code in range(26):
+            for table in forward:
+                code = table[code]
+            code = self.reflector[code]
+            for table in backward:
+                code = table[code]
+            inner.append(code)
+        return inner
+
+    def process_codes(self, codes):
+        """Encrypt a sequence of letter codes (0-25), returning a list of codes"""
+        offsets = self.offsets
+        plugboard = self.plugboard
+        forward = self.forward_tables[0]
+        backward = self.backward_tables[0]
+        right_notch = self.notches[0]
+        middle_notch = self.notches[1] if len(offsets) >= 3 else None
+        inner = self._inner_permutation()
+
         output = []
-        for char in text.upper():
-            if char in ascii_uppercase:
-                output.append(self.press_key(char))
-        return ''.join(output)
+        for code in codes:
+            if middle_notch is not None:
+                if offsets[1] in middle_notch:
+                    offsets[1] = (offsets[1] + 1) % 26
+                    offsets[2] = (offsets[2] + 1) % 26
+                    inner = self._inner_permutation()
+                elif offsets[0] in right_notch:
+                    offsets[1] = (offsets[1] + 1) % 26
+                    inner = self._inner_permutation()
+            offset = offsets[0] = (offsets[0] + 1) % 26
+
+            code = backward[offset][inner[forward[offset][plugboard[code]]]]
+            output.append(plugboard[code])
+        return output
+
+    def process_text(self, text):
+        codes = [ord(char) - ord('A') for char in text.upper() if char in ascii_uppercase]
+        return ''.join([ascii_uppercase[code] for code in self.process_codes(codes)])
+
+
+class ScramblerSequence:
+    """
+    Rotor and reflector permutation at each keypress of a message, for one rotor setting.
+    The scrambler does not depend on the plugboard, so once built any plugboard can be tried
+    with two plugboard lookups and one table lookup per letter.
+    """
+
+    def __init__(self, assembly, length):
+        tables = [rotor_tables(rotor.forward_wiring, rotor.ring_offset + 1) for rotor in assembly.rotors]
+        reflector = [ord(char) - ord('A') for char in assembly.reflector.wiring]
+        saved = [rotor.current_offset for rotor in assembly.rotors]
+
+        self.permutations = []
+        inner = None
+        inner_offsets = None
+        try:
+            for _ in range(length):
+                assembly.perform_rotation()
+                offsets = [rotor.current_offset for rotor in assembly.rotors]
+                if offsets[1:] != inner_offsets:
+                    inner_offsets = offsets[1:]
+                    inner = []
+                    for code in range(26):
+                        for idx in range(1, len(offsets)):
+                            code = tables[idx][0][offsets[idx]][code]
+                        code = reflector[code]
+                        for idx in range(len(offsets) - 1, 0, -1):
+                            code = tables[idx][1][offsets[idx]][code]
+                        inner.append(code)
+                forward = tables[0][0][offsets[0]]
+                backward = tables[0][1][offsets[0]]
+                self.permutations.append(tuple(backward[inner[forward[code]]] for code in range(26)))
+        finally:
+            for rotor, offset in zip(assembly.rotors, saved):
+                rotor.current_offset = offset
+
+    def __len__(self):
+        return len(self.permutations)
+
+    def __getitem__(self, step):
+        return self.permutations[step]
+
+    def __iter__(self):
+        return iter(self.permutations)
+
+    def decrypt_codes(self, codes, plug=None):
+        """Encrypt letter codes under a plug permutation given as 26 codes (None for no plugboard)"""
+        if plug is None:
+            return [perm[code] for perm, code in zip(self.permutations, codes)]
+        return [plug[perm[plug[code]]] for perm, code in zip(self.permutations, codes)]
+
+    def process_text(self, text, plug_pairs=None):
+        board = Plugboard()
+        for pair in plug_pairs or ():
+            board.add(PlugLead(pair))
+        plug = [ord(board.encode(char)) - ord('A') for char in ascii_uppercase]
+        codes = [ord(char) - ord('A') for char in text.upper() if char in ascii_uppercase]
+        return ''.join([ascii_uppercase[code] for code in self.decrypt_codes(codes, plug)])
 
 
 def build_enigma(rotor_list, reflector_type, positions='AAA', rings=(1,1,1), plug_pairs=None):
@@ -207,6 +800,20 @@ def run_tests_sequentially():
         'test_plugboard.py',
         'test_rotor.py',
         'test_enigma.py',
+        'test_compiled.py',
+        'test_batch.py',
+        'test_cribs.py',
+        'test_bombe.py',
+        'test_scoring.py',
+        'test_plugboard_solver.py',
+        'test_parallel.py',
+        'test_distributed.py',
+        'test_keyspace.py',
+        'test_checkpoint.py',
+        'test_benchmark.py',
+        'test_crack_benchmark.py',
+        'test_instrumentation.py',
+        'test_progress.py',
     ]
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -0,0 +1,279 @@
+"""
+Optional instrumentation - counters and timers for the machine and the searches, plus hooks to run
+a search under cProfile or tracemalloc
+
+Nothing is counted until enable() is called: it swaps counting wrappers in for the instrumented
+methods and functions, and disable() puts the originals back, so a disabled run executes exactly
+the uninstrumented code. Counts are kept per process; run pooled searches with processes=1 to
+count everything.
+
+    enable()
+    crack_codes.code_2()
+    print(snapshot())
+    disable()
+"""
+import cProfile
+import importlib
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+COUNTERS = ('keypresses', 'constructions', 'rotor_steps', 'double_steps', 'candidates_tested',
+            'candidates_pruned')
+
+# Search functions timed while enabled, as (module, function)
+TIMED_FUNCTIONS = [
+    ('crack_codes', 'test_reflectors'),
+    ('crack_codes', 'test_positions'),
+    ('crack_codes', 'test_rotor_ring_reflector'),
+    ('crack_codes', 'test_missing_pairs'),
+    ('crack_codes', 'test_modified_reflectors'),
+    ('advanced_crack_codes', 'intelligent_position_search'),
+    ('advanced_crack_codes', 'optimized_rotor_ring_search'),
+    ('plugboard_solver', 'solve_plugboard'),
+    ('bombe', 'bombe_search'),
+]
+
+counters = dict.fromkeys(COUNTERS, 0)
+# name -> [calls, seconds]
+timers = {}
+# (owner, attribute, original) of every patch in place
+_patches = []
+
+
+def _count_press(press_key):
+    def wrapper(self, letter):
+        counters['keypresses'] += 1
+        return press_key(self, letter)
+    return wrapper
+
+
+def _count_rotation(perform_rotation):
+    def wrapper(self):
+        counters['rotor_steps'] += 1
+        if len(self.rotors) >= 3 and self.rotors[1].at_turnover():
+            counters['double_steps'] += 1
+        return perform_rotation(self)
+    return wrapper
+
+
+def _count_construction(init):
+    def wrapper(self, *args, **kwargs):
+        counters['constructions'] += 1
+        return init(self, *args, **kwargs)
+    return wrapper
+
+
+def _count_step(step):
+    def wrapper(self):
+        counters['rotor_steps'] += 1
+        if len(self.offsets) >= 3 and self.offsets[1] in self.notches[1]:
+            counters['double_steps'] += 1
+        return step(self)
+    return wrapper
+
+
+def _count_encode(encode):
+    def wrapper(self, code):
+        counters['keypresses'] += 1
+        return encode(self, code)
+    return wrapper
+
+
+def _count_codes(process_codes):
+    def wrapper(self, codes):
+        codes = list(codes)
+        counters['keypresses'] += len(codes)
+        counters['rotor_steps'] += len(codes)
+        if len(self.offsets) >= 3:
+            # Stepping is inlined in process_codes, so replay the middle rotor to count double steps
+            offsets = list(self.offsets[:3])
+            for _ in codes:
+                if offsets[1] in self.notches[1]:
+                    counters['double_steps'] += 1
+                    offsets[1] = (offsets[1] + 1) % 26
+                elif offsets[0] in self.notches[0]:
+                    offsets[1] = (offsets[1] + 1) % 26
+                offsets[0] = (offsets[0] + 1) % 26
+        return process_codes(self, codes)
+    return wrapper
+
+
+def _count_candidate(function):
+    def wrapper(*args, **kwargs):
+        counters['candidates_tested'] += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def _count_window(match):
+    def wrapper(self, machine):
+        offset = match(self, machine)
+        if offset is None:
+            counters['candidates_pruned'] += 1
+        return offset
+    return wrapper
+
+
+def _count_mask(crib_mask):
+    def wrapper(self, wirings, crib, offsets=None):
+        mask = crib_mask(self, wirings, crib, offsets)
+        counters['candidates_tested'] += len(mask)
+        counters['candidates_pruned'] += len(mask) - int(mask.sum())
+        return mask
+    return wrapper
+
+
+def _timed(name, function):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timer = timers.setdefault(name, [0, 0.0])
+            timer[0] += 1
+            timer[1] += time.perf_counter() - start
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+
+def _patch(owner, attribute, wrap):
+    original = owner.__dict__[attribute]
+    _patches.append((owner, attribute, original))
+    setattr(owner, attribute, wrap(original))
+
+
+def is_enabled():
+    return bool(_patches)
+
+
+def enable(timed_functions=None):
+    """Start counting; timed_functions, as (module, function) pairs, replaces TIMED_FUNCTIONS"""
+    if _patches:
+        return
+    from enigma import CompiledEnigma, Enigma, RotorAssembly
+    from cribs import CribWindow
+    from batch import ReflectorBatch
+    from plugboard_solver import IncrementalPlugboard
+
+    _patch(Enigma, 'press_key', _count_press)
+    _patch(RotorAssembly, 'perform_rotation', _count_rotation)
+    _patch(RotorAssembly, '__init__', _count_construction)
+    _patch(CompiledEnigma, 'step', _count_step)
+    _patch(CompiledEnigma, 'encode', _count_encode)
+    _patch(CompiledEnigma, 'process_codes', _count_codes)
+    # Every reset-based search moves the machine to each candidate with one reset
+    _patch(CompiledEnigma, 'reset', _count_candidate)
+    _patch(IncrementalPlugboard, 'evaluate', _count_candidate)
+    _patch(CribWindow, 'match', _count_window)
+    _patch(ReflectorBatch, 'crib_mask', _count_mask)
+    _patch(CompiledEnigma, 'process_text', lambda function: _timed('CompiledEnigma.process_text', function))
+
+    for module_name, function_name in TIMED_FUNCTIONS if timed_functions is None else timed_functions:
+        module = importlib.import_module(module_name)
+        name = f'{module_name}.{function_name}'
+        _patch(module, function_name, lambda function, name=name: _timed(name, function))
+
+
+def disable():
+    """Stop counting and restore the uninstrumented code; counts are kept until reset()"""
+    while _patches:
+        owner, attribute, original = _patches.pop()
+        setattr(owner, attribute, original)
+
+
+def reset():
+    for name in counters:
+        counters[name] = 0
+    timers.clear()
+
+
+def snapshot():
+    """Copy of the counters and timers, as {'counters': {...}, 'timers': {name: {'calls', 'seconds'}}}"""
+    return {
+        'counters': dict(counters),
+        'timers': {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in timers.items()}
+    }
+
+
+def difference(after, before):
+    """Counts and times accumulated between two snapshots"""
+    timed = {}
+    for name, timer in after['timers'].items():
+        earlier = before['timers'].get(name, {'calls': 0, 'seconds': 0.0})
+        if timer['calls'] != earlier['calls']:
+            timed[name] = {'calls': timer['calls'] - earlier['calls'], 'seconds': timer['seconds'] - earlier['seconds']}
+    return {
+        'counters': {name: after['counters'][name] - before['counters'][name] for name in after['counters']},
+        'timers': timed
+    }
+
+
+@contextmanager
+def instrumented():
+    """Count within a with block, from zero; yields nothing, read snapshot() inside or after it"""
+    reset()
+    enable()
+    try:
+        yield
+    finally:
+        disable()
+
+
+@contextmanager
+def profiled(path=None, sort='cumulative', limit=20, stream=None):
+    """
+    Run a with block under cProfile. The stats are written to path (for pstats or snakeviz) if
+    given, and the top `limit` entries by sort are printed to stream (stdout by default).
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        if limit:
+            pstats.Stats(profiler, stream=stream or sys.stdout).sort_stats(sort).print_stats(limit)
+
+
+class MemoryTrace:
+    """Filled in when a memory_traced block ends: the final snapshot, growth by line and peak bytes"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.growth = []
+        self.peak = 0
+
+
+@contextmanager
+def memory_traced(path=None, limit=10, frames=1, stream=None):
+    """
+    Run a with block under tracemalloc. The final snapshot is dumped to path if given (load it with
+    tracemalloc.Snapshot.load), and the `limit` lines that allocated most are printed to stream.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(frames)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    trace = MemoryTrace()
+    try:
+        yield trace
+    finally:
+        trace.snapshot = tracemalloc.take_snapshot()
+        trace.peak = tracemalloc.get_traced_memory()[1]
+        if started:
+            tracemalloc.stop()
+        trace.growth = trace.snapshot.compare_to(before, 'lineno')
+        if path:
+            trace.snapshot.dump(path)
+        if limit:
+            stream = stream or sys.stdout
+            print(f"Peak traced memory: {trace.peak / 1024:.1f} KiB", file=stream)
+            for stat in trace.growth[:limit]:
+                print(f"  {stat}", file=stream)
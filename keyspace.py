@@ -0,0 +1,280 @@
+"""
+Mixed-radix keyspaces - number every machine setting of a search and map between keys and integers
+"""
+from string import ascii_uppercase
+
+from enigma import validate_settings
+
+
+def _per_slot(values, choices, defaults):
+    """
+    Choices for each slot, one slot per entry of defaults. values gives each slot its own: a single
+    value fixes the slot, a list or string lets it take any of its values and None keeps its
+    default, as in (24, 8, 20), 'EMY' or ['ETA', None, 'XYZ']. choices instead gives every slot the
+    same values.
+    """
+    if values is not None and choices is not None:
+        raise ValueError("Give either values per slot or choices for every slot, not both")
+    if choices is not None:
+        return [list(choices) for _ in defaults]
+    if values is None:
+        return [list(default) for default in defaults]
+    if len(values) != len(defaults):
+        raise ValueError(f"Expected values for {len(defaults)} slots, got {len(values)}")
+    return [list(default) if value is None else list(value) if isinstance(value, (list, tuple, str)) else [value]
+            for value, default in zip(values, defaults)]
+
+
+class Keyspace:
+    """
+    Every combination of rotor order, ring settings, start positions, reflector and plugboard.
+    Keys are ranked in the order of nested loops over exactly those dimensions: rotor orders
+    (as itertools.permutations gives them) outermost, then rings and positions slot by slot from
+    the left, then reflector, with the plugboard option innermost.
+
+    rotors: rotor names to choose rotor_count of, in order, or a list of explicit rotor orders
+    rings, positions: one entry per slot, either a fixed value or a list of values, as in
+        (24, 8, 20), 'EMY' or ['ETA', 'AB', 'XYZ']. None means every ring setting or every letter.
+    ring_choices, position_choices: values to try in every slot, instead of rings or positions
+    reflectors, plugboards: lists of choices; a plugboard choice is a list of pairs or None
+    """
+
+    def __init__(self, rotors, reflectors=('A', 'B', 'C'), rings=None, positions=None, plugboards=(None,),
+                 rotor_count=3, ring_choices=None, position_choices=None):
+        rotors = list(rotors)
+        if rotors and isinstance(rotors[0], (list, tuple)):
+            self.rotor_orders = [[rotor.upper() for rotor in order] for order in rotors]
+            rotor_count = len(self.rotor_orders[0])
+            self.rotors = None
+        else:
+            self.rotor_orders = None
+            self.rotors = [rotor.upper() for rotor in rotors]
+            if rotor_count > len(self.rotors):
+                raise ValueError("Not enough rotors to choose from")
+        self.rotor_count = rotor_count
+        self.reflectors = list(reflectors)
+        self.rings = _per_slot(rings, ring_choices, [range(1, 27)] * rotor_count)
+        self.positions = _per_slot(positions, position_choices, [ascii_uppercase] * rotor_count)
+        self.plugboards = list(plugboards)
+
+        if self.rotor_orders is not None:
+            self.orders = len(self.rotor_orders)
+        else:
+            # Number of rotor orders: n!/(n-k)!
+            self.orders = 1
+            for idx in range(rotor_count):
+                self.orders *= len(self.rotors) - idx
+
+        # Radix of every digit after the rotor order, most significant first
+        self.radices = ([len(choices) for choices in self.rings] +
+                        [len(choices) for choices in self.positions] +
+                        [len(self.reflectors), len(self.plugboards)])
+        self.size = self.orders
+        for radix in self.radices:
+            self.size *= radix
+
+    def __len__(self):
+        return self.size
+
+    def _order(self, rank):
+        """rank-th rotor order in itertools.permutations order"""
+        if self.rotor_orders is not None:
+            return list(self.rotor_orders[rank])
+        remaining = list(self.rotors)
+        block = self.orders
+        order = []
+        for idx in range(self.rotor_count):
+            block //= len(remaining)
+            digit, rank = divmod(rank, block)
+            order.append(remaining.pop(digit))
+        return order
+
+    def _order_rank(self, order):
+        if self.rotor_orders is not None:
+            return self.rotor_orders.index([rotor.upper() for rotor in order])
+        remaining = list(self.rotors)
+        block = self.orders
+        rank = 0
+        for rotor in order:
+            block //= len(remaining)
+            digit = remaining.index(rotor.upper())
+            rank += digit * block
+            remaining.pop(digit)
+        return rank
+
+    def key(self, index):
+        """Settings dict for the key numbered index"""
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("Key index out of range")
+
+        digits = []
+        for radix in reversed(self.radices):
+            index, digit = divmod(index, radix)
+            digits.append(digit)
+        digits.reverse()
+
+        k = self.rotor_count
+        return {
+            'rotors': self._order(index),
+            'rings': tuple(self.rings[slot][digit] for slot, digit in enumerate(digits[:k])),
+            'positions': ''.join(self.positions[slot][digit] for slot, digit in enumerate(digits[k:2 * k])),
+            'reflector': self.reflectors[digits[2 * k]],
+            'pairs': self.plugboards[digits[2 * k + 1]]
+        }
+
+    def index(self, key):
+        """Number of a settings dict, the inverse of key(); raises ValueError if it is not in the space"""
+        k = self.rotor_count
+        digits = [self.rings[slot].index(ring) for slot, ring in enumerate(key['rings'])]
+        digits += [self.positions[slot].index(letter) for slot, letter in enumerate(key['positions'].upper())]
+        digits.append(self.reflectors.index(key['reflector']))
+        digits.append(self.plugboards.index(key.get('pairs')))
+        if len(key['rotors']) != k or len(digits) != 2 * k + 2:
+            raise ValueError("Key does not have one ring and position per rotor")
+
+        index = self._order_rank(key['rotors'])
+        for radix, digit in zip(self.radices, digits):
+            index = index * radix + digit
+        return index
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.size)
+            return KeyRange(self, range(start, stop, step))
+        return self.key(item)
+
+    def __iter__(self):
+        return iter(KeyRange(self, range(self.size)))
+
+    def validate(self):
+        """Raise ValueError if any choice in the keyspace is not a valid machine setting"""
+        rotors = self.rotors if self.rotors is not None else [rotor for order in self.rotor_orders for rotor in order]
+        validate_settings(
+            rotors=rotors,
+            reflectors=self.reflectors,
+            positions=[letter for choices in self.positions for letter in choices],
+            rings=[ring for choices in self.rings for ring in choices],
+            plugboards=self.plugboards
+        )
+
+    def subspace(self, rotors=None, reflectors=None, rings=None, positions=None, plugboards=None,
+                 ring_choices=None, position_choices=None):
+        """
+        Keyspace with some choices replaced, in the same forms the constructor takes. A None slot
+        in rings or positions keeps its current choices, as in positions=['ETAOIN', None, None].
+        """
+        if rotors is None:
+            rotors = self.rotor_orders if self.rotor_orders is not None else self.rotors
+        return Keyspace(
+            rotors,
+            self.reflectors if reflectors is None else reflectors,
+            _per_slot(rings, ring_choices, self.rings),
+            _per_slot(positions, position_choices, self.positions),
+            self.plugboards if plugboards is None else plugboards,
+            self.rotor_count
+        )
+
+    def shards(self, count):
+        """Split into count contiguous ranges of near-equal size"""
+        bounds = [self.size * idx // count for idx in range(count + 1)]
+        return [self[bounds[idx]:bounds[idx + 1]] for idx in range(count)]
+
+
+class KeyRange:
+    """A slice of a Keyspace; keys are produced one at a time as it is iterated"""
+
+    def __init__(self, keyspace, indices):
+        self.keyspace = keyspace
+        self.indices = indices
+
+    @property
+    def start(self):
+        return self.indices.start
+
+    @property
+    def stop(self):
+        return self.indices.stop
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return KeyRange(self.keyspace, self.indices[item])
+        return self.keyspace.key(self.indices[item])
+
+    def __iter__(self):
+        for index in self.indices:
+            yield self.keyspace.key(index)
+
+    def numbered(self):
+        """(index, key) pairs, for searches that report or checkpoint their progress"""
+        for index in self.indices:
+            yield index, self.keyspace.key(index)
+
+
+class CandidateScheduler:
+    """
+    Keys of a keyspace in priority order, produced lazily. Each tier (any iterable of keys, such as
+    a subspace or a list of prior guesses) is yielded in turn, then with rest=True every key not yet
+    seen in keyspace order. A key is never yielded twice: seen keys are marked in a bitmap, or a set
+    for keyspaces too large for one.
+    """
+
+    # Keyspaces up to this many keys get a bitmap (16 MB at the limit)
+    BITMAP_LIMIT = 2 ** 27
+
+    def __init__(self, keyspace, tiers=(), rest=True):
+        self.keyspace = keyspace
+        self.tiers = tiers
+        self.rest = rest
+
+    def numbered(self):
+        """(index, key) pairs in priority order"""
+        keyspace = self.keyspace
+        if len(keyspace) <= self.BITMAP_LIMIT:
+            bitmap = bytearray((len(keyspace) + 7) // 8)
+
+            def first_sighting(index):
+                byte, bit = index >> 3, 1 << (index & 7)
+                if bitmap[byte] & bit:
+                    return False
+                bitmap[byte] |= bit
+                return True
+        else:
+            seen = set()
+
+            def first_sighting(index):
+                if index in seen:
+                    return False
+                seen.add(index)
+                return True
+
+        for tier in self.tiers:
+            for key in tier:
+                index = keyspace.index(key)
+                if first_sighting(index):
+                    yield index, key
+        if self.rest:
+            for index in range(len(keyspace)):
+                if first_sighting(index):
+                    yield index, keyspace.key(index)
+
+    def __iter__(self):
+        for _, key in self.numbered():
+            yield key
+
+
+def frequency_first(keyspace, letters='ETAOINSHRD', slot=0):
+    """Tier of keys whose start position in slot is one of letters, most likely letter first"""
+    positions = [None] * keyspace.rotor_count
+    positions[slot] = [letter for letter in letters if letter in keyspace.positions[slot]]
+    return keyspace.subspace(positions=positions)
+
+
+def matching_rings(keyspace):
+    """Tiers of keys with every ring set alike, one per ring value"""
+    shared = [ring for ring in keyspace.rings[0] if all(ring in choices for choices in keyspace.rings)]
+    return [keyspace.subspace(rings=(ring,) * keyspace.rotor_count) for ring in shared]
@@ -0,0 +1,106 @@
+"""
+Parallel keyspace search - shard candidates across a process pool and stop at the first hit
+"""
+import os
+from itertools import islice
+from multiprocessing import Pool, Value
+
+# Worker-side state, installed once per process by _init_worker
+_task = None
+_stop = None
+
+# No hit yet
+_NO_HIT = 2 ** 62
+
+
+def _init_worker(task, stop):
+    global _task, _stop
+    _task = task
+    _stop = stop
+
+
+def _search_chunk(job):
+    """
+    Try every candidate of one chunk. Gives up early once a worker has reported a hit in an
+    earlier chunk, since the result would then never be used.
+    Returns (chunk index, candidates tried, hit offset or None, result or None).
+    """
+    index, candidates = job
+    # The raw value reads without the lock; a stale read only costs one more candidate
+    earliest = _stop.get_obj()
+    for offset, candidate in enumerate(candidates):
+        if earliest.value < index:
+            return index, offset, None, None
+        result = _task(candidate)
+        if result is not None:
+            with _stop.get_lock():
+                if index < earliest.value:
+                    earliest.value = index
+            return index, offset + 1, offset, result
+    return index, len(candidates), None, None
+
+
+def _chunks(candidates, chunk_size):
+    iterator = iter(candidates)
+    index = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield index, chunk
+        index += 1
+
+
+class SearchExecutor:
+    """
+    Runs task(candidate) over a keyspace until it returns something other than None.
+    The task must be picklable (a module-level function, or a functools.partial of one).
+    Hits are reported in keyspace order, so the result is the one a plain loop would find.
+    """
+
+    def __init__(self, task, processes=None, chunk_size=256):
+        self.task = task
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.tried = 0
+
+    def _search_serial(self, candidates, progress, start):
+        for attempt, candidate in enumerate(candidates, start + 1):
+            self.tried = attempt
+            result = self.task(candidate)
+            if result is not None:
+                return attempt, result
+            if progress and attempt % self.chunk_size == 0:
+                progress(attempt)
+        return None
+
+    def search(self, candidates, progress=None, start=0):
+        """
+        (attempts, result) for the first candidate with a result, or None if there is none.
+        attempts counts candidates in keyspace order up to and including the hit.
+        progress, if given, is called in this process with the number of candidates tried so far;
+        every candidate before that count has been tried, so it can serve as a resume cursor.
+        start skips that many candidates, as when resuming from such a cursor.
+        """
+        self.tried = start
+        if start:
+            # Keyspaces and lists slice in constant time; anything else is skipped through
+            candidates = candidates[start:] if hasattr(candidates, '__getitem__') else islice(candidates, start, None)
+        if self.processes == 1:
+            return self._search_serial(candidates, progress, start)
+
+        stop = Value('q', _NO_HIT)
+        with Pool(self.processes, initializer=_init_worker, initargs=(self.task, stop)) as pool:
+            # imap hands results back in chunk order, so the first hit seen is the earliest one
+            for index, tried, offset, result in pool.imap(_search_chunk, _chunks(candidates, self.chunk_size)):
+                self.tried += tried
+                if result is not None:
+                    # Leaving the with block terminates the workers still running
+                    return start + index * self.chunk_size + offset + 1, result
+                if progress:
+                    progress(self.tried)
+        return None
+
+
+def parallel_search(task, candidates, processes=None, chunk_size=256, progress=None, start=0):
+    return SearchExecutor(task, processes, chunk_size).search(candidates, progress, start)
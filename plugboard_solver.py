@@ -0,0 +1,266 @@
+"""
+Plugboard recovery by hill climbing on n-gram fitness, for known rotor settings
+"""
+import random
+from math import exp
+from string import ascii_uppercase
+
+from enigma import PlugLead, Plugboard, RotorAssembly
+
+
+def scrambler_sequence(rotors, reflector, positions, rings, length):
+    """Plugboard-free scrambler permutation at each of the next length keypresses"""
+    return RotorAssembly(rotors, reflector, positions, rings).scrambler_sequence(length)
+
+
+def _pairs_to_plug(pairs):
+    """Validated plug permutation for a list of pairs such as ['AB', 'CD']"""
+    board = Plugboard()
+    for pair in pairs or ():
+        board.add(PlugLead(pair))
+    return [ord(board.encode(char)) - ord('A') for char in ascii_uppercase]
+
+
+def _plug_to_pairs(plug):
+    return [chr(a + ord('A')) + chr(b + ord('A')) for a, b in enumerate(plug) if a < b]
+
+
+def index_of_coincidence(codes):
+    """Index of coincidence of a sequence of letter codes, as advanced_crack_codes.calculate_ic"""
+    if len(codes) < 2:
+        return 0
+    counts = [0] * 26
+    for code in codes:
+        counts[code] += 1
+    return sum(count * (count - 1) for count in counts) / (len(codes) * (len(codes) - 1))
+
+
+def _neighbours(plug, a, b, max_leads):
+    """Plugboards one lead change away from plug that involve letters a and b"""
+    leads = sum(1 for letter, partner in enumerate(plug) if letter < partner)
+    if plug[a] == b:
+        candidate = list(plug)
+        candidate[a], candidate[b] = a, b
+        yield candidate
+        return
+
+    partner_a, partner_b = plug[a], plug[b]
+    candidate = list(plug)
+    for letter, partner in ((a, partner_a), (b, partner_b)):
+        if partner != letter:
+            candidate[letter], candidate[partner] = letter, partner
+            leads -= 1
+    candidate[a], candidate[b] = b, a
+    if leads + 1 <= max_leads:
+        yield candidate
+
+    # Keep the displaced partners connected to each other
+    if partner_a != a and partner_b != b and partner_a != partner_b:
+        swapped = list(candidate)
+        swapped[partner_a], swapped[partner_b] = partner_b, partner_a
+        if leads + 2 <= max_leads:
+            yield swapped
+
+
+class PlugboardEvaluation:
+    """Score of a candidate plugboard and the per-position changes needed to adopt it"""
+
+    def __init__(self, plug, score, ic, crib_hits, changes, windows):
+        self.plug = plug
+        self.score = score
+        self.ic = ic
+        self.crib_hits = crib_hits
+        self.changes = changes
+        self.windows = windows
+
+
+class IncrementalPlugboard:
+    """
+    Decryption of one message under a changing plugboard, for fixed rotor settings.
+    The plugboard-independent scrambler output of every position is cached, so a lead change
+    only revisits the positions where an affected letter enters or leaves the scrambler; the
+    n-gram score, letter counts and crib matches are patched for those positions alone.
+    """
+
+    def __init__(self, sequence, cipher_codes, plug, scorer=None, crib=None):
+        self.sequence = sequence
+        self.cipher_codes = list(cipher_codes)
+        if scorer is None:
+            # The NumPy-backed scorer is only loaded once a plugboard is scored
+            from scoring import get_scorer
+            scorer = get_scorer(4)
+        self.scorer = scorer
+        self.crib_codes = [ord(char) - ord('A') for char in crib.upper()] if crib else []
+        self.plug = list(plug)
+
+        n = self.scorer.n
+        self.weights = [26 ** (n - 1 - k) for k in range(n)]
+        self.by_cipher = [[] for _ in range(26)]
+        for position, code in enumerate(self.cipher_codes):
+            self.by_cipher[code].append(position)
+
+        self.middle = [perm[self.plug[code]] for perm, code in zip(sequence, self.cipher_codes)]
+        self.plain = [self.plug[code] for code in self.middle]
+        self.by_middle = [set() for _ in range(26)]
+        for position, code in enumerate(self.middle):
+            self.by_middle[code].add(position)
+
+        self.counts = [0] * 26
+        for code in self.plain:
+            self.counts[code] += 1
+        self.window_index = [
+            sum(self.plain[start + k] * self.weights[k] for k in range(n))
+            for start in range(len(self.plain) - n + 1)
+        ]
+        self.score = sum(self.scorer._lookup[index] for index in self.window_index)
+        self.crib_hits = {start for start in range(len(self.plain) - len(self.crib_codes) + 1)
+                          if self.crib_codes and self._crib_at(start, {})}
+        self.ic = self._ic(self.counts)
+
+    def _ic(self, counts):
+        length = len(self.plain)
+        if length < 2:
+            return 0
+        return sum(count * (count - 1) for count in counts) / (length * (length - 1))
+
+    def _crib_at(self, start, changes):
+        plain = self.plain
+        for k, code in enumerate(self.crib_codes):
+            position = start + k
+            letter = changes[position][1] if position in changes else plain[position]
+            if letter != code:
+                return False
+        return True
+
+    def affected_positions(self, plug):
+        """Positions whose scrambler input or output letter has a different plug under plug"""
+        positions = set()
+        for letter in range(26):
+            if plug[letter] != self.plug[letter]:
+                positions.update(self.by_cipher[letter])
+                positions.update(self.by_middle[letter])
+        return positions
+
+    def evaluate(self, plug):
+        """Score plug relative to the current board without adopting it"""
+        changes = {}
+        for position in self.affected_positions(plug):
+            middle = self.sequence[position][plug[self.cipher_codes[position]]]
+            changes[position] = (middle, plug[middle])
+
+        n = len(self.weights)
+        last_window = len(self.plain) - n
+        windows = {}
+        counts = list(self.counts)
+        crib_starts = set()
+        for position, (_, letter) in changes.items():
+            diff = letter - self.plain[position]
+            if not diff:
+                continue
+            counts[self.plain[position]] -= 1
+            counts[letter] += 1
+            for k in range(n):
+                start = position - k
+                if 0 <= start <= last_window:
+                    windows[start] = windows.get(start, self.window_index[start]) + diff * self.weights[k]
+            if self.crib_codes:
+                crib_starts.update(range(max(0, position - len(self.crib_codes) + 1), position + 1))
+
+        table = self.scorer._lookup
+        score = self.score + sum(table[index] - table[self.window_index[start]] for start, index in windows.items())
+
+        crib_hits = self.crib_hits
+        if crib_starts:
+            last_crib = len(self.plain) - len(self.crib_codes)
+            crib_hits = (crib_hits - crib_starts) | {
+                start for start in crib_starts if start <= last_crib and self._crib_at(start, changes)
+            }
+        return PlugboardEvaluation(list(plug), score, self._ic(counts), crib_hits, changes, windows)
+
+    def apply(self, evaluation):
+        """Adopt an evaluated plugboard"""
+        for position, (middle, letter) in evaluation.changes.items():
+            self.by_middle[self.middle[position]].discard(position)
+            self.by_middle[middle].add(position)
+            self.middle[position] = middle
+            self.counts[self.plain[position]] -= 1
+            self.counts[letter] += 1
+            self.plain[position] = letter
+        for start, index in evaluation.windows.items():
+            self.window_index[start] = index
+        self.plug = evaluation.plug
+        self.score = evaluation.score
+        self.ic = evaluation.ic
+        self.crib_hits = evaluation.crib_hits
+
+    def plaintext(self):
+        return ''.join(ascii_uppercase[code] for code in self.plain)
+
+
+def solve_plugboard(cipher, rotors, reflector, positions='AAA', rings=(1, 1, 1), known_pairs=None,
+                    start_pairs=None, max_leads=10, restarts=5, iterations=20, temperature=0.0,
+                    cooling=0.9, scorer=None, seed=None):
+    """
+    Hill-climb (or anneal, with temperature > 0) over lead changes to find the plugboard.
+    known_pairs are kept fixed; start_pairs seed the first climb and may be changed.
+    Each restart runs at most `iterations` passes over every pair of free letters.
+    """
+    if scorer is None:
+        from scoring import get_scorer
+        scorer = get_scorer(4)
+    rng = random.Random(seed)
+    cipher_codes = [ord(char) - ord('A') for char in cipher.upper() if char in ascii_uppercase]
+    sequence = scrambler_sequence(rotors, reflector, positions, rings, len(cipher_codes))
+
+    known_plug = _pairs_to_plug(known_pairs)
+    fixed = {letter for letter, partner in enumerate(known_plug) if letter != partner}
+    free = [letter for letter in range(26) if letter not in fixed]
+    letter_pairs = [(a, b) for idx, a in enumerate(free) for b in free[idx + 1:]]
+
+    # Index of coincidence finds the first leads from an empty board, n-grams finish the job
+    stages = [
+        (lambda evaluation: 1000 * evaluation.ic),
+        (lambda evaluation: evaluation.score),
+    ]
+    evaluations = 0
+
+    def climb(engine, fitness):
+        nonlocal evaluations
+        score = fitness(engine)
+        heat = temperature
+        for _ in range(iterations):
+            improved = False
+            rng.shuffle(letter_pairs)
+            for a, b in letter_pairs:
+                for candidate in _neighbours(engine.plug, a, b, max_leads):
+                    evaluation = engine.evaluate(candidate)
+                    evaluations += 1
+                    delta = fitness(evaluation) - score
+                    if delta > 0 or (heat > 0 and rng.random() < exp(delta / heat)):
+                        engine.apply(evaluation)
+                        score += delta
+                        improved = improved or delta > 0
+                        break
+            heat *= cooling
+            if not improved and heat < 1e-3:
+                break
+
+    start_plug = _pairs_to_plug((known_pairs or []) + (start_pairs or []))
+    best = None
+    for _ in range(restarts):
+        engine = IncrementalPlugboard(sequence, cipher_codes, start_plug, scorer)
+        for fitness in stages:
+            climb(engine, fitness)
+        if best is None or engine.score > best.score:
+            best = engine
+
+    return {
+        'plaintext': best.plaintext(),
+        'pairs': _plug_to_pairs(best.plug),
+        'score': best.score,
+        'evaluations': evaluations,
+        'rotors': rotors,
+        'reflector': reflector,
+        'positions': positions,
+        'rings': rings
+    }
@@ -0,0 +1,141 @@
+"""
+Search progress - searches publish how far they have got, and sinks receive rate-limited events
+
+A search makes a Progress and calls update() with its running count. Most calls only compare two
+integers; the clock is read a few times per interval and an event is built at most once per
+interval, so publishing from a tight loop costs next to nothing. Events are dicts:
+
+    {"event": "progress" | "finish", "search": name, "done": n, "total": n or None,
+     "elapsed": seconds, "rate": per second, "eta": seconds or None, "time": unix time, ...}
+
+A sink is any callable taking an event: TerminalBar draws a progress line, JsonLines writes one
+JSON object per line for dashboards, and a plain function works as a callback. Pooled searches
+publish from the parent process as chunks complete, so they produce the same events.
+"""
+import json
+import sys
+import time
+
+# Sinks used by a Progress made without any; None means a TerminalBar on stdout
+_default_sinks = None
+
+
+def configure(*sinks):
+    """Send every search's progress to sinks, e.g. configure(JsonLines('progress.jsonl')); no sinks restores the default"""
+    global _default_sinks
+    _default_sinks = list(sinks) or None
+
+
+class Progress:
+    """
+    Progress of one search over `total` candidates (None if unknown). A search resumed partway
+    through passes the count it starts from as start, so that the rate covers only this run.
+    """
+
+    # Reads of the clock per interval, once the rate is known
+    CHECKS_PER_INTERVAL = 8
+
+    def __init__(self, search, total=None, sinks=None, interval=0.5, start=0):
+        self.search = search
+        self.total = total
+        self.start = start
+        self.sinks = list(sinks) if sinks is not None else (_default_sinks or [TerminalBar()])
+        self.interval = interval
+        self.done = start
+        self.started = time.monotonic()
+        self._next_emit = self.started + interval
+        # update() does nothing until the count reaches this
+        self._check_at = start + 1
+
+    def update(self, done):
+        """Record that done candidates have been tried"""
+        if done >= self._check_at:
+            self._check(done)
+
+    def _check(self, done):
+        self.done = done
+        now = time.monotonic()
+        elapsed = now - self.started
+        # Aim for a few clock reads per interval at the current rate, at most doubling the count
+        # between reads so that a burst of fast early candidates cannot put the next one far off
+        tried = done - self.start
+        rate = tried / elapsed if elapsed > 0 else 0.0
+        self._check_at = done + max(1, min(tried, int(rate * self.interval / self.CHECKS_PER_INTERVAL)))
+        if now >= self._next_emit:
+            self._next_emit = now + self.interval
+            self._emit('progress', done, elapsed)
+
+    def _emit(self, kind, done, elapsed, **fields):
+        rate = (done - self.start) / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - done if self.total is not None else None
+        event = {
+            'event': kind,
+            'search': self.search,
+            'done': done,
+            'total': self.total,
+            'elapsed': elapsed,
+            'rate': rate,
+            'eta': remaining / rate if remaining is not None and rate > 0 else None,
+            'time': time.time()
+        }
+        event.update(fields)
+        for sink in self.sinks:
+            sink(event)
+
+    def finish(self, done=None, **fields):
+        """Publish the final count, which update() may not have recorded; fields (such as found=True) are added to the event"""
+        if done is not None:
+            self.done = done
+        self._emit('finish', self.done, time.monotonic() - self.started, **fields)
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return '?'
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    if seconds >= 60:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds:.1f}s"
+
+
+class TerminalBar:
+    """Redraws one line of a terminal (stdout by default) per event, ending it when the search finishes"""
+
+    def __init__(self, stream=None, width=30):
+        self.stream = stream
+        self.width = width
+
+    def __call__(self, event):
+        # Looked up per event so that a redirected stdout is honoured
+        stream = self.stream or sys.stdout
+        line = f"  {event['search']}: {event['done']:,}"
+        if event['total']:
+            fraction = min(1.0, event['done'] / event['total'])
+            filled = int(fraction * self.width)
+            line = (f"  {event['search']}: [{'#' * filled}{'-' * (self.width - filled)}] {fraction:4.0%} "
+                    f"{event['done']:,}/{event['total']:,}")
+        line += f"  {event['rate']:,.0f}/s"
+        if event['event'] == 'progress':
+            if event['total']:
+                line += f"  ETA {_format_seconds(event['eta'])}"
+            stream.write(line + '\r')
+        else:
+            stream.write(line + f"  in {_format_seconds(event['elapsed'])}\n")
+        stream.flush()
+
+
+class JsonLines:
+    """Writes each event as a line of JSON to a stream or appends it to a file"""
+
+    def __init__(self, target):
+        self.target = target
+
+    def __call__(self, event):
+        line = json.dumps(event) + '\n'
+        if isinstance(self.target, str):
+            with open(self.target, 'a') as handle:
+                handle.write(line)
+        else:
+            self.target.write(line)
+            self.target.flush()
@@ -0,0 +1,104 @@
+"""
+N-gram fitness scoring of candidate plaintexts
+
+The count tables in data/ were taken from the Project Gutenberg text of Newton's Opticks.
+"""
+import os
+from string import ascii_uppercase
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+NGRAM_FILES = {
+    2: 'english_bigrams.txt',
+    3: 'english_trigrams.txt',
+    4: 'english_quadgrams.txt',
+}
+
+
+class NgramScorer:
+    """
+    Log10 probability of a text under an n-gram model. The model is a flat array of 26**n
+    entries indexed by the n-gram's letter codes packed in base 26.
+    """
+
+    def __init__(self, n=4, path=None):
+        self.n = n
+        self.size = 26 ** n
+        self.weights = 26 ** np.arange(n - 1, -1, -1)
+        path = path or os.path.join(DATA_DIR, NGRAM_FILES[n])
+
+        grams = []
+        counts = []
+        with open(path) as handle:
+            for line in handle:
+                gram, count = line.split()
+                grams.append(gram.upper())
+                counts.append(int(count))
+        counts = np.array(counts, dtype=np.float64)
+        total = counts.sum()
+
+        self.floor = np.log10(0.01 / total)
+        self.table = np.full(self.size, self.floor)
+        packed = np.frombuffer(''.join(grams).encode('ascii'), dtype=np.uint8).reshape(-1, n)
+        self.table[(packed.astype(np.int64) - ord('A')) @ self.weights] = np.log10(counts / total)
+        # Plain list copy for scoring short sequences one letter at a time in Python loops
+        self._lookup = self.table.tolist()
+
+    def pack(self, gram):
+        index = 0
+        for char in gram:
+            index = index * 26 + ord(char) - ord('A')
+        return index
+
+    def score_codes(self, codes):
+        """Score a short sequence of letter codes (0-25) without NumPy overhead"""
+        table = self._lookup
+        size = self.size
+        n = self.n
+        index = 0
+        score = 0.0
+        for position, code in enumerate(codes):
+            index = (index * 26 + code) % size
+            if position >= n - 1:
+                score += table[index]
+        return score
+
+    def packed(self, codes):
+        """n-gram indices of a 1-D or N x L code array, shape (..., L - n + 1)"""
+        codes = np.asarray(codes, dtype=np.int64)
+        if codes.shape[-1] < self.n:
+            return np.zeros(codes.shape[:-1] + (0,), dtype=np.int64)
+        return sliding_window_view(codes, self.n, axis=-1) @ self.weights
+
+    def score_array(self, codes):
+        """Score a 1-D code array, or every row of an N x L batch at once"""
+        return self.table[self.packed(codes)].sum(axis=-1)
+
+    def score(self, text):
+        return self.score_codes([ord(char) - ord('A') for char in text.upper() if char in ascii_uppercase])
+
+
+def ic_array(codes):
+    """Index of coincidence of a 1-D code array, or of every row of an N x L batch"""
+    codes = np.asarray(codes, dtype=np.int64)
+    rows = codes.reshape(-1, codes.shape[-1])
+    length = rows.shape[1]
+    if length < 2:
+        return np.zeros(codes.shape[:-1])
+    offsets = 26 * np.arange(len(rows))[:, None]
+    counts = np.bincount((rows + offsets).ravel(), minlength=26 * len(rows)).reshape(len(rows), 26)
+    ic = (counts * (counts - 1)).sum(axis=1) / (length * (length - 1))
+    return ic.reshape(codes.shape[:-1])
+
+
+_SCORERS = {}
+
+
+def get_scorer(n=4):
+    """Shared scorer for the bundled English n-gram table of order n"""
+    if n not in _SCORERS:
+        _SCORERS[n] = NgramScorer(n)
+    return _SCORERS[n]
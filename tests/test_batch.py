@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from enigma import build_enigma, RotorAssembly
+from batch import (KeyBatch, ReflectorBatch, batch_process, codes_to_text, codes_to_texts, crib_matches,
+                   double_swap_wirings, text_to_codes)
+from crack_codes import reflector_swap_candidates, _swap_pairs
+
+def test_batch_matches_machines():
+    positions = ['AAZ', 'QEV', 'ADU', 'ZZZ']
+    pairs = ['HL', 'MO', 'AJ', 'CX', 'BZ', 'SR', 'NI', 'YW', 'DG', 'PK']
+    text = 'HELLOWORLDTHISISALONGERMESSAGETOFORCEDOUBLESTEPPING' * 3
+    keys = KeyBatch.from_settings(['I', 'II', 'III'], 'B', positions, (5, 17, 22), pairs)
+    results = codes_to_texts(batch_process(text, keys))
+    for position, result in zip(positions, results):
+        expected = build_enigma(['I', 'II', 'III'], 'B', position, (5, 17, 22), pairs).process_text(text)
+        assert result == expected, f"Expected {expected}, got {result}"
+    print("Batch matches machines test passed")
+
+def test_batch_mixed_keys():
+    cipher = 'BUPXWJCDPFASXBDHLBBIBSRNWCSZXQOLBNXYAXVHOGCUUIBCVMPUZYUUKHI'
+    pairs = ['PC', 'XZ', 'FM', 'QA', 'ST', 'NB', 'HY', 'OR', 'EV', 'IU']
+    keys = KeyBatch.from_settings(
+        [['IV', 'V', 'BETA', 'I'], ['I', 'II', 'III', 'IV']],
+        ['A', 'C'],
+        ['EZGP', 'QEVZ'],
+        [(18, 24, 3, 5), (7, 11, 15, 19)],
+        [pairs, None]
+    )
+    results = codes_to_texts(batch_process(cipher, keys))
+    assert results[0] == 'CONGRATULATIONSONPRODUCINGYOURWORKINGENIGMAMACHINESIMULATOR'
+    assert results[1] == build_enigma(['I', 'II', 'III', 'IV'], 'C', 'QEVZ', (7, 11, 15, 19)).process_text(cipher)
+    print("Batch mixed keys test passed")
+
+def test_crib_matches():
+    plaintexts = text_to_codes('XXSECRETSXXXXX' + 'XXXXXXXXXXXXXX').reshape(2, 14)
+    assert list(crib_matches(plaintexts, 'SECRETS')) == [True, False]
+    print("Crib matches test passed")
+
+def test_vectorized_process_text():
+    text = 'THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG ' * 50
+    machine = build_enigma(['II', 'IV', 'V'], 'B', 'ADU', (3, 9, 17), ['AM', 'FI', 'NV'])
+    vectorized = build_enigma(['II', 'IV', 'V'], 'B', 'ADU', (3, 9, 17), ['AM', 'FI', 'NV'])
+    assert vectorized.process_text(text, vectorized=True) == machine.process_text(text)
+    assert vectorized.process_text('MORE', vectorized=True) == machine.process_text('MORE')
+    print("Vectorized process text test passed")
+
+def test_reflector_batch():
+    wiring = RotorAssembly.REFLECTOR_CONFIGS['C']
+    wirings = double_swap_wirings(wiring)
+    candidates = list(reflector_swap_candidates(['C']))
+    assert len(wirings) == len(candidates)
+    for index in (0, 1, 2, 9, 26, 27, 5000, len(candidates) - 1):
+        _, p1, p2, p3, p4, swap1_type, swap2_type = candidates[index]
+        modified = list(wiring)
+        for first, second in _swap_pairs(p1, p2, swap1_type) + _swap_pairs(p3, p4, swap2_type):
+            modified[ord(first) - ord('A')] = second
+            modified[ord(second) - ord('A')] = first
+        assert codes_to_text(wirings[index]) == ''.join(modified)
+
+    cipher = 'HWREISXLGTTBYVXRCWWJAKZDTVZWKBDJPVQYNEQIOTIFX'
+    settings = (['V', 'II', 'IV'], 'AJL', (6, 18, 7), ['UG', 'IE', 'PO', 'NX', 'WT'])
+    engine = ReflectorBatch(cipher, *settings)
+    plaintexts = engine.decrypt(wirings[:40])
+    for row in range(40):
+        machine = build_enigma(settings[0], 'B', *settings[1:])
+        machine.rotor_assembly.reflector.wiring = codes_to_text(wirings[row])
+        assert codes_to_text(plaintexts[row]) == machine.process_text(cipher)
+
+    crib = codes_to_text(plaintexts[7, 10:16])
+    mask = engine.crib_mask(wirings[:40], crib)
+    assert mask[7] and list(mask) == list(crib_matches(plaintexts, crib))
+    assert engine.crib_mask(wirings[:40], crib, [10])[7]
+    print("Reflector batch test passed")
+
+if __name__ == '__main__':
+    test_batch_matches_machines()
+    test_batch_mixed_keys()
+    test_crib_matches()
+    test_vectorized_process_text()
+    test_reflector_batch()
+    print("\nAll batch engine tests passed!")
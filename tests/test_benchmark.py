@@ -0,0 +1,55 @@
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import benchmark
+
+def test_run_results():
+    results = benchmark.run(['plugboard.encode', 'process_text.10'], repeat=2, min_time=0.001)
+    assert set(results['results']) == {'plugboard.encode', 'process_text.10'}
+    for result in results['results'].values():
+        assert 0 < result['best'] <= result['median'] and result['repeat'] == 2
+    # Results are plain JSON
+    assert json.loads(json.dumps(results)) == results
+    assert set(benchmark.BENCHMARKS) >= {'pluglead.encode', 'rotor.encode_backward', 'build_enigma',
+                                         'rotor_assembly.pass_through', 'process_text.10000'}
+    print("Benchmark run test passed")
+
+def test_compare_threshold():
+    def document(**best):
+        return {'version': benchmark.VERSION,
+                'results': {name: {'best': value, 'median': value} for name, value in best.items()}}
+
+    baseline = document(fast=1.0, slow=1.0, dropped=1.0)
+    rows = benchmark.compare(document(fast=1.1, slow=1.5, new=1.0), baseline, threshold=0.25)
+    assert [(name, regressed) for name, _, _, _, regressed in rows] == [('fast', False), ('slow', True)]
+    assert not any(row[4] for row in benchmark.compare(document(slow=1.5), baseline, threshold=0.6))
+
+    try:
+        benchmark.compare(document(fast=1.0), {'version': 0, 'results': {}})
+        assert False, "Should refuse a baseline of another version"
+    except ValueError:
+        pass
+    print("Benchmark comparison test passed")
+
+def test_main_exit_status():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'baseline.json')
+        with open(path, 'w') as handle:
+            json.dump({'version': benchmark.VERSION, 'results': {'pluglead.encode': {'best': 1e-12}}}, handle)
+        original = benchmark.BENCHMARKS
+        benchmark.BENCHMARKS = {'pluglead.encode': original['pluglead.encode']}
+        try:
+            assert benchmark.main(['--compare', path, '--repeat', '1']) == 1
+            assert benchmark.main(['--compare', path, '--repeat', '1', '--threshold', '1e15']) == 0
+            assert benchmark.main(['--unknown']) == 2
+        finally:
+            benchmark.BENCHMARKS = original
+    print("Benchmark exit status test passed")
+
+if __name__ == '__main__':
+    test_run_results()
+    test_compare_threshold()
+    test_main_exit_status()
+    print("\nAll benchmark tests passed!")
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from enigma import build_enigma
+from bombe import Menu, Bombe
+
+PAIRS = ['AQ', 'BW', 'CE', 'DR', 'FT', 'GY', 'HU', 'IJ', 'KL', 'MN']
+PLAIN = 'WEATHERFORECASTFORTHENORTHSEAREGIONTODAYISCLEARSKIES'
+
+def test_menu_loops():
+    menu = Menu('BCAD', 'ABCE')
+    # A-B, B-C and C-A close one loop, E-D hangs off on its own
+    assert menu.loops == 1
+    assert len(menu.edges) == 4
+    print("Menu loops test passed")
+
+def test_menu_rejects_self_encryption():
+    try:
+        Menu('ABC', 'XBZ')
+        assert False, "Should reject a crib letter over the same cipher letter"
+    except ValueError:
+        pass
+    print("Menu self encryption test passed")
+
+def test_bombe_finds_key_and_plugboard():
+    cipher = build_enigma(['II', 'V', 'III'], 'B', 'KDO', (1, 1, 1), PAIRS).process_text(PLAIN)
+    menu = Menu(cipher, PLAIN[:29])
+    stops = list(Bombe(menu, [['II', 'V', 'III']], ['B']).run())
+    found = [stop for stop in stops if stop['positions'] == 'KDO']
+    assert len(found) == 1, f"Expected a stop at KDO, got {stops}"
+    assert found[0]['pairs'] == PAIRS
+    print("Bombe test passed")
+
+if __name__ == '__main__':
+    test_menu_loops()
+    test_menu_rejects_self_encryption()
+    test_bombe_finds_key_and_plugboard()
+    print("\nAll bombe tests passed!")
@@ -0,0 +1,109 @@
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import crack_codes
+from checkpoint import Checkpoint
+from bombe import bombe_search
+from enigma import build_enigma
+
+CODE_5 = dict(
+    cipher='HWREISXLGTTBYVXRCWWJAKZDTVZWKBDJPVQYNEQIOTIFX',
+    crib='INSTAGRAM',
+    rotors=['V', 'II', 'IV'],
+    positions='AJL',
+    rings=(6, 18, 7),
+    pairs=['UG', 'IE', 'PO', 'NX', 'WT']
+)
+
+def modified_reflector_search():
+    return {
+        'search': 'modified_reflectors', 'cipher': CODE_5['cipher'], 'crib': CODE_5['crib'],
+        'rotors': CODE_5['rotors'], 'positions': CODE_5['positions'], 'rings': CODE_5['rings'],
+        'pairs': CODE_5['pairs'], 'crib_offsets': None
+    }
+
+def test_save_load_and_interval():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'search.json')
+        checkpoint = Checkpoint(path, {'search': 'demo'}, interval=3600)
+        checkpoint.update(10, {'score': 1.5})
+        assert checkpoint.saves == 0 and not os.path.exists(path)
+        checkpoint.save()
+
+        resumed = Checkpoint(path, {'search': 'demo'})
+        assert resumed.load()
+        assert resumed.cursor == 10 and resumed.candidates == [{'score': 1.5}] and not resumed.done
+
+        try:
+            Checkpoint(path, {'search': 'other'}).load()
+            assert False, "Should refuse another search's checkpoint"
+        except ValueError:
+            pass
+    print("Checkpoint save/load test passed")
+
+def test_modified_reflectors_resume():
+    with tempfile.TemporaryDirectory() as directory:
+        # Interrupted partway through reflector B, before the hit at 19,890
+        path = os.path.join(directory, 'code5.json')
+        checkpoint = Checkpoint(path, modified_reflector_search())
+        checkpoint.update(19800)
+        checkpoint.save()
+        result = crack_codes.test_modified_reflectors(**CODE_5, checkpoint=path)
+        assert result['plaintext'] == 'YOUCANFOLLOWMYDOGONINSTAGRAMATTALESOFHOFFMANN'
+        assert Checkpoint(path, modified_reflector_search()).load()
+
+        # With a cursor past the first hit, the search goes on to another description of the same swaps
+        path = os.path.join(directory, 'past.json')
+        checkpoint = Checkpoint(path, modified_reflector_search())
+        checkpoint.update(19891)
+        checkpoint.save()
+        later = crack_codes.test_modified_reflectors(**CODE_5, checkpoint=path)
+        assert later['plaintext'] == result['plaintext']
+        assert later['swap2_modified'] != result['swap2_modified']
+    print("Modified reflector resume test passed")
+
+def test_rotor_search_resume():
+    cipher = build_enigma(['IV', 'II', 'I'], 'B', 'DOG', (4, 2, 6), ['AB', 'CD']).process_text(
+        'RESUMINGMUSTFINDTHESAMEKEYASASINGLERUN')
+    args = (cipher, 'SINGLERUN', 'DOG', ['AB', 'CD'], ['i', 'ii', 'iv'], [2, 4, 6])
+    expected = crack_codes.test_rotor_ring_reflector(*args, processes=1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rotors.json')
+        result = crack_codes.test_rotor_ring_reflector(*args, processes=1, checkpoint=path)
+        assert result == expected
+
+        resumed = crack_codes.test_rotor_ring_reflector(*args, processes=1, checkpoint=path)
+        assert resumed['rings'] == list(expected['rings'])
+        assert resumed['plaintext'] == expected['plaintext']
+    print("Rotor search resume test passed")
+
+def test_bombe_resume():
+    pairs = ['AQ', 'BW', 'CE', 'DR', 'FT', 'GY', 'HU', 'IJ', 'KL', 'MN']
+    plain = 'WEATHERFORECASTFORTHENORTHSEAREGIONTODAYISCLEARSKIES'
+    cipher = build_enigma(['II', 'V', 'III'], 'B', 'KDO', (1, 1, 1), pairs).process_text(plain)
+    orders = [['V', 'II', 'III'], ['II', 'V', 'III']]
+    expected = bombe_search(cipher, plain[:29], 0, orders, ['B'])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bombe.json')
+        search = {
+            'search': 'bombe', 'cipher': cipher, 'crib': plain[:29], 'offset': 0, 'rotor_orders': orders,
+            'reflectors': ['B'], 'rings': (1, 1, 1)
+        }
+        # Interrupted after the first rotor order, whose stops were already recorded
+        checkpoint = Checkpoint(path, search)
+        checkpoint.candidates = [stop for stop in expected if stop['rotors'] == orders[0]]
+        checkpoint.update(1)
+        checkpoint.save()
+        stops = bombe_search(cipher, plain[:29], 0, orders, ['B'], checkpoint=path)
+        assert [(stop['rotors'], stop['positions'], stop['pairs']) for stop in stops] == \
+            [(stop['rotors'], stop['positions'], stop['pairs']) for stop in expected]
+        assert any(stop['positions'] == 'KDO' for stop in stops)
+    print("Bombe resume test passed")
+
+if __name__ == '__main__':
+    test_save_load_and_interval()
+    test_modified_reflectors_resume()
+    test_rotor_search_resume()
+    test_bombe_resume()
+    print("\nAll checkpoint tests passed!")
@@ -0,0 +1,125 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import random
+import subprocess
+from enigma import build_enigma, rotor_tables, validate_settings, CompiledEnigma, Rotor, RotorAssembly
+
+def test_rotor_tables_match_rotor():
+    wiring = 'EKMFLGDQVZNTOWYHXUSPAIBRCJ'
+    forward, backward = rotor_tables(wiring, 5)
+    rotor = Rotor(wiring, 'A', 5, 'Q')
+    for offset in range(26):
+        for code in range(26):
+            letter = chr(code + ord('A'))
+            assert chr(forward[offset][code] + ord('A')) == rotor.encode_forward(letter)
+            assert chr(backward[offset][code] + ord('A')) == rotor.encode_backward(letter)
+        rotor.rotate()
+    print("Rotor tables test passed")
+
+def test_compiled_long_message():
+    pairs = ['PC', 'XZ', 'FM', 'QA', 'ST', 'NB', 'HY', 'OR', 'EV', 'IU']
+    machine = build_enigma(['IV', 'V', 'BETA', 'I'], 'A', 'EZGP', (18, 24, 3, 5), pairs).compile()
+    cipher = 'BUPXWJCDPFASXBDHLBBIBSRNWCSZXQOLBNXYAXVHOGCUUIBCVMPUZYUUKHI'
+    result = machine.process_text(cipher)
+    expected = 'CONGRATULATIONSONPRODUCINGYOURWORKINGENIGMAMACHINESIMULATOR'
+    assert result == expected, f"Expected {expected}, got {result}"
+    print("Compiled long message test passed")
+
+def test_compiled_matches_machine():
+    text = 'THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG ' * 40
+    machine = build_enigma(['II', 'IV', 'V'], 'B', 'ADU', (3, 9, 17), ['AM', 'FI', 'NV'])
+    compiled = machine.compile()
+    assert compiled.process_text(text) == machine.process_text(text)
+    assert compiled.positions() == ''.join(rotor.position() for rotor in reversed(machine.rotor_assembly.rotors))
+    print("Compiled matches machine test passed")
+
+def test_compiled_press_key():
+    machine = build_enigma(['I', 'II', 'III'], 'B', 'AAZ').compile()
+    assert machine.press_key('a') == 'U'
+    print("Compiled press key test passed")
+
+def test_scrambler_sequence():
+    text = 'THESCRAMBLERDOESNOTDEPENDONTHEPLUGBOARD' * 20
+    pairs = ['PC', 'XZ', 'FM', 'QA', 'ST', 'NB', 'HY', 'OR', 'EV', 'IU']
+    assembly = RotorAssembly(['BETA', 'IV', 'III', 'II'], 'C', 'QEVZ', (3, 5, 17, 26))
+    sequence = assembly.scrambler_sequence(len(text))
+    assert len(sequence) == len(text)
+    assert [rotor.position() for rotor in assembly.rotors] == ['Z', 'V', 'E', 'Q']
+    for plug_pairs in (None, pairs):
+        expected = build_enigma(['BETA', 'IV', 'III', 'II'], 'C', 'QEVZ', (3, 5, 17, 26), plug_pairs).process_text(text)
+        assert sequence.process_text(text, plug_pairs) == expected
+    print("Scrambler sequence test passed")
+
+def test_reset_matches_fresh_machine():
+    rng = random.Random(7)
+    text = 'RESETTINGMUSTMATCHAFRESHLYBUILTMACHINE' * 3
+    machine = CompiledEnigma.from_settings(['I', 'II', 'III'], 'B', 'AAA', (1, 1, 1), ['AB'])
+    for _ in range(50):
+        rotors = rng.sample(['I', 'II', 'III', 'IV', 'V', 'BETA', 'GAMMA'], 3)
+        reflector = rng.choice(['A', 'B', 'C'])
+        positions = ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(3))
+        rings = tuple(rng.randint(1, 26) for _ in range(3))
+        pairs = rng.choice([None, ['AB'], ['QW', 'ER', 'TY']])
+        expected = build_enigma(rotors, reflector, positions, rings, pairs).process_text(text)
+        machine.reset(positions, rings, pairs or [], reflector, rotors)
+        assert machine.process_text(text) == expected
+        # Without new settings, reset rewinds to the same start
+        assert machine.reset().process_text(text) == expected
+    print("Compiled reset test passed")
+
+def test_validate_settings():
+    validate_settings(['I', 'beta'], ['B', 'YRUHQSLDPXNGOKMIEBFZCWVJAT'], 'AZ', [1, 26], [['AB', 'CD'], None])
+    for bad in ({'rotors': ['IX']}, {'reflectors': ['D']}, {'reflectors': ['ABCDEFGHIJKLMNOPQRSTUVWXYZ']},
+                {'positions': '1'}, {'rings': [27]}, {'plugboards': [['AB', 'BC']]}):
+        try:
+            validate_settings(**bad)
+            assert False, f"Should reject {bad}"
+        except ValueError:
+            pass
+    print("Settings validation test passed")
+
+def test_reset_rejects_bad_keys():
+    machine = CompiledEnigma.from_settings(['I', 'II', 'III'], 'B', 'QEV', (1, 2, 3), ['AB'])
+    expected = machine.process_text('UNCHANGED')
+    for bad in ({'positions': 'AB'}, {'positions': 'A1C'}, {'rings': (1, 2)}, {'rings': (1, 27, 3)},
+                {'rotors': ['I', 'II']}, {'rotors': ['I', 'II', 'IX']}, {'reflector': 'D'},
+                {'reflector': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'}, {'plugs': ['AB', 'BC']},
+                {'positions': 'AAA', 'rings': (0, 1, 1)}):
+        try:
+            machine.reset(**bad)
+            assert False, f"Should reject {bad}"
+        except ValueError:
+            pass
+        # A rejected key changes nothing
+        assert machine.reset().process_text('UNCHANGED') == expected
+    print("Reset validation test passed")
+
+def test_drivers_without_numpy():
+    """The searches that only use CompiledEnigma run where NumPy is not installed"""
+    script = (
+        "import sys\n"
+        "sys.modules['numpy'] = None\n"
+        "import crack_codes, advanced_crack_codes\n"
+        "from enigma import build_enigma\n"
+        "cipher = build_enigma(['I', 'II', 'III'], 'C', 'ABC').process_text('NONUMPYNEEDED')\n"
+        "result = crack_codes.test_reflectors(cipher, 'NUMPY', ['I', 'II', 'III'], 'ABC', (1, 1, 1), [])\n"
+        "assert result['reflector'] == 'C'\n"
+        "assert 'numpy' not in sys.modules or sys.modules['numpy'] is None\n"
+    )
+    root = os.path.join(os.path.dirname(__file__), '..')
+    completed = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True)
+    assert completed.returncode == 0, completed.stderr
+    print("Drivers without NumPy test passed")
+
+if __name__ == '__main__':
+    test_rotor_tables_match_rotor()
+    test_compiled_long_message()
+    test_compiled_matches_machine()
+    test_compiled_press_key()
+    test_scrambler_sequence()
+    test_reset_matches_fresh_machine()
+    test_validate_settings()
+    test_reset_rejects_bad_keys()
+    test_drivers_without_numpy()
+    print("\nAll compiled Enigma tests passed!")
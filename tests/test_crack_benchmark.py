@@ -0,0 +1,62 @@
+import sys
+import os
+import random
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import crack_benchmark
+from enigma import CompiledEnigma
+from keyspace import Keyspace
+
+def test_workloads_decrypt():
+    rng = random.Random(7)
+    for level in crack_benchmark.LEVELS:
+        workload = crack_benchmark.make_workload(level, rng, length=50)
+        key = workload.key
+        assert len(workload.cipher) == len(workload.plaintext) == 50
+        assert workload.crib in workload.plaintext and len(workload.crib) >= crack_benchmark.CRIB_LENGTH
+        machine = CompiledEnigma.from_settings(key['rotors'], key['reflector'], key['positions'], key['rings'],
+                                               key['pairs'])
+        if level == 'reflector_swap':
+            machine.reset(reflector=key['wiring'])
+        assert machine.process_text(workload.cipher) == workload.plaintext
+        if level == 'plugs':
+            assert [pair[0] for pair in key['pairs'][:2]] == ['A', 'I']
+        if level == 'rotors':
+            assert set(key['rotors']) <= set(key['rotor_choices']) and set(key['rings']) <= set(key['ring_choices'])
+    print("Workload generation test passed")
+
+def test_run_report():
+    report = crack_benchmark.run(['reflector', 'rotors'], trials=2, length=40, seed=3, ring_choices=3)
+    assert set(report['results']) == {
+        'reflector/crack_codes.test_reflectors',
+        'rotors/crack_codes.test_rotor_ring_reflector',
+        'rotors/advanced_crack_codes.optimized_rotor_ring_search',
+    }
+    for result in report['results'].values():
+        assert result['trials'] == 2 and result['success_rate'] == 1.0
+        assert result['candidates'] > 0 and result['candidates_per_second'] > 0
+        assert result['median_time_to_solution'] is not None
+    print("Cracking benchmark report test passed")
+
+def test_attempt_ranks():
+    assert crack_benchmark._positions_attempts('AAA') == 1
+    assert crack_benchmark._positions_attempts('ABC') == 26 + 2 + 1
+    assert crack_benchmark._swap_attempts(None) == 3 * 19305
+    print("Attempt rank test passed")
+
+def test_unsolved_attempts():
+    """A search that finds nothing is charged the whole keyspace it searched, at the fixed positions"""
+    found = crack_benchmark.make_workload('rotors', random.Random(5), length=40, ring_choices=2)
+    key = found.key
+    workload = crack_benchmark.Workload('rotors', found.plaintext, 'QQQQQQQQQQ', key, found.cipher)
+    size = len(Keyspace(key['rotor_choices'], ['A', 'B', 'C'], ring_choices=key['ring_choices'], positions=key['positions']))
+    assert size == 24 * 3 * len(key['ring_choices']) ** 3
+    assert crack_benchmark._rotor_ring_reflector(workload) == (None, size)
+    assert crack_benchmark._optimized_rotor_ring(workload) == (None, size)
+    print("Unsolved attempts test passed")
+
+if __name__ == '__main__':
+    test_workloads_decrypt()
+    test_run_report()
+    test_attempt_ranks()
+    test_unsolved_attempts()
+    print("\nAll cracking benchmark tests passed!")
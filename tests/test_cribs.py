@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from enigma import build_enigma, CompiledEnigma
+from cribs import CribWindow, legal_crib_offsets, analyze_crib_placement
+
+CIPHER = 'BUPXWJCDPFASXBDHLBBIBSRNWCSZXQOLBNXYAXVHOGCUUIBCVMPUZYUUKHI'
+PAIRS = ['PC', 'XZ', 'FM', 'QA', 'ST', 'NB', 'HY', 'OR', 'EV', 'IU']
+
+def test_window_at_known_offset():
+    machine = build_enigma(['IV', 'V', 'BETA', 'I'], 'A', 'EZGP', (18, 24, 3, 5), PAIRS).compile()
+    assert CribWindow(CIPHER, 'ENIGMA', [37]).match(machine) == 37
+    assert CribWindow(CIPHER, 'ENIGMA', [36, 38]).match(machine) is None
+    print("Window at known offset test passed")
+
+def test_window_scans_all_offsets():
+    machine = build_enigma(['IV', 'V', 'BETA', 'I'], 'A', 'EZGP', (18, 24, 3, 5), PAIRS).compile()
+    assert CribWindow(CIPHER, 'SIMULATOR').match(machine) == 50
+    assert machine.process_text(CIPHER) == 'CONGRATULATIONSONPRODUCINGYOURWORKINGENIGMAMACHINESIMULATOR'
+    print("Window scan test passed")
+
+def test_window_past_end():
+    machine = build_enigma(['I', 'II', 'III'], 'B', 'AAA').compile()
+    assert CribWindow('ABC', 'ABCD').match(machine) is None
+    assert CribWindow('ABCDEF', 'XY', [5]).match(machine) is None
+    print("Window past end test passed")
+
+def test_legal_offsets():
+    # Offset 0 lines up A with A, offset 1 lines up B with B
+    assert legal_crib_offsets('AXBYZ', 'AB') == [2, 3]
+    assert legal_crib_offsets('AB', 'ABC') == []
+    print("Legal offsets test passed")
+
+def test_legal_offsets_keep_true_placement():
+    placement = analyze_crib_placement(CIPHER, 'ENIGMA')
+    assert 37 in placement['offsets']
+    assert placement['total'] == len(CIPHER) - 5
+    assert placement['pruned'] == placement['total'] - placement['legal']
+    machine = build_enigma(['IV', 'V', 'BETA', 'I'], 'A', 'EZGP', (18, 24, 3, 5), PAIRS).compile()
+    assert CribWindow.legal(CIPHER, 'ENIGMA').match(machine) == 37
+    print("Legal offsets keep true placement test passed")
+
+class CountingEnigma(CompiledEnigma):
+    """Counts the letters encrypted through each of the two crib window paths"""
+
+    def __init__(self, machine):
+        super().__init__(machine)
+        self.window_calls = 0
+        self.span_letters = 0
+
+    def matches_window(self, cipher_codes, plain_codes, offset):
+        self.window_calls += 1
+        return super().matches_window(cipher_codes, plain_codes, offset)
+
+    def process_codes(self, codes):
+        codes = list(codes)
+        self.span_letters += len(codes)
+        return super().process_codes(codes)
+
+def test_window_pays_off():
+    """On the code 3 message the window encrypts fewer letters than decrypting in full"""
+    cipher = 'ABSKJAKKMRITTNYURBJFWQGRSGNNYJSDRYLAPQWIAGKJYEPCTAGDCTHLCDRZRFZHKNRSDLNPFPEBVESHPY'
+    window = CribWindow.legal(cipher, 'THOUSANDS')
+    machine = CountingEnigma(build_enigma(['II', 'IV', 'BETA'], 'B', 'EMY', (2, 4, 6), ['FH', 'TS', 'BE', 'UQ']))
+
+    # Many offsets are covered by one pass through their span; a few are each checked on their own
+    assert window.match(machine) is None
+    assert machine.window_calls == 0 and machine.span_letters == window.offsets[-1] + 9 - window.offsets[0]
+    assert CribWindow(cipher, 'THOUSANDS', [3, 60]).match(machine) is None
+    assert machine.window_calls == 2
+    print("Window pays off test passed")
+
+if __name__ == '__main__':
+    test_window_at_known_offset()
+    test_window_scans_all_offsets()
+    test_window_past_end()
+    test_legal_offsets()
+    test_legal_offsets_keep_true_placement()
+    test_window_pays_off()
+    print("\nAll crib tests passed!")
@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import json
+import socket
+import time
+from multiprocessing import get_context
+from distributed import Coordinator, load_job, request, run_worker, _mac
+
+SECRET = 'test-secret'
+
+JOB = {
+    'factory': 'crack_codes:modified_reflector_job',
+    'kwargs': {
+        'cipher': 'HWREISXLGTTBYVXRCWWJAKZDTVZWKBDJPVQYNEQIOTIFX',
+        'crib': 'INSTAGRAM',
+        'rotors': ['V', 'II', 'IV'],
+        'positions': 'AJL',
+        'rings': [6, 18, 7],
+        'pairs': ['UG', 'IE', 'PO', 'NX', 'WT'],
+        'base_reflectors': ['A', 'B']
+    }
+}
+
+def test_workers_on_localhost_with_dead_lease():
+    candidates, _ = load_job(JOB)
+    coordinator = Coordinator(JOB, len(candidates), SECRET, range_size=2000, lease_timeout=1.0)
+    address = coordinator.start()
+
+    # A node that takes the first range and dies without reporting back
+    lost = request(address, {'op': 'lease', 'worker': 'dead-node'}, SECRET)
+    assert (lost['start'], lost['end']) == (0, 2000)
+
+    # Spawned rather than forked, so the workers do not inherit the coordinator's listening socket
+    context = get_context('spawn')
+    workers = [context.Process(target=run_worker, args=(address, SECRET, f'node-{idx}')) for idx in range(3)]
+    for worker in workers:
+        worker.start()
+    hits = coordinator.wait(timeout=60)
+    for worker in workers:
+        worker.join(timeout=10)
+
+    assert coordinator.reassigned >= 1
+    assert 0 in coordinator.completed
+    assert len(hits) == 1
+    index, result = hits[0]
+    assert index == 19305 + 585
+    assert result['plaintext'] == 'YOUCANFOLLOWMYDOGONINSTAGRAMATTALESOFHOFFMANN'
+    assert result['base_reflector'] == 'B'
+    print("Distributed search test passed")
+
+def test_lease_protocol():
+    coordinator = Coordinator(JOB, 25, SECRET, range_size=10, lease_timeout=60)
+    first = coordinator.handle({'op': 'lease', 'worker': 'a'})
+    second = coordinator.handle({'op': 'lease', 'worker': 'b'})
+    assert (first['start'], first['end'], second['start'], second['end']) == (0, 10, 10, 20)
+    assert coordinator.handle({'op': 'renew', 'lease': first['lease']})['ok']
+    assert coordinator.handle({'op': 'complete', 'lease': second['lease'], 'hits': [[12, 'hit']]})['ok']
+    # Ranges after the hit are no longer needed, the one before it still is
+    assert coordinator.handle({'op': 'lease', 'worker': 'b'}) == {'wait': 1.0}
+    assert not coordinator.handle({'op': 'complete', 'lease': 99, 'hits': []})['ok']
+    coordinator.handle({'op': 'complete', 'lease': first['lease'], 'hits': []})
+    assert coordinator.handle({'op': 'lease', 'worker': 'a'}) == {'done': True}
+    print("Lease protocol test passed")
+
+def _send_raw(address, envelope):
+    with socket.create_connection(address, timeout=10) as connection:
+        connection.sendall(json.dumps(envelope).encode() + b'\n')
+        return json.loads(connection.makefile('rb').readline())
+
+def _signed(nonce, message, secret=SECRET, sent=None):
+    body = json.dumps({'sent': time.time() if sent is None else sent, 'message': message})
+    return {'nonce': nonce, 'body': body, 'mac': _mac(secret.encode(), 'request', nonce, body)}
+
+def test_shared_secret():
+    # Nothing would import if a worker ran this job, so reaching the factory shows up as an ImportError
+    job = {'factory': 'no_such_module:factory', 'kwargs': {}}
+    coordinator = Coordinator(job, 10, SECRET)
+    address = coordinator.start()
+    try:
+        # A worker with the wrong secret refuses the job before loading it
+        try:
+            run_worker(address, 'wrong-secret')
+            assert False, "Should refuse a coordinator it cannot authenticate"
+        except PermissionError:
+            pass
+
+        # The coordinator ignores unsigned, forged, stale and replayed requests
+        lease = {'op': 'lease', 'worker': 'node'}
+        assert _send_raw(address, {'op': 'lease'}) == {'error': 'Authentication failed'}
+        forged = _signed('n1', lease, secret='wrong-secret')
+        assert _send_raw(address, forged) == {'error': 'Authentication failed'}
+        stale = _signed('n2', lease, sent=time.time() - 2 * Coordinator.MAX_AGE)
+        assert _send_raw(address, stale) == {'error': 'Authentication failed'}
+        signed = _signed('n3', lease)
+        assert json.loads(_send_raw(address, signed)['body'])['start'] == 0
+        assert _send_raw(address, signed) == {'error': 'Authentication failed'}
+        assert coordinator.workers == {'node'}
+        # Only the signed, fresh nonce is remembered
+        assert coordinator._nonces == {'n3'}
+        assert request(address, {'op': 'job'}, SECRET) == {'job': job}
+    finally:
+        coordinator._finished.set()
+        coordinator.wait()
+    print("Shared secret test passed")
+
+def test_nonces_expire():
+    coordinator = Coordinator(JOB, 10, SECRET)
+    coordinator.MAX_AGE = 0.05
+    assert coordinator.accept_nonce('a', time.time())
+    assert not coordinator.accept_nonce('a', time.time())
+    assert not coordinator.accept_nonce('b', time.time() - 1)
+    time.sleep(0.15)
+    # Once a replay of 'a' would be stale its nonce is forgotten
+    assert coordinator.accept_nonce('c', time.time())
+    assert coordinator._nonces == {'c'}
+    print("Nonce expiry test passed")
+
+if __name__ == '__main__':
+    test_workers_on_localhost_with_dead_lease()
+    test_lease_protocol()
+    test_shared_secret()
+    test_nonces_expire()
+    print("\nAll distributed search tests passed!")
@@ -1,7 +1,7 @@
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from enigma import build_enigma
+from enigma import build_enigma, Enigma, PlugLead, Reflector, RotorAssembly
 
 def test_basic_encoding():
     machine = build_enigma(['I', 'II', 'III'], 'B', 'AAZ')
@@ -53,6 +53,84 @@ def test_reciprocal():
     assert decrypted == 'TESTMESSAGE', f"Expected TESTMESSAGE, got {decrypted}"
     print("Reciprocal test passed")
 
+def test_seek_matches_stepping():
+    for steps in (0, 1, 25, 26, 650, 16900, 12345):
+        stepped = build_enigma(['I', 'II', 'III'], 'B', 'ADU')
+        for _ in range(steps):
+            stepped.rotor_assembly.perform_rotation()
+        jumped = build_enigma(['I', 'II', 'III'], 'B', 'ADU')
+        jumped.seek(steps)
+        expected = [rotor.current_offset for rotor in stepped.rotor_assembly.rotors]
+        result = [rotor.current_offset for rotor in jumped.rotor_assembly.rotors]
+        assert result == expected, f"Expected {expected} after {steps} steps, got {result}"
+    print("Seek test passed")
+
+def test_decrypt_range():
+    pairs = ['PC', 'XZ', 'FM', 'QA', 'ST', 'NB', 'HY', 'OR', 'EV', 'IU']
+    machine = build_enigma(['IV', 'V', 'BETA', 'I'], 'A', 'EZGP', (18, 24, 3, 5), pairs)
+    cipher = 'BUPXWJCDPFASXBDHLBBIBSRNWCSZXQOLBNXYAXVHOGCUUIBCVMPUZYUUKHI'
+    assert machine.decrypt_range(cipher, 17, 28) == 'PRODUCINGYO'
+    assert machine.process_text(cipher) == 'CONGRATULATIONSONPRODUCINGYOURWORKINGENIGMAMACHINESIMULATOR'
+    print("Decrypt range test passed")
+
+def test_static_rotors_fused():
+    text = 'FUSINGTHESTATICROTORSMUSTNOTCHANGETHEOUTPUT'
+    machine = build_enigma(['GAMMA', 'I', 'II', 'III'], 'B', 'AAAA')
+    assert machine.rotor_assembly.fuse_static(len(text)) == 2
+    assert machine.rotor_assembly.fuse_static(600) == 3
+    reference = build_enigma(['GAMMA', 'I', 'II', 'III'], 'B', 'AAAA')
+    expected = ''.join(reference.press_key(char) for char in text)
+    assert machine.process_text(text) == expected
+
+    # Moving a fused rotor by hand drops the fused reflector instead of using a stale one
+    machine = build_enigma(['GAMMA', 'I', 'II', 'III'], 'B', 'AAAA')
+    reference = build_enigma(['GAMMA', 'I', 'II', 'III'], 'B', 'AAAA')
+    machine.rotor_assembly.fuse_static(len(text))
+    machine.rotor_assembly.rotors[2].rotate()
+    reference.rotor_assembly.rotors[2].rotate()
+    assert ''.join(machine.press_key(char) for char in text) == ''.join(reference.press_key(char) for char in text)
+
+    # Fitting another reflector after process_text takes effect on the next keypress
+    machine = build_enigma(['I', 'II', 'III'], 'B', 'AAA')
+    reference = build_enigma(['I', 'II', 'III'], 'B', 'AAA')
+    assert machine.process_text(text) == reference.process_text(text)
+    machine.rotor_assembly.reflector = Reflector(RotorAssembly.REFLECTOR_CONFIGS['C'])
+    reference.rotor_assembly.reflector = Reflector(RotorAssembly.REFLECTOR_CONFIGS['C'])
+    machine.decrypt_range(text, 0)
+    expected = ''.join(reference.rotor_assembly.pass_through(char) for char in 'ENIGMA')
+    assert ''.join(machine.rotor_assembly.pass_through(char) for char in 'ENIGMA') == expected
+    machine.rotor_assembly.reflector.wiring = RotorAssembly.REFLECTOR_CONFIGS['A']
+    reference.rotor_assembly.reflector.wiring = RotorAssembly.REFLECTOR_CONFIGS['A']
+    assert ''.join(machine.press_key(char) for char in text) == ''.join(reference.press_key(char) for char in text)
+
+    # As before fusing, text without letters needs no configured machine
+    assert Enigma().process_text('') == '' and Enigma().process_text('12 34') == ''
+    print("Static rotor fusion test passed")
+
+def test_snapshot_restore():
+    """Branch from a saved state and come back to it"""
+    machine = build_enigma(['I', 'II', 'III'], 'B', 'QEV', (1, 1, 1), ['AB', 'CD'])
+    machine.process_text('HELLO')
+    state = machine.snapshot()
+    expected = machine.process_text('WORLDWIDE')
+
+    machine.restore(state)
+    machine.plugboard.add(PlugLead('EF'))
+    assert machine.process_text('WORLDWIDE') != expected
+    machine.restore(state)
+    assert machine.process_text('WORLDWIDE') == expected
+
+    compiled = build_enigma(['I', 'II', 'III'], 'B', 'QEV', (1, 1, 1), ['AB', 'CD']).compile()
+    compiled.process_text('HELLO')
+    state = compiled.snapshot()
+    compiled.reset(plugs=['AB', 'CD', 'EF'])
+    compiled.restore(state)
+    assert compiled.process_text('WORLDWIDE') == expected
+
+    # Rotors of a type share one copy of their wiring
+    assert machine.rotor_assembly.rotors[0].backward_wiring is build_enigma(['I', 'II', 'III'], 'B').rotor_assembly.rotors[0].backward_wiring
+    print("Snapshot and restore test passed")
+
 if __name__ == '__main__':
     test_basic_encoding()
     test_message_encoding()
@@ -61,4 +139,8 @@ if __name__ == '__main__':
     test_four_rotors()
     test_long_message()
     test_reciprocal()
+    test_seek_matches_stepping()
+    test_decrypt_range()
+    test_static_rotors_fused()
+    test_snapshot_restore()
     print("\nAll Enigma machine tests passed!")
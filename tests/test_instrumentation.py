@@ -0,0 +1,86 @@
+import sys
+import os
+import io
+import pstats
+import tempfile
+import tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import instrumentation
+import crack_codes
+from advanced_crack_codes import intelligent_position_search
+from enigma import CompiledEnigma, Enigma, RotorAssembly, build_enigma
+
+def test_disabled_is_uninstrumented():
+    originals = (Enigma.press_key, RotorAssembly.perform_rotation, CompiledEnigma.reset, crack_codes.test_positions)
+    instrumentation.enable()
+    try:
+        assert instrumentation.is_enabled()
+        assert CompiledEnigma.reset is not originals[2]
+    finally:
+        instrumentation.disable()
+    assert not instrumentation.is_enabled()
+    assert (Enigma.press_key, RotorAssembly.perform_rotation, CompiledEnigma.reset, crack_codes.test_positions) == originals
+
+    instrumentation.reset()
+    build_enigma(['I', 'II', 'III'], 'B').process_text('UNCOUNTED')
+    assert not any(instrumentation.snapshot()['counters'].values())
+    print("Disabled instrumentation test passed")
+
+def test_counts():
+    # Starting at ADU the middle rotor double steps on the third keypress
+    text = 'A' * 30
+    with instrumentation.instrumented():
+        machine = build_enigma(['I', 'II', 'III'], 'B', 'ADU')
+        plain = machine.process_text(text)
+        compiled = build_enigma(['I', 'II', 'III'], 'B', 'ADU').compile()
+        assert compiled.process_text(text) == plain
+        stepped = build_enigma(['I', 'II', 'III'], 'B', 'ADU').compile()
+        assert ''.join(stepped.press_key(char) for char in text) == plain
+    counters = instrumentation.snapshot()['counters']
+    assert counters['constructions'] == 3
+    assert counters['keypresses'] == counters['rotor_steps'] == 90
+    assert counters['double_steps'] == 3
+    print("Counter test passed")
+
+def test_search_metrics():
+    cipher = build_enigma(['I', 'II', 'III'], 'B', 'HAT', (1, 1, 1), ['AB']).process_text('MEETMEATTHEBRIDGE')
+    with instrumentation.instrumented():
+        result = intelligent_position_search(cipher, 'BRIDGE', ['I', 'II', 'III'], 'B', (1, 1, 1), ['AB'],
+                                             crib_offsets=[11])
+    counters = result['metrics'].counters['counters']
+    assert result['positions'] == 'HAT'
+    assert counters['candidates_tested'] == result['metrics'].attempts
+    assert counters['candidates_pruned'] == result['metrics'].attempts - 1
+
+    with instrumentation.instrumented():
+        crack_codes.test_positions(cipher, 'BRIDGE', ['I', 'II', 'III'], 'B', (1, 1, 1), ['AB'], [11])
+    timers = instrumentation.snapshot()['timers']
+    assert timers['crack_codes.test_positions']['calls'] == 1
+    print("Search metrics test passed")
+
+def test_profile_hooks():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'search.prof')
+        output = io.StringIO()
+        with instrumentation.profiled(path, limit=5, stream=output):
+            build_enigma(['I', 'II', 'III'], 'B').process_text('PROFILED' * 20)
+        assert 'press_key' in output.getvalue()
+        assert pstats.Stats(path).total_calls > 0
+
+        path = os.path.join(directory, 'search.trace')
+        output = io.StringIO()
+        with instrumentation.memory_traced(path, limit=3, stream=output) as trace:
+            machines = [build_enigma(['I', 'II', 'III'], 'B') for _ in range(50)]
+        # Still alive when the trace ended, so their memory shows up as growth
+        assert len(machines) == 50
+        assert trace.peak > 0 and trace.growth and 'Peak traced memory' in output.getvalue()
+        assert tracemalloc.Snapshot.load(path).traces
+        assert not tracemalloc.is_tracing()
+    print("Profile hooks test passed")
+
+if __name__ == '__main__':
+    test_disabled_is_uninstrumented()
+    test_counts()
+    test_search_metrics()
+    test_profile_hooks()
+    print("\nAll instrumentation tests passed!")
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from itertools import permutations, product
+from keyspace import CandidateScheduler, Keyspace, frequency_first, matching_rings
+
+def test_matches_nested_loops():
+    keyspace = Keyspace(['ii', 'iv', 'beta', 'gamma'], ['A', 'B', 'C'], ring_choices=[2, 4, 26], positions='EMY')
+    expected = [
+        (list(order), rings, reflector)
+        for order in permutations(['II', 'IV', 'BETA', 'GAMMA'], 3)
+        for rings in product([2, 4, 26], repeat=3)
+        for reflector in ['A', 'B', 'C']
+    ]
+    assert len(keyspace) == len(expected)
+    for index, key in enumerate(keyspace):
+        assert (key['rotors'], key['rings'], key['reflector']) == expected[index]
+        assert key['positions'] == 'EMY'
+        assert keyspace.index(key) == index
+    print("Nested loop order test passed")
+
+def test_rank_unrank_round_trip():
+    keyspace = Keyspace(['I', 'II', 'III', 'IV', 'V'], ['B', 'C'], plugboards=[None, ['AB'], ['AB', 'CD']])
+    assert len(keyspace) == 60 * 26 ** 6 * 2 * 3
+    for index in (0, 1, 12345678, len(keyspace) // 2, len(keyspace) - 1):
+        assert keyspace.index(keyspace[index]) == index
+    assert keyspace[-1] == keyspace[len(keyspace) - 1]
+    assert keyspace[0]['positions'] == 'AAA' and keyspace[len(keyspace) - 1]['rings'] == (26, 26, 26)
+    print("Rank/unrank test passed")
+
+def test_slicing_and_shards():
+    keyspace = Keyspace([['I', 'II', 'III']], ['B'], rings=(1, 1, 1), positions=['ETA', 'AB', 'XYZ'])
+    assert len(keyspace) == 18
+    assert [key['positions'] for key in keyspace[:4]] == ['EAX', 'EAY', 'EAZ', 'EBX']
+    assert [key['positions'] for key in keyspace[3:9:2]] == ['EBX', 'EBZ', 'TAY']
+    shards = keyspace.shards(4)
+    assert [(shard.start, shard.stop) for shard in shards] == [(0, 4), (4, 9), (9, 13), (13, 18)]
+    assert [key for shard in shards for key in shard] == list(keyspace)
+    assert next(shards[1].numbered()) == (4, keyspace[4])
+    print("Slicing test passed")
+
+def test_per_slot_and_shared_choices():
+    # A list of single values fixes each slot just as a tuple does; shared choices are spelled out
+    assert Keyspace(['I'] * 3, rings=[24, 8, 20]).rings == Keyspace(['I'] * 3, rings=(24, 8, 20)).rings
+    assert Keyspace(['I'] * 3, rings=[24, [1, 2], 20]).rings == [[24], [1, 2], [20]]
+    assert Keyspace(['I'] * 3, ring_choices=(24, 8)).rings == [[24, 8]] * 3
+    assert Keyspace(['I'] * 3, position_choices='EM').positions == [['E', 'M']] * 3
+    for bad in ({'rings': [24, 8]}, {'rings': (1, 1, 1), 'ring_choices': [1, 2]}):
+        try:
+            Keyspace(['I', 'II', 'III'], **bad)
+            assert False, f"Should reject {bad}"
+        except ValueError:
+            pass
+    print("Per-slot choices test passed")
+
+def test_scheduler_priority_order():
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    keyspace = Keyspace([['BETA', 'I', 'III']], ['B'], rings=(23, 2, 10))
+    scheduled = [key['positions'] for key in CandidateScheduler(keyspace, [frequency_first(keyspace, 'ETAOINSHRD')])]
+
+    expected = [first + second + third for first in 'ETAOINSHRD' for second in letters for third in letters]
+    expected += [''.join(combo) for combo in product(letters, repeat=3) if combo[0] not in 'ETAOINSHRD']
+    assert scheduled == expected
+    print("Scheduler priority order test passed")
+
+def test_scheduler_deduplicates_tiers():
+    keyspace = Keyspace(['I', 'II', 'III'], ['B', 'C'], ring_choices=[1, 2, 3], positions='AAA')
+    priors = [keyspace[5], keyspace[5], keyspace[40]]
+    scheduled = list(CandidateScheduler(keyspace, [priors] + matching_rings(keyspace)))
+    assert scheduled[:2] == [keyspace[5], keyspace[40]]
+    assert [key['rings'] for key in scheduled[2:5]] == [(1, 1, 1)] * 3
+    assert len(scheduled) == len(keyspace)
+    assert sorted(keyspace.index(key) for key in scheduled) == list(range(len(keyspace)))
+    print("Scheduler de-duplication test passed")
+
+def test_scheduler_is_lazy_on_huge_keyspaces():
+    keyspace = Keyspace(['I', 'II', 'III', 'IV', 'V'], plugboards=[None, ['AB']])
+    assert len(keyspace) > CandidateScheduler.BITMAP_LIMIT
+    scheduler = iter(CandidateScheduler(keyspace, matching_rings(keyspace)))
+    assert next(scheduler)['rings'] == (1, 1, 1)
+    print("Lazy scheduler test passed")
+
+if __name__ == '__main__':
+    test_matches_nested_loops()
+    test_rank_unrank_round_trip()
+    test_slicing_and_shards()
+    test_per_slot_and_shared_choices()
+    test_scheduler_priority_order()
+    test_scheduler_deduplicates_tiers()
+    test_scheduler_is_lazy_on_huge_keyspaces()
+    print("\nAll keyspace tests passed!")
@@ -0,0 +1,35 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import crack_codes
+from enigma import build_enigma
+from parallel import parallel_search, SearchExecutor
+
+def test_first_hit_in_keyspace_order():
+    hits = {37: 'first', 90: 'second', 500: 'third'}
+    for processes in (1, 3):
+        assert parallel_search(hits.get, range(1000), processes=processes, chunk_size=16) == (38, 'first')
+    print("Keyspace order test passed")
+
+def test_no_hit():
+    executor = SearchExecutor({}.get, processes=2, chunk_size=10)
+    assert executor.search(range(95)) is None
+    assert executor.tried == 95
+    print("No hit test passed")
+
+def test_matches_serial_rotor_search():
+    cipher = build_enigma(['IV', 'II', 'I'], 'B', 'DOG', (4, 2, 6), ['AB', 'CD']).process_text(
+        'THEPARALLELSEARCHMUSTAGREEWITHTHESERIALONE')
+    args = (cipher, 'SERIAL', 'DOG', ['AB', 'CD'], ['i', 'ii', 'iv'], [2, 4, 6])
+    serial = crack_codes.test_rotor_ring_reflector(*args, processes=1)
+    pooled = crack_codes.test_rotor_ring_reflector(*args, processes=2)
+    assert serial is not None
+    assert serial == pooled
+    assert serial['rotors'] == ['IV', 'II', 'I'] and serial['rings'] == (4, 2, 6)
+    print("Pooled rotor search test passed")
+
+if __name__ == '__main__':
+    test_first_hit_in_keyspace_order()
+    test_no_hit()
+    test_matches_serial_rotor_search()
+    print("\nAll parallel search tests passed!")
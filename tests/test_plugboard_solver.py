@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from enigma import build_enigma
+import random
+from plugboard_solver import (IncrementalPlugboard, scrambler_sequence, solve_plugboard, _neighbours,
+                              _pairs_to_plug)
+from scoring import get_scorer
+
+PLAIN = ('THEWEATHERREPORTFORTHEMORNINGSHOWSSTRONGWINDSFROMTHENORTHWESTWITHHEAVYRAININTHEHILLS'
+         'ANDALONGTHECOASTTHESUPPLYCONVOYWILLLEAVETHEHARBOURATDAWNANDMUSTREACHTHEBRIDGEBEFORENIGHT'
+         'ALLUNITSARETOREPORTTHEIRPOSITIONSEVERYFOURHOURSANDTOKEEPRADIOSILENCEUNLESSTHEENEMYISSIGHTED')
+PAIRS = ['AQ', 'BW', 'CE', 'DR', 'FT', 'GY', 'HU', 'IJ', 'KL', 'MN']
+
+def test_recovers_full_plugboard():
+    cipher = build_enigma(['II', 'V', 'III'], 'B', 'KDO', (3, 7, 11), PAIRS).process_text(PLAIN)
+    result = solve_plugboard(cipher, ['II', 'V', 'III'], 'B', 'KDO', (3, 7, 11), seed=1)
+    assert result['pairs'] == PAIRS, f"Expected {PAIRS}, got {result['pairs']}"
+    assert result['plaintext'] == PLAIN
+    print("Full plugboard recovery test passed")
+
+def test_known_pairs_stay_fixed():
+    cipher = build_enigma(['II', 'V', 'III'], 'B', 'KDO', (3, 7, 11), PAIRS).process_text(PLAIN)
+    result = solve_plugboard(cipher, ['II', 'V', 'III'], 'B', 'KDO', (3, 7, 11),
+                             known_pairs=PAIRS[:6], restarts=1, seed=2)
+    assert set(PAIRS[:6]) <= set(result['pairs'])
+    assert result['plaintext'] == PLAIN
+    print("Known pairs test passed")
+
+def test_incremental_matches_full_decrypt():
+    cipher = build_enigma(['II', 'V', 'III'], 'B', 'KDO', (3, 7, 11), PAIRS).process_text(PLAIN)
+    sequence = scrambler_sequence(['II', 'V', 'III'], 'B', 'KDO', (3, 7, 11), len(cipher))
+    codes = [ord(char) - ord('A') for char in cipher]
+    scorer = get_scorer(4)
+    engine = IncrementalPlugboard(sequence, codes, _pairs_to_plug(PAIRS[:3]), scorer, crib='CONVOY')
+    rng = random.Random(3)
+    for _ in range(200):
+        a, b = rng.sample(range(26), 2)
+        for candidate in _neighbours(engine.plug, a, b, 10):
+            evaluation = engine.evaluate(candidate)
+            pairs = [chr(x + ord('A')) + chr(y + ord('A')) for x, y in enumerate(candidate) if x < y]
+            plain = build_enigma(['II', 'V', 'III'], 'B', 'KDO', (3, 7, 11), pairs).process_text(cipher)
+            assert abs(evaluation.score - scorer.score(plain)) < 1e-6
+            assert evaluation.crib_hits == {idx for idx in range(len(plain)) if plain.startswith('CONVOY', idx)}
+            if rng.random() < 0.5:
+                engine.apply(evaluation)
+                assert engine.plaintext() == plain
+    print("Incremental rescoring test passed")
+
+if __name__ == '__main__':
+    test_recovers_full_plugboard()
+    test_known_pairs_stay_fixed()
+    test_incremental_matches_full_decrypt()
+    print("\nAll plugboard solver tests passed!")
@@ -0,0 +1,86 @@
+import sys
+import os
+import io
+import json
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import progress
+from progress import JsonLines, Progress, TerminalBar
+from parallel import parallel_search
+
+def test_rate_limited_events():
+    events = []
+    tracker = Progress('demo', 100000, sinks=[events.append], interval=3600)
+    for count in range(1, 100001):
+        tracker.update(count)
+    assert events == []
+    tracker.finish(100000, found=False)
+    assert len(events) == 1 and events[0]['event'] == 'finish' and events[0]['done'] == 100000
+    assert events[0]['found'] is False and events[0]['rate'] > 0
+
+    events = []
+    tracker = Progress('demo', 50, sinks=[events.append], interval=0.01)
+    for count in range(1, 51):
+        time.sleep(0.001)
+        tracker.update(count)
+    assert 1 <= len(events) <= 10
+    assert all(event['event'] == 'progress' and event['eta'] is not None for event in events)
+    assert [event['done'] for event in events] == sorted(event['done'] for event in events)
+    print("Rate-limited events test passed")
+
+def test_resumed_rate():
+    events = []
+    tracker = Progress('resumed', 1000, sinks=[events.append], start=900)
+    tracker.update(910)
+    tracker.finish(950)
+    # Only the 50 candidates of this run count towards the rate
+    assert abs(events[-1]['rate'] * events[-1]['elapsed'] - 50) < 1e-6
+    print("Resumed rate test passed")
+
+def test_sinks():
+    stream = io.StringIO()
+    bar = TerminalBar(stream, width=10)
+    event = {'event': 'progress', 'search': 'demo', 'done': 50, 'total': 200, 'elapsed': 1.0, 'rate': 50.0,
+             'eta': 3.0, 'time': 0}
+    bar(event)
+    bar(dict(event, event='finish', done=200))
+    lines = stream.getvalue()
+    assert lines.startswith('  demo: [##--------]  25% 50/200  50/s  ETA 3.0s\r')
+    assert lines.endswith('[##########] 100% 200/200  50/s  in 1.0s\n')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'progress.jsonl')
+        progress.configure(JsonLines(path))
+        try:
+            Progress('first', 10).finish(10)
+            Progress('second').finish(3)
+        finally:
+            progress.configure()
+        with open(path) as handle:
+            events = [json.loads(line) for line in handle]
+    assert [(event['search'], event['done'], event['total']) for event in events] == [('first', 10, 10), ('second', 3, None)]
+    print("Progress sinks test passed")
+
+def first_multiple(divisor, candidate):
+    return candidate if candidate and candidate % divisor == 0 else None
+
+def test_pooled_matches_serial():
+    from functools import partial
+    finals = []
+    for processes in (1, 2):
+        events = []
+        tracker = Progress('pooled', 5000, sinks=[events.append], interval=0)
+        found = parallel_search(partial(first_multiple, 4099), range(5000), processes=processes, chunk_size=256,
+                                progress=tracker.update)
+        tracker.finish(found[0], found=True)
+        finals.append((events[-1]['done'], events[-1]['found']))
+    assert finals[0] == finals[1] == (4100, True)
+    print("Pooled progress test passed")
+
+if __name__ == '__main__':
+    test_rate_limited_events()
+    test_resumed_rate()
+    test_sinks()
+    test_pooled_matches_serial()
+    print("\nAll progress tests passed!")
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import numpy as np
+from scoring import get_scorer, ic_array
+from advanced_crack_codes import calculate_ic
+
+def test_english_beats_gibberish():
+    scorer = get_scorer(4)
+    english = scorer.score('THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG')
+    gibberish = scorer.score('XQZVJKWPQZXVBNMQWZXJQKVZPXWQJZKXVQ')
+    assert english > gibberish
+    print("English beats gibberish test passed")
+
+def test_score_ignores_non_letters():
+    scorer = get_scorer(3)
+    assert scorer.score('the cat, the hat!') == scorer.score('THECATTHEHAT')
+    assert scorer.score('AB') == 0
+    print("Non-letter handling test passed")
+
+def test_batch_matches_single():
+    rng = np.random.default_rng(7)
+    batch = rng.integers(0, 26, (50, 40))
+    for n in (2, 3, 4):
+        scorer = get_scorer(n)
+        scores = scorer.score_array(batch)
+        assert scores.shape == (50,)
+        for row, score in zip(batch, scores):
+            assert np.isclose(score, scorer.score_codes(list(row)))
+    print("Batch scoring test passed")
+
+def test_ic_array_matches_calculate_ic():
+    texts = ['HELLOWORLDTHISISATEST', 'ABCDEFGHIJKLMNOPQRSTU']
+    codes = np.array([[ord(char) - ord('A') for char in text] for text in texts])
+    for text, ic in zip(texts, ic_array(codes)):
+        assert np.isclose(ic, calculate_ic(text))
+    print("IC array test passed")
+
+if __name__ == '__main__':
+    test_english_beats_gibberish()
+    test_score_ignores_non_letters()
+    test_batch_matches_single()
+    test_ic_array_matches_calculate_ic()
+    print("\nAll scoring tests passed!")